@@ -0,0 +1,153 @@
+"""
+Bulk scoring of many ScamEventInput events (POST /detect/batch and offline CLI).
+
+Events are grouped by sessionId and each session is replayed in input order
+through the regular detection pipeline, with up to BATCH_MAX_CONCURRENCY
+sessions in flight. Extraction is packed: up to BATCH_EXTRACTION_SIZE
+messages share one LLM call, scheduled so each session's next message is
+extracted first. Intent scoring depends on the session timeline so far and
+stays one call per message. Results stream back as NDJSON lines as soon as
+they are ready, tagged with the event's input index.
+
+CLI (uses the configured Redis and Groq, like the server):
+    python batch_detect.py events.ndjson [-o results.ndjson] [--respond] [--concurrency N]
+"""
+import sys
+import json
+import asyncio
+import argparse
+import contextlib
+from collections import OrderedDict
+from pydantic import ValidationError
+from config import Config
+from models import ScamEventInput
+from fast_json import event_from_data
+
+
+def parse_batch(body: bytes, content_type: str = "") -> tuple:
+    """
+    Parses an NDJSON body (one event per line), a JSON array, or {"events": [...]}.
+    Returns ([(index, event)], [error result]) so one bad line does not fail the batch.
+    """
+    text = body.decode("utf-8")
+    data = None
+    if "ndjson" not in content_type:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            pass  # several lines of JSON: NDJSON without the content type
+    if isinstance(data, list):
+        raw = data
+    elif isinstance(data, dict) and "events" in data:
+        raw = data["events"]
+    else:
+        raw = [line for line in text.splitlines() if line.strip()]
+
+    items, errors = [], []
+    for index, entry in enumerate(raw):
+        try:
+            entry = json.loads(entry) if isinstance(entry, str) else entry
+            items.append((index, event_from_data(entry) if Config.FAST_INGEST else ScamEventInput.model_validate(entry)))
+        except (ValueError, ValidationError) as e:
+            errors.append({"index": index, "status": "error", "message": f"Invalid event: {e}"})
+    return items, errors
+
+
+def group_by_session(items: list) -> "OrderedDict[str, list]":
+    """sessionId -> [(index, event)], in input order within each session."""
+    sessions = OrderedDict()
+    for index, event in items:
+        sessions.setdefault(event.sessionId, []).append((index, event))
+    return sessions
+
+
+def schedule_extraction(sessions: dict, extraction_agent) -> dict:
+    """
+    Starts packed extraction for every distinct text and returns text -> future.
+    Texts are ordered by their position within their session, so the first
+    chunks unblock the first message of every session.
+    """
+    ranked = sorted(
+        (rank, event.message.text)
+        for events in sessions.values()
+        for rank, (_, event) in enumerate(events)
+    )
+    texts = list(dict.fromkeys(text for _, text in ranked))
+    size = max(1, Config.BATCH_EXTRACTION_SIZE)
+    futures = {}
+    for start in range(0, len(texts), size):
+        chunk = texts[start:start + size]
+        task = asyncio.ensure_future(extraction_agent.extract_signals_batch(chunk))
+        for position, text in enumerate(chunk):
+            futures[text] = (task, position)
+    return futures
+
+
+async def run_batch(items: list, process_event, extraction_agent, respond: bool = False,
+                    concurrency: int = None):
+    """
+    Yields one result dict per event, as sessions progress. Messages that end up
+    on a shortcut path (fast path, campaign, reputation) ignore their pre-extracted
+    signals; set BATCH_PACK_EXTRACTION=false if most of a dump is expected to.
+    """
+    sessions = group_by_session(items)
+    futures = schedule_extraction(sessions, extraction_agent) if Config.BATCH_PACK_EXTRACTION else {}
+    limit = asyncio.Semaphore(concurrency or Config.BATCH_MAX_CONCURRENCY)
+    results = asyncio.Queue()
+
+    async def replay(events: list):
+        async with limit:
+            for index, event in events:
+                try:
+                    signals = None
+                    if event.message.text in futures:
+                        task, position = futures[event.message.text]
+                        signals = (await task)[position]
+                    result = await process_event(event, signals=signals, respond=respond)
+                    line = {"index": index, "status": "success",
+                            **result.model_dump(mode="json", exclude_none=True)}
+                except Exception as e:
+                    line = {"index": index, "sessionId": event.sessionId, "status": "error", "message": str(e)}
+                await results.put(line)
+
+    workers = [asyncio.create_task(replay(events)) for events in sessions.values()]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        for worker in workers:
+            worker.cancel()
+        for task, _ in futures.values():
+            task.cancel()
+
+
+async def run_file(path: str, output, respond: bool, concurrency: int):
+    import main  # the same pipeline singletons as the server
+
+    with open(path, "rb") as f:
+        items, errors = parse_batch(f.read(), "application/x-ndjson")
+    for error in errors:
+        output.write(json.dumps(error) + "\n")
+    # Pipeline logs go to stderr so stdout stays valid NDJSON.
+    # Windows of BATCH_MAX_EVENTS keep memory bounded; sessions stay ordered across windows
+    with contextlib.redirect_stdout(sys.stderr):
+        for start in range(0, len(items), Config.BATCH_MAX_EVENTS):
+            window = items[start:start + Config.BATCH_MAX_EVENTS]
+            async for line in run_batch(window, main.process_event, main.extraction_agent, respond, concurrency):
+                output.write(json.dumps(line) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score an NDJSON file of ScamEventInput events")
+    parser.add_argument("events", help="NDJSON file, one event per line")
+    parser.add_argument("-o", "--output", help="results file (default: stdout)")
+    parser.add_argument("--respond", action="store_true", help="also generate persona replies / callbacks")
+    parser.add_argument("--concurrency", type=int, default=Config.BATCH_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        asyncio.run(run_file(args.events, out, args.respond, args.concurrency))
+    finally:
+        if out is not sys.stdout:
+            out.close()
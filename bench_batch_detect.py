@@ -0,0 +1,106 @@
+"""
+Backfill throughput: one /detect request per message vs POST /detect/batch.
+
+Replays S sessions x T messages through the app in-process (FakeRedis,
+llm_stub with fixed latency). The per-request baseline issues /detect calls
+with the same session concurrency as the batch endpoint, so the difference
+comes from per-request overhead and packed extraction.
+
+Usage: python bench_batch_detect.py [sessions] [turns] [llm_latency_ms]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import contextlib
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, stub_gateway
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+SCRIPT = [
+    "Hello sir, this is Rohit from the electricity board, case {s}",
+    "Your meter reading for account {s} is pending verification",
+    "Please confirm your consumer number {s} and registered name",
+    "Our records show a pending bill, reference {s}-{t}",
+    "If not cleared, supply will be disconnected, ticket {s}-{t}",
+    "You can pay the amount to our officer, note {s}-{t}",
+]
+
+
+def build_events(sessions: int, turns: int) -> list:
+    return [
+        {"sessionId": f"backfill-{s}",
+         "message": {"sender": "scammer", "text": SCRIPT[t % len(SCRIPT)].format(s=s, t=t)}}
+        for t in range(turns) for s in range(sessions)
+    ]
+
+
+def install(latency_ms: float) -> LLMStub:
+    stub = LLMStub(latency_ms=latency_ms)
+    main.memory_store.redis = FakeRedis()
+    gateway = stub_gateway(stub)
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+    return stub
+
+
+async def per_request(client, events: list):
+    by_session = {}
+    for e in events:
+        by_session.setdefault(e["sessionId"], []).append(e)
+    limit = asyncio.Semaphore(Config.BATCH_MAX_CONCURRENCY)
+
+    async def replay(session_events):
+        async with limit:
+            for e in session_events:
+                assert (await client.post("/detect", json=e, headers=HEADERS)).status_code == 200
+
+    await asyncio.gather(*(replay(v) for v in by_session.values()))
+
+
+async def batch(client, events: list):
+    body = "\n".join(json.dumps(e) for e in events)
+    resp = await client.post("/detect/batch", content=body, timeout=None,
+                             headers={**HEADERS, "content-type": "application/x-ndjson"})
+    assert resp.status_code == 200 and len(resp.text.splitlines()) == len(events)
+
+
+async def measure(label: str, runner, events: list, latency_ms: float):
+    stub = install(latency_ms)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            start = time.perf_counter()
+            await runner(client, events)
+            elapsed = time.perf_counter() - start
+    llm_calls = sum(stub.calls.values())
+    print(f"{label:<22} {len(events) / elapsed:8.1f} msg/s  {elapsed:6.2f}s  "
+          f"LLM calls/msg={llm_calls / len(events):.2f} (extraction {stub.calls['extraction']})")
+
+
+async def run(sessions: int, turns: int, latency_ms: float):
+    events = build_events(sessions, turns)
+    print(f"sessions={sessions} turns={turns} messages={len(events)} llm_latency={latency_ms}ms "
+          f"concurrency={Config.BATCH_MAX_CONCURRENCY}")
+    await measure("per-request /detect", per_request, events, latency_ms)
+    Config.BATCH_PACK_EXTRACTION = False
+    await measure("batch (unpacked)", batch, events, latency_ms)
+    Config.BATCH_PACK_EXTRACTION = True
+    await measure("batch (packed)", batch, events, latency_ms)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 64,
+        int(args[1]) if len(args) > 1 else 6,
+        float(args[2]) if len(args) > 2 else 150,
+    ))
@@ -0,0 +1,105 @@
+"""
+Lookup latency of the MinHash/LSH campaign index at scale.
+
+Fills the index (FakeRedis) with N entries, most of them synthetic random
+signatures plus a set of real campaign templates, then times lookups of
+unseen variants of those templates and of unrelated messages. Latency covers
+signature computation and both pipelined Redis round trips (in-memory here,
+so add your Redis RTT x2 for production numbers).
+
+Usage: python bench_campaign_index.py [entries]   (default 1,000,000; needs a few GB of RAM)
+"""
+import sys
+import time
+import random
+import asyncio
+import statistics
+
+from config import Config
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from models import ExtractedSignals
+from campaign_index import CampaignIndex, MAX_HASH
+
+NAMES = ["Ramesh", "Sunita", "Arjun", "Priya", "Vikram", "Anita", "Rahul", "Kavya"]
+TEMPLATES = [
+    "Dear {name}, your electricity bill of Rs {amount} is unpaid. Power will be disconnected tonight at {hour} pm. Pay immediately at {link}",
+    "Dear customer {name}, your KYC has expired and your SBI account will be blocked in {hour} hours. Update KYC now at {link}",
+    "Congratulations {name}! You have won a cashback of Rs {amount}. Share the OTP sent to your phone to receive it at {link}",
+    "{name}, your parcel is held at customs. Pay clearance fee of Rs {amount} via UPI to customs{hour}@ybl within {hour} hours",
+    "Hello {name}, this is TRAI. Your mobile number will be deactivated in {hour} hours due to illegal activity. Press 9 or call {link}",
+]
+UNRELATED = [
+    "Hi {name}, are we still meeting for lunch tomorrow near the office?",
+    "{name}, the quarterly report is attached, please review by {hour} pm",
+    "Happy birthday {name}! Have a great year ahead",
+]
+
+SIGNALS = ExtractedSignals(
+    urgency_detected=True, sensitive_info_request=True, suspicious_links=[], suspicious_upi=[],
+    suspicious_phones=[], sentiment="negative", conversation_phase="Urgency", tone="Aggressive",
+)
+
+
+def render(template: str, rng: random.Random) -> str:
+    return template.format(
+        name=rng.choice(NAMES),
+        amount=f"{rng.randint(100, 9999):,}",
+        hour=rng.randint(1, 12),
+        link=f"http://bit.ly/{rng.getrandbits(24):x}",
+    )
+
+
+async def populate(index: CampaignIndex, entries: int, rng: random.Random):
+    batch = 2000
+    for start in range(0, entries, batch):
+        pipe = index.redis.pipeline(transaction=False)
+        for i in range(start, min(start + batch, entries)):
+            signature = [rng.getrandbits(32) & MAX_HASH for _ in range(index.num_perm)]
+            entry_id = f"{i:016x}"
+            pipe.hset(f"lsh:e:{entry_id}", mapping={"sig": index.encode(signature), "signals": "{}"})
+            for key in index.bucket_keys(signature):
+                pipe.sadd(key, entry_id)
+            pipe.zadd("lsh:order", {entry_id: i})
+        await pipe.execute()
+    for template in TEMPLATES:
+        await index.add(render(template, rng), SIGNALS)
+
+
+async def timed_lookups(index: CampaignIndex, texts: list) -> tuple:
+    latencies, hits = [], 0
+    for text in texts:
+        start = time.perf_counter()
+        match = await index.lookup(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += match is not None
+    return latencies, hits
+
+
+async def run(entries: int):
+    Config.CAMPAIGN_INDEX_MAX_ENTRIES = entries + len(TEMPLATES)
+    rng = random.Random(42)
+    store = MemoryStore()
+    store.redis = FakeRedis()
+    index = CampaignIndex(store)
+
+    start = time.perf_counter()
+    await populate(index, entries, rng)
+    print(f"indexed {entries + len(TEMPLATES):,} entries in {time.perf_counter() - start:.1f}s")
+
+    variants = [render(rng.choice(TEMPLATES), rng) for _ in range(500)]
+    unrelated = [render(rng.choice(UNRELATED), rng) for _ in range(500)]
+    variant_ms, variant_hits = await timed_lookups(index, variants)
+    unrelated_ms, unrelated_hits = await timed_lookups(index, unrelated)
+
+    def pct(values, p):
+        return sorted(values)[int(p * (len(values) - 1))]
+
+    print(f"variants : recall {variant_hits / len(variants):.1%}  "
+          f"p50 {statistics.median(variant_ms):.3f}ms  p99 {pct(variant_ms, 0.99):.3f}ms")
+    print(f"unrelated: false matches {unrelated_hits}  "
+          f"p50 {statistics.median(unrelated_ms):.3f}ms  p99 {pct(unrelated_ms, 0.99):.3f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
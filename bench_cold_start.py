@@ -0,0 +1,86 @@
+"""
+Cold start of one worker: fresh processes, each importing main.py, running
+the app's lifespan and then serving two /detect requests, with the startup
+warm-up on (default) and off.
+
+The LLM is llm_stub.py served over a real local socket (GROQ_BASE_URL), so
+the gateway's pool, connect and warm-up are the production code paths;
+Redis is FakeRedis in-process, as no server is assumed. Against a remote
+Groq endpoint the warm-up also takes the TLS handshake off the first request.
+
+Reports medians: process spawn -> ready, the startup phases (warmup.py) and
+the first / second request latency.
+
+Usage: python bench_cold_start.py [runs] [llm_latency_ms]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import statistics
+import subprocess
+
+STUB_PORT = 18100
+
+
+async def child():
+    """One cold worker (run with --child); prints its measurements as JSON."""
+    spawned_at = float(os.environ["BENCH_SPAWNED_AT"])
+    import httpx
+    import main
+    from fake_redis import FakeRedis
+    from structured_logging import setup_logging
+
+    setup_logging(level="WARNING")
+    main.memory_store.redis = FakeRedis()
+    main.extraction_agent.cache = None
+    headers = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+    async with main.app.router.lifespan_context(main.app):
+        ready_ms = (time.time() - spawned_at) * 1000
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            latencies = []
+            for turn in range(2):
+                payload = {"sessionId": "cold", "message": {"sender": "scammer", "text": f"Hello, is this Ravi? {turn}"}}
+                start = time.perf_counter()
+                assert (await client.post("/detect", json=payload, headers=headers)).status_code == 200
+                latencies.append((time.perf_counter() - start) * 1000)
+    print(json.dumps({"ready": ready_ms, "first": latencies[0], "second": latencies[1],
+                      **main.warmup.timings_ms}))
+
+
+def cold_start(warmup: bool) -> dict:
+    env = {**os.environ, "SERVICE_API_KEY": "bench-key", "GROQ_BASE_URL": f"http://127.0.0.1:{STUB_PORT}",
+           "WARMUP_ENABLED": "true" if warmup else "false", "LOG_LEVEL": "WARNING",
+           # Every request through the LLM (no rule / reputation / campaign shortcuts)
+           "FAST_PATH_MODE": "off", "REPUTATION_ENABLED": "false", "CAMPAIGN_INDEX_ENABLED": "false",
+           "BENCH_SPAWNED_AT": repr(time.time())}
+    output = subprocess.run([sys.executable, __file__, "--child"], env=env, capture_output=True, text=True,
+                            check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(runs: int, latency_ms: float):
+    stub = subprocess.Popen([sys.executable, "llm_stub.py", "--port", str(STUB_PORT), "--latency-ms", str(latency_ms)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        time.sleep(2.0)
+        print(f"{runs} cold starts per mode, LLM stub latency={latency_ms}ms (local socket)")
+        fields = ("ready", "import", "connect", "warm", "warm.redis", "warm.llm", "startup", "first", "second")
+        print("warm-up  " + "".join(f"{field:>12}" for field in fields))
+        for warmup in (True, False):
+            samples = [cold_start(warmup) for _ in range(runs)]
+            medians = [statistics.median(s.get(field, 0.0) for s in samples) for field in fields]
+            print(f"{'on ' if warmup else 'off'}      " + "".join(f"{m:10.1f}ms" for m in medians))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "--child":
+        asyncio.run(child())
+    else:
+        run(int(args[0]) if args else 5, float(args[1]) if len(args) > 1 else 50.0)
@@ -0,0 +1,246 @@
+"""
+End-to-end load test: replays synthetic multi-turn conversations through
+the app in-process (FakeRedis, llm_stub for all three agents) at a fixed
+session concurrency, with no network, API key or live Redis.
+
+Reports throughput, request latency and p50/p95/p99 per pipeline stage
+(taken from the per-request "detect verdict" log records), LLM calls per
+message by agent, and Redis round trips/commands per message. Each
+conversation sends its next message after the previous reply, like the
+platform does. Everything is seeded, so call and round-trip counts are
+exactly repeatable; the --max-* budgets make it usable as a CI gate.
+
+Usage: python bench_e2e.py [--sessions N] [--concurrency C] [--latency-ms L] [--jitter-ms J]
+                           [--json] [--max-p99-ms X] [--max-llm-calls X] [--max-redis-round-trips X]
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, stub_gateway
+from structured_logging import setup_logging
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+# Scammer side of each scenario; {s} makes artifacts unique per session
+CONVERSATIONS = {
+    "kyc": [
+        "Dear customer, this is SBI support regarding your account",
+        "Your KYC is pending, account will be blocked today",
+        "Share the OTP sent to your mobile to verify immediately",
+        "Or pay Rs 10 verification fee to kyc.verify{s}@ybl",
+        "Call our officer on 98765{s:05d} now, last warning",
+        "Final notice, send OTP or I am blocking you",
+    ],
+    "electricity": [
+        "Hello sir, this is Rohit from the electricity board",
+        "Your meter reading for consumer {s} is pending verification",
+        "Your power will be disconnected tonight at 9:30 pm",
+        "Urgent: pay the pending bill at http://bill-update-{s}.in/pay",
+        "Transfer to account 5012{s:08d} IFSC SBIN0001234 to avoid disconnection",
+    ],
+    "lottery": [
+        "Congratulations! You have won Rs 25 lakh in the KBC lucky draw",
+        "To claim your prize, pay the processing fee today",
+        "Send Rs 4999 to winner.claim{s}@paytm urgently",
+        "Share your bank account number and OTP to release funds",
+    ],
+    # Opens with a payment demand plus an OTP ask: resolved by the rule fast path
+    "refund": [
+        "URGENT: your SBI account is blocked. Share the OTP and pay Rs 10 to refund.desk{s}@ybl immediately",
+        "Sir, did you pay? The account will be closed today",
+        "Send the OTP now or lose your money",
+    ],
+    "benign": [
+        "Hello, is this Ravi?",
+        "I am your neighbour from flat {s}, we met at the market",
+        "Are you coming to the society meeting on Sunday?",
+        "Okay, see you there",
+    ],
+}
+SCENARIO_WEIGHTS = {"kyc": 3, "electricity": 3, "lottery": 2, "refund": 2, "benign": 2}
+
+
+def build_sessions(count: int, seed: int = 7) -> list:
+    """[(sessionId, scenario, [messages])], deterministic for a seed."""
+    rng = random.Random(seed)
+    names = [name for name, weight in SCENARIO_WEIGHTS.items() for _ in range(weight)]
+    sessions = []
+    for s in range(count):
+        scenario = rng.choice(names)
+        messages = [line.format(s=s) for line in CONVERSATIONS[scenario]]
+        sessions.append((f"e2e-{scenario}-{s}", scenario, messages))
+    return sessions
+
+
+class VerdictCollector(logging.Handler):
+    """Keeps the fields of every "detect verdict" record (stage timings, decision path)."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord):
+        if record.getMessage() == "detect verdict":
+            self.records.append(dict(getattr(record, "fields", {})))
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize(values: list) -> dict:
+    return {"count": len(values), "p50": percentile(values, 50), "p95": percentile(values, 95),
+            "p99": percentile(values, 99)}
+
+
+def install(latency_ms: float, jitter_ms: float, seed: int) -> tuple:
+    fake = FakeRedis()
+    main.memory_store.redis = fake
+    if main.memory_store.cache is not None:
+        main.memory_store.cache.clear()
+    stub = LLMStub(latency_ms=latency_ms, jitter_ms=jitter_ms, seed=seed)
+    gateway = stub_gateway(stub)
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    if main.extraction_agent.cache is not None:
+        main.extraction_agent.cache.local.clear()
+    return fake, stub
+
+
+async def replay(sessions: int = 100, concurrency: int = 20, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, seed: int = 7, records: list = None) -> dict:
+    """
+    Replays `sessions` conversations, `concurrency` at a time. Returns the report;
+    the raw verdict records are appended to `records` if given.
+    """
+    fake, stub = install(latency_ms, jitter_ms, seed)
+    collector = VerdictCollector()
+    setup_logging(collector, level="INFO", use_queue=False)
+    sample_rate, Config.LOG_SAMPLE_RATE = Config.LOG_SAMPLE_RATE, 1.0
+    conversations = build_sessions(sessions, seed)
+    latencies = []
+    errors = 0
+    limit = asyncio.Semaphore(concurrency)
+
+    async def converse(client, session_id: str, messages: list):
+        nonlocal errors
+        history = []
+        async with limit:
+            for text in messages:
+                message = {"sender": "scammer", "text": text}
+                payload = {"sessionId": session_id, "message": message, "conversationHistory": list(history)}
+                t0 = time.perf_counter()
+                response = await client.post("/detect", json=payload, headers=HEADERS)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                history.append(message)
+                reply = response.json().get("reply")
+                if reply:
+                    history.append({"sender": "user", "text": reply})
+
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://e2e", timeout=120) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(converse(client, sid, msgs) for sid, _, msgs in conversations))
+            elapsed = time.perf_counter() - start
+    finally:
+        Config.LOG_SAMPLE_RATE = sample_rate
+        setup_logging()
+
+    if records is not None:
+        records.extend(collector.records)
+    messages = len(latencies)
+    stages = {}
+    paths = {}
+    for record in collector.records:
+        for stage, ms in record.get("stages_ms", {}).items():
+            stages.setdefault(stage, []).append(ms)
+        stages.setdefault("total", []).append(record.get("total_ms", 0.0))
+        paths[record.get("path")] = paths.get(record.get("path"), 0) + 1
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "llm_latency_ms": latency_ms,
+        "messages": messages,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_msg_s": round(messages / elapsed, 1) if elapsed else 0.0,
+        "request_ms": summarize(latencies),
+        "stages_ms": {stage: summarize(values) for stage, values in sorted(stages.items())},
+        "llm_calls_per_msg": round(sum(stub.calls.values()) / max(messages, 1), 3),
+        "llm_calls_by_agent": dict(stub.calls),
+        "redis_round_trips_per_msg": round(fake.round_trips / max(messages, 1), 3),
+        "redis_commands_per_msg": round(fake.commands / max(messages, 1), 3),
+        "paths": paths,
+    }
+
+
+def print_report(report: dict):
+    print(f"sessions={report['sessions']} concurrency={report['concurrency']} "
+          f"LLM latency={report['llm_latency_ms']}ms messages={report['messages']} errors={report['errors']}")
+    print(f"throughput            {report['throughput_msg_s']:.1f} msg/s")
+    print(f"LLM calls/msg         {report['llm_calls_per_msg']:.3f}  {report['llm_calls_by_agent']}")
+    print(f"Redis round trips/msg {report['redis_round_trips_per_msg']:.3f}  "
+          f"commands/msg {report['redis_commands_per_msg']:.3f}")
+    print(f"decision paths        {report['paths']}")
+    print(f"{'stage':<18}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = [("request", report["request_ms"])] + list(report["stages_ms"].items())
+    for stage, s in rows:
+        print(f"{stage:<18}{s['count']:>7}{s['p50']:>10.2f}{s['p95']:>10.2f}{s['p99']:>10.2f}")
+
+
+def check_budgets(report: dict, args) -> list:
+    failures = []
+    if report["errors"]:
+        failures.append(f"{report['errors']} requests failed")
+    if args.max_p99_ms is not None and report["request_ms"]["p99"] > args.max_p99_ms:
+        failures.append(f"request p99 {report['request_ms']['p99']:.1f}ms > {args.max_p99_ms}ms")
+    if args.max_llm_calls is not None and report["llm_calls_per_msg"] > args.max_llm_calls:
+        failures.append(f"LLM calls/msg {report['llm_calls_per_msg']} > {args.max_llm_calls}")
+    if args.max_redis_round_trips is not None and report["redis_round_trips_per_msg"] > args.max_redis_round_trips:
+        failures.append(f"Redis round trips/msg {report['redis_round_trips_per_msg']} > {args.max_redis_round_trips}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="In-process end-to-end load test")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="conversations in flight")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stub LLM latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--max-p99-ms", type=float, help="fail if request p99 exceeds this")
+    parser.add_argument("--max-llm-calls", type=float, help="fail if LLM calls per message exceed this")
+    parser.add_argument("--max-redis-round-trips", type=float, help="fail if Redis round trips per message exceed this")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args.sessions, args.concurrency, args.latency_ms, args.jitter_ms, args.seed))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    failures = check_budgets(report, args)
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
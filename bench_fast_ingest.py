@@ -0,0 +1,100 @@
+"""
+Requests/sec per core of /detect ingestion and response encoding, FAST_INGEST
+off (ScamEventInput.model_validate_json + response_model) vs on (fast_json.py),
+for a small body and one carrying a 100-message conversationHistory.
+
+  codec      parse the body + encode the response, nothing else
+  detect     full /detect in-process (FakeRedis, llm_stub at 0ms), one client,
+             sequential requests on fresh sessions: the whole per-request CPU
+             cost on one core (HISTORY_RECONCILE as configured; when on, every
+             request is a cold-session bootstrap of its history)
+
+Usage: python bench_fast_ingest.py [requests]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from fast_json import parse_event, encode_response, orjson
+from llm_stub import LLMStub, stub_gateway
+from models import ScamEventInput, AgentAPIResponse
+from structured_logging import setup_logging
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"], "content-type": "application/json"}
+
+
+def payload(session_id: str, history: int) -> dict:
+    messages = [{"sender": "scammer" if i % 2 == 0 else "user", "text": f"Your account {i} will be blocked today, "
+                 "share the OTP to keep it active", "timestamp": "2026-01-01T10:00:00"} for i in range(history)]
+    return {"sessionId": session_id, "message": {"sender": "scammer", "text": "Hello, is this Ravi?"},
+            "conversationHistory": messages, "metadata": {"channel": "SMS", "language": "English"}}
+
+
+def codec(body: bytes, fast: bool) -> float:
+    """Best-of-3 requests/sec for parse + encode."""
+    loops = 3000
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(loops):
+            if fast:
+                parse_event(body)
+                encode_response("success", "Which account?")
+            else:
+                ScamEventInput.model_validate_json(body)
+                AgentAPIResponse(status="success", reply="Which account?").model_dump_json(exclude_unset=True)
+        best = min(best, time.perf_counter() - start)
+    return loops / best
+
+
+async def detect(client, history: int, fast: bool, requests: int) -> float:
+    Config.FAST_INGEST = fast
+    main.memory_store.redis = FakeRedis()
+    if main.memory_store.cache is not None:
+        main.memory_store.cache.clear()
+    bodies = [json.dumps(payload(f"bench-{fast}-{history}-{i}", history)).encode() for i in range(requests)]
+    start = time.perf_counter()
+    for body in bodies:
+        assert (await client.post("/detect", content=body, headers=HEADERS)).status_code == 200
+    return requests / (time.perf_counter() - start)
+
+
+async def run(requests: int):
+    setup_logging(level="WARNING")
+    fast_ingest = Config.FAST_INGEST
+    gateway = stub_gateway(LLMStub(latency_ms=0, jitter_ms=0))
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+    print(f"orjson {'installed' if orjson is not None else 'missing (json fallback)'}  "
+          f"HISTORY_RECONCILE={Config.HISTORY_RECONCILE}")
+    try:
+        for history in (0, 100):
+            body = json.dumps(payload("codec", history)).encode()
+            slow, fast = codec(body, False), codec(body, True)
+            print(f"codec   {history:3d}-message history {len(body):6d} bytes  "
+                  f"pydantic {slow:8.0f} req/s  fast {fast:8.0f} req/s  x{fast / slow:.1f}")
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            await detect(client, 0, True, 20)  # warm-up
+            for history in (0, 100):
+                slow = await detect(client, history, False, requests)
+                fast = await detect(client, history, True, requests)
+                print(f"detect  {history:3d}-message history  "
+                      f"pydantic {slow:8.0f} req/s  fast {fast:8.0f} req/s  x{fast / slow:.2f}")
+    finally:
+        Config.FAST_INGEST = fast_ingest
+        setup_logging()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(int(args[0]) if args else 300))
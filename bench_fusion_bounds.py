@@ -0,0 +1,89 @@
+"""
+LLM calls saved by early-exit fusion (risk_fusion.py) on the bench_e2e replay
+corpus.
+
+Live: replays the corpus with FUSION_EARLY_EXIT off and on for a few fusion
+weightings and reports intent-scorer calls, calls saved, and verdicts that
+differ between the two runs (must be 0). Speculative scoring is off, because
+it launches the scorer before the rule risk is known.
+
+Offline: re-scores the (rule_risk, llm_intent) pairs of the early-exit-off
+run with the default weights in one batch (NumPy when installed), and shows
+for a grid of weightings what share of LLM-path turns the bounds would decide.
+
+Usage: python bench_fusion_bounds.py [sessions] [concurrency]
+"""
+import sys
+import asyncio
+
+import main
+from bench_e2e import replay
+from config import Config
+from risk_fusion import LinearFusion, np
+
+WEIGHTINGS = [(0.2, 0.8, 0.75), (0.5, 0.5, 0.75), (0.4, 0.6, 0.7), (0.6, 0.4, 0.6)]
+
+
+def verdicts(records: list) -> dict:
+    return {(r["sessionId"], r["turn"]): r["verdict"] for r in records}
+
+
+async def live(sessions: int, concurrency: int, alpha: float, beta: float, threshold: float):
+    Config.ALPHA, Config.BETA, Config.SCAM_THRESHOLD = alpha, beta, threshold
+    runs = {}
+    for early_exit in (False, True):
+        Config.FUSION_EARLY_EXIT = early_exit
+        records = []
+        report = await replay(sessions, concurrency, records=records)
+        runs[early_exit] = (report, records)
+    (base, base_records), (exit_, exit_records) = runs[False], runs[True]
+    scorer_calls = base["llm_calls_by_agent"].get("scorer", 0)
+    saved = scorer_calls - exit_["llm_calls_by_agent"].get("scorer", 0)
+    base_verdicts, exit_verdicts = verdicts(base_records), verdicts(exit_records)
+    mismatches = sum(1 for key, v in base_verdicts.items() if exit_verdicts.get(key) != v)
+    print(f"α={alpha:.1f} β={beta:.1f} T={threshold:.2f}  scorer calls {scorer_calls:4d} -> "
+          f"{scorer_calls - saved:4d}  saved {saved:4d} ({saved / max(scorer_calls, 1):5.1%})  "
+          f"LLM calls/msg {base['llm_calls_per_msg']:.3f} -> {exit_['llm_calls_per_msg']:.3f}  "
+          f"verdict mismatches {mismatches}")
+    return base_records
+
+
+def offline(records: list):
+    llm_turns = [r for r in records if r.get("path") == "llm"]
+    rule_risks = [r["rule_risk"] for r in llm_turns]
+    intents = [r["llm_intent"] for r in llm_turns]
+    fused = LinearFusion(alpha=0.2, beta=0.8).fuse_batch(rule_risks, intents)
+    drift = max((abs(f - r["final_risk"]) for f, r in zip(list(fused), llm_turns)), default=0.0)
+    print(f"\noffline: {len(llm_turns)} LLM-path turns re-scored in one batch "
+          f"({'NumPy' if np is not None else 'pure Python'}), max drift vs logged {drift:.4f}")
+    print(f"{'α':>5}{'β':>5}{'T':>6}{'decided by bounds':>20}")
+    for alpha in (0.2, 0.3, 0.4, 0.5, 0.6):
+        for threshold in (0.6, 0.7, 0.75):
+            decided = LinearFusion(alpha=alpha, beta=1 - alpha).decided_batch(rule_risks, threshold)
+            share = sum(1 for d in decided if d is not None) / max(len(decided), 1)
+            print(f"{alpha:>5.1f}{1 - alpha:>5.1f}{threshold:>6.2f}{share:>20.1%}")
+
+
+async def run(sessions: int, concurrency: int):
+    saved = (Config.ALPHA, Config.BETA, Config.SCAM_THRESHOLD, Config.FUSION_EARLY_EXIT,
+             Config.SPECULATIVE_SCORING)
+    Config.SPECULATIVE_SCORING = False
+    print(f"sessions={sessions} concurrency={concurrency} (bench_e2e corpus, speculative scoring off)")
+    try:
+        records = None
+        for alpha, beta, threshold in WEIGHTINGS:
+            run_records = await live(sessions, concurrency, alpha, beta, threshold)
+            records = records if records is not None else run_records
+        offline(records)
+    finally:
+        (Config.ALPHA, Config.BETA, Config.SCAM_THRESHOLD, Config.FUSION_EARLY_EXIT,
+         Config.SPECULATIVE_SCORING) = saved
+        main.speculation_stats.update(speculative=0, rescored=0)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 100,
+        int(args[1]) if len(args) > 1 else 20,
+    ))
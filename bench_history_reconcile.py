@@ -0,0 +1,137 @@
+"""
+Cost of conversationHistory per request, and what HISTORY_RECONCILE does
+with it, in-process (FakeRedis, llm_stub at a fixed latency).
+
+  parse      ScamEventInput.model_validate_json for 0 / 10 / 50 message
+             histories, and the history fingerprint for 50 messages
+  warm       one 26-turn conversation where every request carries the full
+             history so far (up to 50 messages): per-request latency, LLM
+             calls and Redis round trips with reconciliation off / on
+  cold       a session whose state is gone (eviction, new worker) receives a
+             50-message history (25 incoming): ignored (off), bootstrapped in
+             one batched pass (on), or rebuilt by replaying every incoming
+             message through /detect (one pipeline run per message)
+
+Usage: python bench_history_reconcile.py [latency_ms]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from history_sync import fingerprint
+from llm_stub import LLMStub, stub_gateway
+from models import ScamEventInput
+from structured_logging import setup_logging
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+SCAMMER = ["Dear customer, this is SBI support regarding your account",
+           "Your KYC is pending, account will be blocked today",
+           "Share the OTP sent to your mobile to verify immediately",
+           "Or pay Rs 10 verification fee to kyc.verify{i}@ybl",
+           "Call our officer on 98765{i:05d} now, last warning"]
+
+
+def conversation(turns: int) -> list:
+    """[(message, reply)] for a scripted conversation."""
+    return [({"sender": "scammer", "text": SCAMMER[i % len(SCAMMER)].format(i=i)},
+             {"sender": "user", "text": f"Sorry, which account do you mean? ({i})"}) for i in range(turns)]
+
+
+def history_of(pairs: list) -> list:
+    return [message for pair in pairs for message in pair]
+
+
+def install(latency_ms: float) -> tuple:
+    fake = FakeRedis()
+    main.memory_store.redis = fake
+    if main.memory_store.cache is not None:
+        main.memory_store.cache.clear()
+    stub = LLMStub(latency_ms=latency_ms)
+    gateway = stub_gateway(stub)
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+    return fake, stub
+
+
+def parse_costs():
+    pairs = conversation(25)
+    for size in (0, 10, 50):
+        body = json.dumps({"sessionId": "p", "message": {"sender": "scammer", "text": SCAMMER[0]},
+                           "conversationHistory": history_of(pairs)[:size]}).encode()
+        loops = 2000
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(loops):
+                ScamEventInput.model_validate_json(body)
+            best = min(best, (time.perf_counter() - start) / loops * 1e6)
+        print(f"parse      {size:2d}-message history  {len(body):6d} bytes  {best:7.1f}us/request")
+    event = ScamEventInput.model_validate({"sessionId": "p", "message": {"sender": "scammer", "text": "x"},
+                                           "conversationHistory": history_of(pairs)})
+    start = time.perf_counter()
+    for _ in range(2000):
+        fingerprint(event.conversationHistory)
+    print(f"fingerprint 50 messages                  {(time.perf_counter() - start) / 2000 * 1e6:7.1f}us")
+
+
+async def warm(client, latency_ms: float, reconcile: bool):
+    Config.HISTORY_RECONCILE = reconcile
+    fake, stub = install(latency_ms)
+    pairs = conversation(26)
+    elapsed = 0.0
+    for turn, (message, _) in enumerate(pairs):
+        payload = {"sessionId": "warm", "message": message, "conversationHistory": history_of(pairs[:turn])}
+        start = time.perf_counter()
+        assert (await client.post("/detect", json=payload, headers=HEADERS)).status_code == 200
+        elapsed += time.perf_counter() - start
+    n = len(pairs)
+    print(f"warm       reconcile={'on ' if reconcile else 'off'}  {elapsed / n * 1000:7.1f}ms/request  "
+          f"LLM calls/request {sum(stub.calls.values()) / n:.2f}  Redis round trips/request {fake.round_trips / n:.2f}")
+
+
+async def cold(client, latency_ms: float, mode: str):
+    Config.HISTORY_RECONCILE = mode == "on"
+    fake, stub = install(latency_ms)
+    pairs = conversation(26)
+    start = time.perf_counter()
+    if mode == "replay":
+        for turn, (message, _) in enumerate(pairs[:-1]):
+            payload = {"sessionId": "cold", "message": message}
+            assert (await client.post("/detect", json=payload, headers=HEADERS)).status_code == 200
+    payload = {"sessionId": "cold", "message": pairs[-1][0], "conversationHistory": history_of(pairs[:-1])}
+    assert (await client.post("/detect", json=payload, headers=HEADERS)).status_code == 200
+    elapsed = time.perf_counter() - start
+    timeline = await main.memory_store.get_summary("cold")
+    print(f"cold       {mode:<7}  {elapsed * 1000:7.1f}ms  LLM calls {sum(stub.calls.values()):3d}  "
+          f"Redis round trips {fake.round_trips:3d}  timeline lines {len(timeline)}")
+
+
+async def run(latency_ms: float):
+    setup_logging(level="WARNING")
+    reconcile = Config.HISTORY_RECONCILE
+    print(f"LLM stub latency={latency_ms}ms")
+    parse_costs()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for on in (False, True):
+                await warm(client, latency_ms, on)
+            for mode in ("off", "on", "replay"):
+                await cold(client, latency_ms, mode)
+    finally:
+        Config.HISTORY_RECONCILE = reconcile
+        setup_logging()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(float(args[0]) if args else 50.0))
@@ -0,0 +1,114 @@
+"""
+Local intent classifier vs the LLM scorer.
+
+Trains a model on sessions exported from one bench_e2e replay (seed 7) and
+evaluates it on a replay with another seed, all in-process (FakeRedis,
+llm_stub standing in for the LLMs, so "agreement" is with the stub scorer):
+
+  latency    per-timeline scoring time: classifier (single and batched) vs
+             an LLMScorer call through the gateway at the stub latency
+  agreement  on every per-turn timeline of the held-out sessions: share
+             where classifier and LLM agree at 0.5, share the classifier is
+             confident about (skips the LLM), and agreement on those
+  live       the held-out replay with and without the classifier tier:
+             scorer calls and verdicts that differ
+
+Usage: python bench_local_classifier.py [train_sessions] [test_sessions] [latency_ms]
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+import main
+from bench_e2e import replay
+from config import Config
+from models import SessionState
+from context_window import build_context
+from llm_stub import LLMStub, stub_gateway
+from local_classifier import LocalIntentClassifier
+from train_classifier import export_examples, train, evaluate
+
+
+async def corpus(sessions: int, seed: int) -> tuple:
+    """(session examples, per-turn timelines, verdict records) of one replay."""
+    records = []
+    await replay(sessions, 20, seed=seed, records=records)
+    examples = await export_examples(main.memory_store)
+    exported = await main.memory_store.export_sessions([e["sessionId"] for e in examples])
+    turns = [build_context(SessionState(summary=r["summary"][:k])) for r in exported
+             for k in range(1, len(r["summary"]) + 1)]
+    return examples, turns, records
+
+
+async def run(train_sessions: int, test_sessions: int, latency_ms: float):
+    speculative, Config.SPECULATIVE_SCORING = Config.SPECULATIVE_SCORING, False
+    main.local_classifier = None
+    try:
+        train_examples, _, _ = await corpus(train_sessions, seed=7)
+        test_examples, turns, base_records = await corpus(test_sessions, seed=11)
+        base_scorer_calls = sum(1 for r in base_records if r.get("intent_source") == "llm")
+
+        path = os.path.join(tempfile.mkdtemp(), "intent_model.json")
+        start = time.perf_counter()
+        model, _ = train(train_examples, path, holdout=0)
+        train_s = time.perf_counter() - start
+        print(f"model {model.version}: {len(train_examples)} sessions "
+              f"({model.meta['positives']} scam), {len(model.weights)} weights, trained in {train_s:.2f}s")
+        print(f"held-out sessions     {evaluate(model, test_examples)}")
+
+        # Latency (best of 3 passes for the classifier, sequential calls for the LLM)
+        single_us = batch_us = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            for timeline in turns:
+                model.predict(timeline)
+            single_us = min(single_us, (time.perf_counter() - start) / len(turns) * 1e6)
+            start = time.perf_counter()
+            model.predict_batch(turns)
+            batch_us = min(batch_us, (time.perf_counter() - start) / len(turns) * 1e6)
+        stub = LLMStub(latency_ms=latency_ms)
+        main.llm_scorer.gateway = stub_gateway(stub)
+        start = time.perf_counter()
+        for timeline in turns[:20]:
+            await main.llm_scorer.score_intent(timeline, {})
+        llm_ms = (time.perf_counter() - start) / min(len(turns), 20) * 1000
+        print(f"latency/timeline      classifier {single_us:.1f}us (batched {batch_us:.1f}us)  "
+              f"LLM scorer {llm_ms:.1f}ms (stub latency {latency_ms}ms)")
+        main.llm_scorer.gateway = stub_gateway(LLMStub())
+        llm = await asyncio.gather(*(main.llm_scorer.score_intent(timeline, {}) for timeline in turns))
+
+        # Agreement with the LLM scorer, per turn
+        probabilities = model.predict_batch(turns)
+        agree = confident = confident_agree = 0
+        for probability, result in zip(probabilities, llm):
+            hit = (probability >= 0.5) == (result.intent_score >= 0.5)
+            agree += hit
+            if probability >= Config.LOCAL_CLASSIFIER_SCAM_MIN or probability <= Config.LOCAL_CLASSIFIER_SAFE_MAX:
+                confident += 1
+                confident_agree += hit
+        print(f"per-turn agreement    {agree / len(turns):.1%} of {len(turns)} timelines; confident on "
+              f"{confident / len(turns):.1%}, agreeing on {confident_agree / max(confident, 1):.1%} of those")
+
+        # Live replay with the tier
+        main.local_classifier = LocalIntentClassifier(model=model)
+        records = []
+        await replay(test_sessions, 20, seed=11, records=records)
+        scorer_calls = sum(1 for r in records if r.get("intent_source") == "llm")
+        base = {(r["sessionId"], r["turn"]): r["verdict"] for r in base_records}
+        mismatches = sum(1 for r in records if base.get((r["sessionId"], r["turn"])) != r["verdict"])
+        print(f"live replay           LLM scorer calls {base_scorer_calls} -> {scorer_calls}  "
+              f"local {main.local_classifier.stats}  verdict mismatches {mismatches}/{len(records)}")
+    finally:
+        Config.SPECULATIVE_SCORING = speculative
+        main.local_classifier = None
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 200,
+        int(args[1]) if len(args) > 1 else 100,
+        float(args[2]) if len(args) > 2 else 150.0,
+    ))
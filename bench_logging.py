@@ -0,0 +1,87 @@
+"""
+/detect throughput with logging disabled, sampled, default and verbose.
+
+Runs the app in-process (FakeRedis, zero-latency llm_stub) so logging cost
+is not hidden behind LLM latency. The log sink can be made slow, like a
+blocked stdout pipe or log shipper, to compare the queue handler with
+writing directly on the event loop.
+
+Usage: python bench_logging.py [requests] [sink_ms_per_record]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, stub_gateway
+from structured_logging import setup_logging, flush_logging
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+class SlowSink:
+    """File-like sink that blocks for `delay_ms` per write."""
+
+    def __init__(self, delay_ms: float):
+        self.delay = delay_ms / 1000
+        self.records = 0
+
+    def write(self, data: str):
+        self.records += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+async def measure(label: str, requests: int, sink: SlowSink, level: str, verbose: bool,
+                  sample_rate: float, use_queue: bool):
+    Config.LOG_VERBOSE = verbose
+    Config.LOG_SAMPLE_RATE = sample_rate
+    setup_logging(logging.StreamHandler(sink), level=level, use_queue=use_queue)
+    main.memory_store.redis = FakeRedis()
+    limit = asyncio.Semaphore(32)
+
+    async def one(client, i):
+        payload = {"sessionId": f"log-{i % 50}", "message": {"sender": "scammer", "text": f"Hello, is this Ravi? ({i})"}}
+        async with limit:
+            assert (await client.post("/detect", json=payload, headers=HEADERS)).status_code == 200
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(client, i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+    flush_logging()
+    print(f"{label:<34} {requests / elapsed:8.1f} req/s  records={sink.records}")
+
+
+async def run(requests: int, sink_ms: float):
+    gateway = stub_gateway(LLMStub())
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+    print(f"requests={requests} slow sink={sink_ms}ms/record")
+    await measure("disabled (WARNING)", requests, SlowSink(0), "WARNING", False, 1.0, True)
+    await measure("default (INFO, every request)", requests, SlowSink(0), "INFO", False, 1.0, True)
+    await measure("verbose dumps (DEBUG)", requests, SlowSink(0), "DEBUG", True, 1.0, True)
+    await measure("slow sink, direct (no queue)", requests, SlowSink(sink_ms), "INFO", False, 1.0, False)
+    await measure("slow sink, queue handler", requests, SlowSink(sink_ms), "INFO", False, 1.0, True)
+    await measure("slow sink, queue, 10% sampled", requests, SlowSink(sink_ms), "INFO", False, 0.1, True)
+    setup_logging()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 2000,
+        float(args[1]) if len(args) > 1 else 1.0,
+    ))
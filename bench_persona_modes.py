@@ -0,0 +1,82 @@
+"""
+/detect latency on confirmed-scam sessions with inline vs off-path persona replies.
+
+Runs the app in-process against llm_stub (FakeRedis for Redis) at two persona
+latencies and compares /detect p50/p99 per PERSONA_MODE, plus how long after
+/detect the off-path reply becomes available via long-poll. In async/bank
+mode /detect latency should not move with the persona latency.
+
+Usage: python bench_persona_modes.py [sessions] [turns] [fast_persona_ms] [slow_persona_ms]
+"""
+import os
+import sys
+import time
+import asyncio
+import contextlib
+import statistics
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, stub_gateway
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+SCAM_TEXT = "Your account is blocked, share the OTP immediately and pay to verify.desk@ybl ({turn})"
+
+
+def pct(values, p):
+    return sorted(values)[int(p * (len(values) - 1))]
+
+
+async def converse(client, session_id: str, turns: int, detect_ms: list, ready_ms: list):
+    for turn in range(turns):
+        payload = {"sessionId": session_id, "message": {"sender": "scammer", "text": SCAM_TEXT.format(turn=turn)}}
+        start = time.perf_counter()
+        body = (await client.post("/detect", json=payload, headers=HEADERS)).json()
+        detect_ms.append((time.perf_counter() - start) * 1000)
+        if body.get("replyPending"):
+            resp = await client.get(f"/reply/{session_id}/{body['replyTurn']}?wait=30", headers=HEADERS)
+            assert resp.status_code == 200, resp.text
+            ready_ms.append((time.perf_counter() - start) * 1000)
+
+
+async def run_mode(mode: str, sessions: int, turns: int, stub: LLMStub):
+    Config.PERSONA_MODE = mode
+    main.memory_store.redis = FakeRedis()
+    gateway = stub_gateway(stub)
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+    detect_ms, ready_ms = [], []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            await asyncio.gather(*(converse(client, f"{mode}-{s}", turns, detect_ms, ready_ms)
+                                   for s in range(sessions)))
+    line = (f"{mode:<7} persona={stub.kind_latency_ms['persona']:>5.0f}ms "
+            f"/detect p50={statistics.median(detect_ms):7.1f}ms p99={pct(detect_ms, 0.99):7.1f}ms")
+    if ready_ms:
+        line += f" | reply ready p50={statistics.median(ready_ms):7.1f}ms p99={pct(ready_ms, 0.99):7.1f}ms"
+    print(line)
+
+
+async def run(sessions: int, turns: int, fast_ms: float, slow_ms: float):
+    print(f"sessions={sessions} turns={turns} other LLM calls=80ms")
+    for mode in ("inline", "async", "bank"):
+        for persona_ms in (fast_ms, slow_ms):
+            stub = LLMStub(latency_ms=80, kind_latency_ms={"persona": persona_ms})
+            await run_mode(mode, sessions, turns, stub)
+            await main.persona_workers.stop()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 8,
+        int(args[1]) if len(args) > 1 else 6,
+        float(args[2]) if len(args) > 2 else 400,
+        float(args[3]) if len(args) > 3 else 2000,
+    ))
@@ -0,0 +1,92 @@
+"""
+Perceived reply latency: /detect (reply in the response body) vs /detect/stream
+(persona tokens as Server-Sent Events), in-process with FakeRedis and the LLM
+stub generating `token_ms` per token after `latency_ms`.
+
+For every scam turn it reports when the first reply token reached the client
+and when the full reply did. With /detect both are the request latency.
+
+Usage: python bench_persona_stream.py [requests] [latency_ms] [token_ms] [concurrency]
+"""
+import os
+import sys
+import time
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, StreamingASGITransport, stub_gateway
+from structured_logging import setup_logging
+from bench_e2e import summarize
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+MESSAGE = "Send the OTP immediately to kyc.update{n}@ybl"
+
+
+def install(latency_ms: float, token_ms: float) -> LLMStub:
+    main.memory_store.redis = FakeRedis()
+    if main.memory_store.cache is not None:
+        main.memory_store.cache.clear()
+    stub = LLMStub(latency_ms=latency_ms, token_ms=token_ms, seed=1)
+    gateway = stub_gateway(stub)
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+    return stub
+
+
+async def measure(endpoint: str, requests: int, latency_ms: float, token_ms: float, concurrency: int):
+    install(latency_ms, token_ms)
+    first, full = [], []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def send(client, n):
+        payload = {"sessionId": f"{endpoint}-{n}", "message": {"sender": "scammer", "text": MESSAGE.format(n=n)}}
+        async with limit:
+            t0 = time.perf_counter()
+            if endpoint == "/detect":
+                response = await client.post(endpoint, json=payload, headers=HEADERS)
+                assert response.json().get("reply")
+                t_first = time.perf_counter()
+            else:
+                t_first = None
+                async with client.stream("POST", endpoint, json=payload, headers=HEADERS) as response:
+                    async for line in response.aiter_lines():
+                        if line == "event: token" and t_first is None:
+                            t_first = time.perf_counter()
+                assert t_first is not None
+            first.append((t_first - t0) * 1000)
+            full.append((time.perf_counter() - t0) * 1000)
+
+    transport = StreamingASGITransport(main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        await asyncio.gather(*(send(client, n) for n in range(requests)))
+    return summarize(first), summarize(full)
+
+
+async def run(requests: int, latency_ms: float, token_ms: float, concurrency: int):
+    setup_logging(level="WARNING")
+    persona_mode, Config.PERSONA_MODE = Config.PERSONA_MODE, "inline"
+    print(f"requests={requests} LLM latency={latency_ms}ms + {token_ms}ms/token concurrency={concurrency}")
+    print(f"{'endpoint':<16}{'first token p50':>16}{'p95':>8}{'full reply p50':>16}{'p95':>8}")
+    try:
+        for endpoint in ("/detect", "/detect/stream"):
+            first, full = await measure(endpoint, requests, latency_ms, token_ms, concurrency)
+            print(f"{endpoint:<16}{first['p50']:>16.1f}{first['p95']:>8.1f}{full['p50']:>16.1f}{full['p95']:>8.1f}")
+    finally:
+        Config.PERSONA_MODE = persona_mode
+        setup_logging()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 50,
+        float(args[1]) if len(args) > 1 else 100.0,
+        float(args[2]) if len(args) > 2 else 15.0,
+        int(args[3]) if len(args) > 3 else 10,
+    ))
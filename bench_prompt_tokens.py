@@ -0,0 +1,178 @@
+"""
+Prompt size per LLM call, before and after the prompt compiler.
+
+A scripted scam conversation is replayed turn by turn; at every turn the
+three agents are called on the same inputs (message, rolling timeline,
+the session's artifacts as MemoryStore returns them: every category,
+legacy keys included) through the in-process LLM stub, which records the
+messages actually sent. "before" rebuilds the same calls with the previous
+prompt formats (indented system prompts, per-call persona context, the
+extraction message in both turns, artifacts as indented JSON).
+
+Reports median and max estimated prompt tokens per agent (~4 chars/token),
+the tokens the gateway recorded (stub usage), and the time to build the
+messages for one turn.
+
+Usage: python bench_prompt_tokens.py [turns]
+"""
+import sys
+import json
+import time
+import asyncio
+import statistics
+
+from config import Config
+from context_window import estimate_tokens, fit_to_budget
+from extraction_agent import ExtractionAgent
+from llm_scorer import LLMScorer
+from llm_stub import LLMStub, stub_gateway
+from memory_store import MemoryStore
+from models import ExtractedSignals, ScamEventInput
+from persona_agent import PersonaAgent
+from rule_extractor import RuleExtractor
+
+SCRIPT = ["Hello sir, this is Rahul from SBI head office",
+          "Your account KYC has expired and will be blocked today",
+          "To avoid blocking, verify now at http://sbi-kyc-update.in/verify",
+          "Sir please hurry, only 30 minutes left before the account is frozen",
+          "You can also pay the Rs 10 verification fee to kyc.update@ybl",
+          "Share the OTP you received on 9876543210 to complete verification",
+          "Why are you delaying? Transfer to account 123456789012 at HDFC Bank",
+          "Send to kyc.update@ybl again, the last payment failed"]
+
+
+class RecordingStub(LLMStub):
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    async def complete(self, body: dict):
+        self.sent.append((self.classify(body["messages"]), body["messages"]))
+        return await super().complete(body)
+
+
+def before_messages(text: str, timeline: list, artifacts: dict, signals: ExtractedSignals) -> dict:
+    """The three agents' messages as built before prompt_compiler.py."""
+    extraction_system = """
+        Analyze the following message for scam indicators. Extracted data must be precise.
+
+        Message: "{message}"
+
+        Output JSON format:
+        """.format(message=text) + """{
+            "urgency_detected": bool,
+            "sensitive_info_request": bool,
+            "intelligence": {
+                "bankAccounts": [],
+                "bankNames": [],
+                "upiIds": [],
+                "phishingLinks": [],
+                "phoneNumbers": [],
+                "suspiciousKeywords": []
+            },
+            "sentiment": string,
+            "conversation_phase": string (e.g. "Introduction", "Grooming", "Urgency"),
+            "tone": string (e.g. "Friendly", "Aggressive"),
+            "shouldEndConversation": bool (Set to FALSE if the scammer is still responsive or if we can extract more info like Bank/UPI. Set to TRUE only if conversation is clearly over or circular.),
+            "agentNotes": string (Brief summary of tactic)
+        }
+        """
+    timeline_str = "\n".join(fit_to_budget(list(timeline), Config.CONTEXT_TOKEN_BUDGET))
+    scorer_system = """
+        You are an expert Scam Detection Analyst.
+        Your task is to analyze the conversation history and extracted artifacts to determine if the user is interacting with a scammer.
+
+        Calculate an 'intent_score' from 0.0 (Safe) to 1.0 (Definite Scam).
+        Provide a concise 'reasoning' for your score.
+
+        Output MUST be valid JSON:
+        {
+            "intent_score": float,
+            "reasoning": "string"
+        }
+        """
+    scorer_user = f"""
+        Analyze this session:
+
+        [ARTIFACTS]
+        {json.dumps(artifacts, indent=2)}
+
+        [TIMELINE]
+        {timeline_str}
+
+        Generate JSON risk assessment.
+        """
+    persona_system = f"""
+        You are the Persona Agent (AUTONOMOUS).
+        Goal: Respond like a REAL person who just received this message.
+
+        RULES:
+        1. BE CONCISE: Use short, natural sentences. (e.g., "Wait, why?", "Is this real?")
+        2. BE REACTIVE: Act surprised, worried, or slightly confused.
+        3. NEVER reveal detection.
+        4. STALL: Ask questions to keep the scammer talking.
+
+        CONTEXT:
+        - Scammer Phase: {signals.conversation_phase}
+        - Scammer Tone: {signals.tone}
+        - Agent Notes: {signals.agentNotes}
+        """
+    return {
+        "extraction": [extraction_system, f"Analyze this text: {text}"],
+        "scorer": [scorer_system, scorer_user],
+        "persona": [persona_system, f"Scammer message: {text}\nHistory: {timeline_str}"],
+    }
+
+
+async def replay(turns: int) -> tuple:
+    stub = RecordingStub()
+    gateway = stub_gateway(stub)
+    extraction, scorer, persona = ExtractionAgent(gateway=gateway), LLMScorer(gateway=gateway), PersonaAgent(gateway=gateway)
+    rules = RuleExtractor()
+    before = {"extraction": [], "scorer": [], "persona": []}
+    timeline, artifacts, build_ms = [], {a_type: [] for a_type in MemoryStore.ARTIFACT_TYPES}, []
+    for turn in range(turns):
+        text = SCRIPT[turn % len(SCRIPT)]
+        event = ScamEventInput(sessionId="bench", message={"sender": "scammer", "text": text})
+        signals = rules.extract_signals(event)
+        # As main.py: extraction results land in both the legacy and the schema categories
+        found = {"suspicious_links": signals.suspicious_links, "upi_ids": signals.suspicious_upi,
+                 "phone_numbers": signals.suspicious_phones, **signals.intelligence.model_dump()}
+        for key, values in found.items():
+            if key in artifacts:
+                artifacts[key] += [v for v in values if v not in artifacts[key]]
+        timeline.append(extraction.compute_summary_delta(event, signals))
+
+        for agent, parts in before_messages(text, timeline, artifacts, signals).items():
+            before[agent].append(sum(estimate_tokens(part) for part in parts))
+        start = time.perf_counter()
+        persona._messages(text, timeline, signals)
+        build_ms.append((time.perf_counter() - start) * 1000)
+        await extraction.extract_signals(event)
+        await scorer.score_intent(timeline, artifacts)
+        await persona.generate_reply(text, timeline, signals)
+
+    after = {"extraction": [], "scorer": [], "persona": []}
+    for kind, messages in stub.sent:
+        after[kind].append(sum(estimate_tokens(m["content"]) for m in messages))
+    return before, after, gateway.snapshot()["tokens"], statistics.median(build_ms)
+
+
+def run(turns: int):
+    before, after, recorded, build_ms = asyncio.run(replay(turns))
+    print(f"{turns} turns, PROMPT_TOKEN_BUDGET={Config.PROMPT_TOKEN_BUDGET}  (estimated prompt tokens per call)")
+    print(f"{'agent':<12}{'before p50':>12}{'after p50':>12}{'before max':>12}{'after max':>12}{'saved':>8}"
+          f"{'in/call':>10}{'out/call':>10}")
+    total_before = total_after = 0
+    for agent in ("extraction", "scorer", "persona"):
+        b, a = before[agent], after[agent]
+        total_before += sum(b)
+        total_after += sum(a)
+        print(f"{agent:<12}{statistics.median(b):12.0f}{statistics.median(a):12.0f}{max(b):12d}{max(a):12d}"
+              f"{1 - sum(a) / sum(b):7.0%} {recorded[agent]['in_per_call']:9.1f}{recorded[agent]['out_per_call']:10.1f}")
+    print(f"all agents: {total_before} -> {total_after} prompt tokens ({1 - total_after / total_before:.0%} fewer); "
+          f"persona messages built in {build_ms:.3f}ms (median)")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 24)
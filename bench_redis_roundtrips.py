@@ -0,0 +1,102 @@
+"""
+Counts Redis round trips per /detect request against a local fake Redis.
+
+Compares the legacy call sequence (one await per command) with the pipelined
+session API used by `detect_scam`. LLM agents are stubbed, so no network or
+API key is needed.
+
+Usage: python bench_redis_roundtrips.py [turns]
+"""
+import os
+import sys
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from models import ExtractedSignals, ExtractedIntelligence, LLMIntentScore
+
+
+def stub_signals(text: str) -> ExtractedSignals:
+    intel = ExtractedIntelligence(upiIds=["electricity@upi"], phoneNumbers=["9988776655"],
+                                  suspiciousKeywords=["urgent"])
+    return ExtractedSignals(
+        urgency_detected=True, sensitive_info_request=True,
+        suspicious_links=[], suspicious_upi=intel.upiIds, suspicious_phones=intel.phoneNumbers,
+        sentiment="negative", conversation_phase="Urgency", tone="Aggressive",
+        intelligence=intel,
+    )
+
+
+async def fake_extract(event):
+    return stub_signals(event.message.text)
+
+
+async def fake_score(summary_timeline, artifacts):
+    return LLMIntentScore(intent_score=0.9, reasoning="stub")
+
+
+async def fake_reply(message, history, signals):
+    return "Wait, why?"
+
+
+async def legacy_turn(store: MemoryStore, session_id: str, signals: ExtractedSignals):
+    """The Redis access pattern of the original detect_scam (normal flow)."""
+    await store.increment_message_count(session_id)
+    already = await store.is_session_scam(session_id)
+    new_artifacts = signals.intelligence.model_dump(exclude_none=True)
+    new_artifacts["upi_ids"] = signals.suspicious_upi
+    new_artifacts["phone_numbers"] = signals.suspicious_phones
+    await asyncio.gather(
+        store.update_artifact_memory(session_id, new_artifacts),
+        store.append_summary(session_id, "delta"),
+    )
+    await store.get_summary(session_id)
+    await store.get_artifacts(session_id)
+    if not already:
+        await store.mark_session_as_scam(session_id)
+
+
+def run(turns: int):
+    fake = FakeRedis()
+
+    # Legacy access pattern
+    legacy_store = MemoryStore()
+    legacy_store.redis = fake
+    fake.reset_stats()
+    for _ in range(turns):
+        asyncio.run(legacy_turn(legacy_store, "legacy-session", stub_signals("")))
+    legacy_rt = fake.round_trips / turns
+
+    # Pipelined access pattern through the real endpoint
+    main.memory_store.redis = fake
+    main.extraction_agent.extract_signals = fake_extract
+    main.llm_scorer.score_intent = fake_score
+    main.persona_agent.generate_reply = fake_reply
+
+    client = TestClient(main.app)
+    headers = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+    fake.reset_stats()
+    for i in range(turns):
+        payload = {
+            "sessionId": "pipelined-session",
+            "message": {"sender": "scammer", "text": f"Pay to electricity@upi now ({i})",
+                        "timestamp": "2026-01-21T10:17:10Z"},
+            "conversationHistory": [],
+            "metadata": {"channel": "SMS"},
+        }
+        resp = client.post("/detect", json=payload, headers=headers)
+        assert resp.status_code == 200, resp.text
+    pipelined_rt = fake.round_trips / turns
+
+    print(f"turns={turns}")
+    print(f"legacy    round trips/request: {legacy_rt:.2f}")
+    print(f"pipelined round trips/request: {pipelined_rt:.2f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,73 @@
+"""
+Batched reputation lookups against a large cross-session artifact index.
+
+Loads N artifacts (UPI IDs, phones, links, accounts) into FakeRedis, then
+times the per-request lookup of a message's artifacts: one pipelined round
+trip regardless of how many artifacts the message carries, plus the
+known-bad decision. Add one Redis RTT for production numbers.
+
+Usage: python bench_reputation_index.py [artifacts]   (default 2,000,000)
+"""
+import sys
+import time
+import random
+import asyncio
+import statistics
+
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from reputation_index import ReputationIndex
+
+
+def artifact(kind: str, i: int) -> str:
+    if kind == "upi":
+        return f"user{i}@ybl"
+    if kind == "phone":
+        return f"9{i:09d}"
+    if kind == "link":
+        return f"pay{i}.example.in/pay"
+    return f"{100000000000 + i}"
+
+
+async def run(size: int):
+    rng = random.Random(3)
+    store = MemoryStore()
+    store.redis = FakeRedis()
+    index = ReputationIndex(store)
+    kinds = ["upi", "phone", "link", "account"]
+
+    start = time.perf_counter()
+    for offset in range(0, size, 5000):
+        pipe = store.redis.pipeline(transaction=False)
+        for i in range(offset, min(offset + 5000, size)):
+            kind = kinds[i % 4]
+            scam = rng.random() < 0.3
+            pipe.hset(f"rep:{kind}:{artifact(kind, i)}", mapping={"seen": 3, "scam": 3 if scam else 0})
+        await pipe.execute()
+    print(f"loaded {size:,} artifacts in {time.perf_counter() - start:.1f}s")
+
+    latencies, flagged = [], 0
+    store.redis.reset_stats()
+    requests = 2000
+    for _ in range(requests):
+        # A typical message carries 1-5 artifacts, some never seen before
+        picks = [rng.randrange(size * 2) for _ in range(rng.randint(1, 5))]
+        artifacts = {"upiIds": [], "phoneNumbers": [], "phishingLinks": [], "bankAccounts": []}
+        for i in picks:
+            kind = kinds[i % 4]
+            field = {"upi": "upiIds", "phone": "phoneNumbers", "link": "phishingLinks", "account": "bankAccounts"}[kind]
+            value = artifact(kind, i)
+            artifacts[field].append(f"https://{value}" if kind == "link" else value)
+        t0 = time.perf_counter()
+        reputation = await index.lookup(artifacts)
+        flagged += bool(index.known_bad(reputation))
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    print(f"requests={requests} round trips/request={store.redis.round_trips / requests:.2f} "
+          f"flagged={flagged / requests:.1%}")
+    print(f"lookup p50={statistics.median(latencies):.3f}ms "
+          f"p99={sorted(latencies)[int(0.99 * (len(latencies) - 1))]:.3f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000))
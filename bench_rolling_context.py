@@ -0,0 +1,96 @@
+"""
+Prompt size and latency per turn as a honeypot session grows.
+
+Drives long sessions through /detect with FakeRedis and the in-process Groq
+stub (llm_stub.py), capturing the exact messages sent to the intent scorer and the
+persona agent. One session stays below the threshold (intent scorer runs
+every turn), the other is a confirmed scam (persona replies every turn).
+Prompt columns are the largest prompt seen since the previous checkpoint
+(the recent window fills up and is folded every CONTEXT_DIGEST_EVERY turns).
+The "full timeline" column is the size of the whole summary log, which the
+prompt carried before the rolling context.
+
+Usage: python bench_rolling_context.py [turns]
+"""
+import io
+import os
+import sys
+import time
+import asyncio
+import contextlib
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, stub_gateway
+from models import ExtractedSignals, ExtractedIntelligence
+
+captured = {}
+
+
+def capturing_gateway():
+    stub = LLMStub()
+    gateway = stub_gateway(stub)
+    chat = gateway.chat
+
+    async def capture(**kwargs):
+        kind = stub.classify(kwargs["messages"])
+        size = sum(len(m["content"].encode()) for m in kwargs["messages"])
+        captured[kind] = max(captured.get(kind, 0), size)
+        return await chat(**kwargs)
+
+    gateway.chat = capture
+    return gateway
+
+
+async def extract(event):
+    intel = ExtractedIntelligence(phoneNumbers=["9988776655"], suspiciousKeywords=["blocked"])
+    return ExtractedSignals(
+        urgency_detected=False, sensitive_info_request=False,
+        suspicious_links=[], suspicious_upi=[], suspicious_phones=intel.phoneNumbers,
+        sentiment="negative", conversation_phase="Urgency", tone="Aggressive",
+        intelligence=intel,
+    )
+
+
+def run(turns: int):
+    Config.FAST_PATH_MODE = "off"
+    Config.SPECULATIVE_SCORING = False
+    fake = FakeRedis()
+    main.memory_store.redis = fake
+    main.extraction_agent.extract_signals = extract
+    # The stub scores the untagged timeline as benign, so "rolling-scored" never flips to scam
+    main.llm_scorer.gateway = main.persona_agent.gateway = capturing_gateway()
+
+    client = TestClient(main.app)
+    headers = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+    asyncio.run(main.memory_store.mark_session_as_scam("rolling-engaged"))
+    checkpoints = {1, 10, 25, 50, 100, 200, 500, turns}
+
+    print(f"{'turn':>5} {'full timeline B':>16} {'scorer prompt B':>16} {'persona prompt B':>17} {'latency ms':>11}")
+    for turn in range(1, turns + 1):
+        start = time.perf_counter()
+        for session_id in ("rolling-scored", "rolling-engaged"):
+            payload = {
+                "sessionId": session_id,
+                "message": {"sender": "scammer",
+                            "text": f"Sir your connection will be blocked, call 9988776655 now (turn {turn})",
+                            "timestamp": "2026-01-21T10:17:10Z"},
+            }
+            with contextlib.redirect_stdout(io.StringIO()):
+                resp = client.post("/detect", json=payload, headers=headers)
+            assert resp.status_code == 200, resp.text
+        elapsed = (time.perf_counter() - start) * 1000 / 2
+        if turn in checkpoints:
+            full = asyncio.run(main.memory_store.get_summary("rolling-scored"))
+            print(f"{turn:>5} {len(chr(10).join(full).encode()):>16} {captured.get('scorer', 0):>16} "
+                  f"{captured.get('persona', 0):>17} {elapsed:>11.2f}")
+            captured.clear()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
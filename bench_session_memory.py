@@ -0,0 +1,114 @@
+"""
+Redis keys and bytes per session: legacy key-per-field layout vs the
+compact hash + log layout of MemoryStore.
+
+With --redis the sessions are written to the configured Redis (use a
+scratch database) and measured with MEMORY USAGE. Without it they go to
+FakeRedis and bytes are estimated: key/field/value payload plus a fixed
+per-key overhead (dict entry, object header, expiry entry) and a per-entry
+listpack header, which is roughly what Redis 7 reports for small keys.
+
+Usage: python bench_session_memory.py [sessions] [turns] [--redis]
+"""
+import sys
+import asyncio
+from config import Config
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+
+KEY_OVERHEAD = 56  # bytes per top-level key (estimate)
+EXPIRY_OVERHEAD = 24  # bytes per key with a TTL (estimate)
+ENTRY_OVERHEAD = 2  # listpack entry header per field/value/element (estimate)
+
+
+def turn_data(session: int, turn: int):
+    artifacts = {
+        "upi_ids": [f"refund{session % 97}@ybl"],
+        "phone_numbers": [f"98{session:08d}"[:10]],
+        "suspiciousKeywords": ["urgent", "blocked", "verify"][: 1 + turn % 3],
+        "phishingLinks": [f"http://kyc-update-{session % 13}.in/verify"] if turn == 3 else [],
+    }
+    delta = (f"[2026-01-21T10:{turn:02d}:00] scammer (Urgency|Aggressive): Your account will be "
+             f"blocked today, share the OTP sent to your number to verify... [URGENCY, OTP_REQUEST]")
+    return artifacts, delta
+
+
+async def legacy_turn(redis, session_id: str, artifacts: dict, delta: str):
+    """Writes of the previous MemoryStore.commit_turn (no expiry)."""
+    pipe = redis.pipeline(transaction=False)
+    pipe.incr(f"msg_count:{session_id}")
+    for k, items in artifacts.items():
+        if items:
+            pipe.sadd(f"artifacts:{session_id}:{k}", *items)
+    pipe.rpush(f"summary:{session_id}", delta)
+    pipe.set(f"scam_status:{session_id}", "1")
+    await pipe.execute()
+
+
+async def compact_turn(store: MemoryStore, session_id: str, artifacts: dict, delta: str):
+    state = await store.begin_turn(session_id)
+    await store.commit_turn(session_id, artifacts, delta, mark_scam=True, state=state)
+
+
+def estimate_bytes(fake: FakeRedis) -> int:
+    total = 0
+    for key, value in fake.data.items():
+        total += KEY_OVERHEAD + len(key) + (EXPIRY_OVERHEAD if key in fake.expiry else 0)
+        if isinstance(value, dict):
+            total += sum(len(f) + len(v) + 2 * ENTRY_OVERHEAD for f, v in value.items())
+        elif isinstance(value, (list, set)):
+            total += sum(len(v) + ENTRY_OVERHEAD for v in value)
+        else:
+            total += len(value)
+    return total
+
+
+async def measured_bytes(redis, keys) -> int:
+    pipe = redis.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key)
+    return sum(usage or 0 for usage in await pipe.execute())
+
+
+async def measure(label: str, sessions: int, turns: int, use_redis: bool, legacy: bool):
+    store = MemoryStore()
+    if not use_redis:
+        store.redis = FakeRedis()
+    prefix = f"bench-mem-{'legacy' if legacy else 'compact'}"
+    for s in range(sessions):
+        for t in range(turns):
+            artifacts, delta = turn_data(s, t)
+            if legacy:
+                await legacy_turn(store.redis, f"{prefix}-{s}", artifacts, delta)
+            else:
+                await compact_turn(store, f"{prefix}-{s}", artifacts, delta)
+
+    patterns = ("msg_count", "scam_status", "summary", "digest", "artifacts", "session")
+    keys = []
+    for pattern in patterns:
+        keys += [key async for key in store.redis.scan_iter(match=f"{pattern}:{prefix}-*")]
+    if use_redis:
+        total = await measured_bytes(store.redis, keys)
+        expiring = sum([await store.redis.ttl(key) > 0 for key in keys])
+        await store.redis.delete(*keys)
+    else:
+        total = estimate_bytes(store.redis)
+        expiring = sum(1 for key in keys if key in store.redis.expiry)
+    print(f"{label:<22} keys/session={len(keys) / sessions:5.1f}  bytes/session={total / sessions:8.0f}"
+          f"  with TTL={expiring}/{len(keys)}")
+
+
+async def run(sessions: int, turns: int, use_redis: bool):
+    source = f"MEMORY USAGE on {Config.REDIS_HOST}" if use_redis else "estimated (FakeRedis)"
+    print(f"sessions={sessions} turns/session={turns} bytes: {source}")
+    await measure("legacy (key per field)", sessions, turns, use_redis, legacy=True)
+    await measure("compact (hash + log)", sessions, turns, use_redis, legacy=False)
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 1000,
+        int(args[1]) if len(args) > 1 else 10,
+        "--redis" in sys.argv,
+    ))
@@ -0,0 +1,85 @@
+"""
+Load test for per-session serialization: many sessions, each sending a
+burst of messages concurrently, against the in-process app (FakeRedis,
+llm_stub with latency jitter).
+
+Reports throughput, LLM calls per message and how many sessions ended up
+with a timeline out of arrival order, for SESSION_LOCK_MODE off / local /
+redis, and local with burst coalescing.
+
+Usage: python bench_session_serialization.py [sessions] [burst] [latency_ms]
+"""
+import os
+import sys
+import time
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, stub_gateway
+from structured_logging import setup_logging
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+async def measure(label: str, sessions: int, burst: int, latency_ms: float, mode: str, window_ms: float):
+    Config.SESSION_LOCK_MODE = mode
+    Config.SESSION_COALESCE_WINDOW_MS = window_ms
+    main.memory_store.redis = FakeRedis()
+    if main.memory_store.cache is not None:
+        main.memory_store.cache.clear()
+    stub = LLMStub(latency_ms=latency_ms, jitter_ms=latency_ms, seed=1)
+    gateway = stub_gateway(stub)
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+
+    async def send(client, s, i):
+        # Staggered by a few ms, like a scammer typing several short messages
+        await asyncio.sleep(i * 0.005)
+        payload = {"sessionId": f"{label}-{s}", "message": {
+            "sender": "scammer", "text": f"Your card will be blocked today, seq {i}"}}
+        assert (await client.post("/detect", json=payload, headers=HEADERS)).status_code == 200
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(send(client, s, i) for s in range(sessions) for i in range(burst)))
+        elapsed = time.perf_counter() - start
+
+    out_of_order = 0
+    for s in range(sessions):
+        timeline = await main.memory_store.get_summary(f"{label}-{s}")
+        seqs = [int(line.split("seq ")[1].split(".")[0].split()[0]) for line in timeline]
+        if seqs != list(range(burst)):
+            out_of_order += 1
+    llm_calls = sum(stub.calls.values())
+    print(f"{label:<18} {sessions * burst / elapsed:7.1f} msg/s  LLM calls/msg={llm_calls / (sessions * burst):4.2f}"
+          f"  out-of-order sessions={out_of_order}/{sessions}")
+
+
+async def run(sessions: int, burst: int, latency_ms: float):
+    setup_logging(level="WARNING")
+    # Let the LLM stub's jitter, not the gateway's FIFO limiter, decide completion order
+    Config.LLM_MAX_CONCURRENCY = Config.LLM_MAX_CONCURRENCY_PER_MODEL = 1000
+    print(f"sessions={sessions} burst={burst} LLM latency={latency_ms}ms (+ jitter)")
+    await measure("off", sessions, burst, latency_ms, "off", 0)
+    await measure("local", sessions, burst, latency_ms, "local", 0)
+    await measure("redis", sessions, burst, latency_ms, "redis", 0)
+    await measure("local+coalesce", sessions, burst, latency_ms, "local", 50)
+    Config.SESSION_LOCK_MODE = "local"
+    Config.SESSION_COALESCE_WINDOW_MS = 0
+    setup_logging()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    asyncio.run(run(
+        int(args[0]) if len(args) > 0 else 50,
+        int(args[1]) if len(args) > 1 else 4,
+        float(args[2]) if len(args) > 2 else 40.0,
+    ))
@@ -0,0 +1,80 @@
+"""
+End-to-end /detect latency with serial vs speculative (concurrent) intent scoring.
+
+The extraction and intent LLM calls are replaced by stubs that sleep for a
+configurable latency; Redis is the in-memory FakeRedis.
+
+Usage: python bench_speculative_scoring.py [requests] [extract_ms] [score_ms]
+"""
+import os
+import sys
+import time
+import asyncio
+import statistics
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from models import ExtractedSignals, LLMIntentScore
+
+
+def install_stubs(extract_ms: float, score_ms: float):
+    async def extract(event):
+        await asyncio.sleep(extract_ms / 1000)
+        return ExtractedSignals(
+            urgency_detected=False, sensitive_info_request=False,
+            suspicious_links=[], suspicious_upi=[], suspicious_phones=[],
+            sentiment="neutral", conversation_phase="Introduction", tone="Friendly",
+        )
+
+    async def score(summary_timeline, artifacts):
+        await asyncio.sleep(score_ms / 1000)
+        return LLMIntentScore(intent_score=0.2, reasoning="stub")
+
+    main.memory_store.redis = FakeRedis()
+    main.extraction_agent.extract_signals = extract
+    main.llm_scorer.score_intent = score
+
+
+def measure(client: TestClient, n: int, speculative: bool) -> list:
+    Config.SPECULATIVE_SCORING = speculative
+    headers = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+    latencies = []
+    for i in range(n):
+        payload = {
+            "sessionId": f"spec-{speculative}-{i % 5}",
+            "message": {"sender": "scammer", "text": f"Hello, is this Ravi? ({i})",
+                        "timestamp": "2026-01-21T10:17:10Z"},
+        }
+        start = time.perf_counter()
+        resp = client.post("/detect", json=payload, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert resp.status_code == 200, resp.text
+    return latencies
+
+
+def run(n: int, extract_ms: float, score_ms: float):
+    Config.FAST_PATH_MODE = "off"
+    install_stubs(extract_ms, score_ms)
+    client = TestClient(main.app)
+
+    serial = measure(client, n, speculative=False)
+    speculative = measure(client, n, speculative=True)
+
+    print(f"requests={n} extract={extract_ms}ms score={score_ms}ms")
+    print(f"serial      p50={statistics.median(serial):.1f}ms")
+    print(f"speculative p50={statistics.median(speculative):.1f}ms")
+    print(f"reduction   {100 * (1 - statistics.median(speculative) / statistics.median(serial)):.1f}%")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run(
+        int(args[0]) if len(args) > 0 else 20,
+        float(args[1]) if len(args) > 1 else 400,
+        float(args[2]) if len(args) > 2 else 300,
+    )
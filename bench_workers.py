@@ -0,0 +1,113 @@
+"""
+Scaling of the multi-worker mode (serve.py) across 1, 2, 4 and 8 workers.
+
+For each worker count a real deployment is started in a subprocess: serve.py
+with hash routing (the router plus one uvicorn process per worker), each
+worker running this module's app, i.e. main.app with the LLM stubbed
+in-process (llm_stub, fixed latency) and an in-memory Redis per worker.
+Per-worker Redis only holds up because routing is shared-nothing: every
+turn of a session reaches the worker that owns it. Sessions send their
+turns one after another over real sockets, many sessions at once.
+
+Reports requests/s and latency percentiles per worker count. Scaling is
+bounded by the cores available (printed first) and by this single load
+generator process.
+
+Usage: python bench_workers.py [workers,...] [sessions] [turns] [latency_ms]
+"""
+import os
+import sys
+import time
+import asyncio
+import subprocess
+
+os.environ.setdefault("SERVICE_API_KEY", "bench-key")
+
+import httpx
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+PORT = 18000
+TEXTS = ["Dear customer, your SBI account will be blocked today",
+         "Share the OTP sent to your mobile to verify immediately",
+         "Pay Rs 10 verification fee to kyc.verify{i}@ybl now",
+         "Hello, is this Ravi? We met at the wedding last week"]
+
+if os.getenv("BENCH_WORKER_LATENCY_MS") is not None:
+    # Worker side (imported by uvicorn as bench_workers:app)
+    import main
+    from fake_redis import FakeRedis
+    from llm_stub import LLMStub, stub_gateway
+    from structured_logging import setup_logging
+
+    setup_logging(level="WARNING")
+    main.memory_store.redis = FakeRedis()
+    gateway = stub_gateway(LLMStub(latency_ms=float(os.environ["BENCH_WORKER_LATENCY_MS"])))
+    main.extraction_agent.gateway = main.llm_scorer.gateway = main.persona_agent.gateway = gateway
+    main.extraction_agent.cache = None
+    app = main.app
+
+
+def start(workers: int, latency_ms: float) -> subprocess.Popen:
+    env = {**os.environ, "BENCH_WORKER_LATENCY_MS": str(latency_ms), "LOG_LEVEL": "WARNING"}
+    process = subprocess.Popen([sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(PORT),
+                                "--workers", str(workers), "--routing", "hash", "--app", "bench_workers:app"],
+                               env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/health", timeout=1.0).status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{workers} workers did not start")
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def load(sessions: int, turns: int, tag: str) -> tuple:
+    latencies = []
+    limits = httpx.Limits(max_connections=sessions, max_keepalive_connections=sessions)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=120) as client:
+        async def session(s: int):
+            for turn in range(turns):
+                payload = {"sessionId": f"{tag}-{s}",
+                           "message": {"sender": "scammer", "text": TEXTS[(s + turn) % len(TEXTS)].format(i=s)}}
+                start = time.perf_counter()
+                response = await client.post("/detect", json=payload, headers=HEADERS)
+                assert response.status_code == 200, response.text
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[session(s) for s in range(sessions)])
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+
+def run(counts: list, sessions: int, turns: int, latency_ms: float):
+    print(f"cores={os.cpu_count()}  sessions={sessions} x {turns} turns  LLM stub latency={latency_ms}ms")
+    baseline = None
+    for workers in counts:
+        process = start(workers, latency_ms)
+        try:
+            asyncio.run(load(min(sessions, 8), 2, f"warm{workers}"))
+            rps, p50, p95 = asyncio.run(load(sessions, turns, f"run{workers}"))
+        finally:
+            stop(process)
+        baseline = baseline or rps
+        print(f"workers={workers}  {rps:7.1f} req/s  x{rps / baseline:.2f}  p50 {p50 * 1000:6.1f}ms  p95 {p95 * 1000:6.1f}ms")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run([int(n) for n in args[0].split(",")] if args else [1, 2, 4, 8],
+        int(args[1]) if len(args) > 1 else 64,
+        int(args[2]) if len(args) > 2 else 5,
+        float(args[3]) if len(args) > 3 else 0.0)
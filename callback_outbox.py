@@ -0,0 +1,251 @@
+import json
+import time
+import random
+import asyncio
+import hashlib
+import httpx
+from config import Config
+from structured_logging import get_logger
+from metrics import REGISTRY, Counter, Gauge, Histogram
+
+logger = get_logger("callback_outbox")
+
+CALLBACKS = REGISTRY.register(Counter(
+    "scam_agent_callbacks_total",
+    "Final-result callbacks by outcome (delivered, retry, dead, deduped)", ("outcome",)))
+CALLBACK_LAG = REGISTRY.register(Histogram(
+    "scam_agent_callback_lag_seconds", "Time from enqueue to successful delivery of a final-result callback",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)))
+CALLBACK_OUTBOX_DEPTH = REGISTRY.register(Gauge(
+    "scam_agent_callback_outbox_depth", "Callbacks waiting for (re)delivery"))
+
+DUE_KEY = "callback:due"  # zset sessionId -> next attempt time
+DEAD_KEY = "callback:dead"  # list of envelopes that exhausted their attempts
+DEAD_MAX = 1000
+
+
+def final_result_payload(session_id: str, total_msgs: int, signals, final_artifacts: dict) -> dict:
+    """The platform's final-result body, built from the accumulated session artifacts."""
+    # Map flat artifacts dict to structured ExtractedIntelligence format
+    # Redis stores sets as lists, we need to ensure keys match ExtractedIntelligence fields
+    intel_payload = {
+        "bankAccounts": final_artifacts.get("bankAccounts", []),
+        "bankNames": final_artifacts.get("bankNames", []),
+        "upiIds": final_artifacts.get("upiIds", []) + final_artifacts.get("upi_ids", []), # Handle both keys
+        "phishingLinks": final_artifacts.get("phishingLinks", []) + final_artifacts.get("suspicious_links", []),
+        "phoneNumbers": final_artifacts.get("phoneNumbers", []) + final_artifacts.get("phone_numbers", []),
+        "suspiciousKeywords": final_artifacts.get("suspiciousKeywords", [])
+    }
+
+    # Deduplicate lists (sorted, so identical intel gives an identical payload)
+    for k in intel_payload:
+        intel_payload[k] = sorted(set(intel_payload[k]))
+
+    return {
+        "sessionId": session_id,
+        "scamDetected": True,
+        "totalMessagesExchanged": total_msgs,
+        "extractedIntelligence": intel_payload,
+        "agentNotes": signals.agentNotes
+    }
+
+
+class CallbackOutbox:
+    """
+    Durable outbox for final-result callbacks, drained by a background dispatcher.
+
+    callback:due                zset    sessionId -> next attempt time (one entry per session)
+    callback:payload:{id}       string  latest payload envelope (TTL CALLBACK_RETENTION)
+    callback:sent:{id}          string  hash of the last delivered payload (dedupe)
+    callback:attempts:{id}      counter failed attempts of the pending payload
+    callback:dead               list    envelopes that exhausted CALLBACK_MAX_ATTEMPTS
+
+    Enqueueing only queues writes on the caller's pipeline, so /detect adds no
+    round trip and never waits on the callback endpoint. A newer payload for a
+    session replaces the pending one; a payload identical to the last delivered
+    one is not sent again. The dispatcher claims due sessions in batches and
+    POSTs them concurrently over one pooled client, retrying with jittered
+    backoff. A claim pushes the entry's score CALLBACK_LEASE into the future
+    (ZADD XX INCR: only the dispatcher whose increment lands on the score it
+    read owns it, so several processes can dispatch); the entry is removed
+    only once the delivery or the dead letter is recorded. A dispatcher that
+    dies mid-delivery leaves the entry in place and it is re-claimed when the
+    lease runs out (at-least-once delivery).
+    """
+
+    def __init__(self, memory_store, http_client: httpx.AsyncClient = None):
+        self.memory_store = memory_store
+        self.http_client = http_client
+        self.dispatcher = None
+        self._loop = None
+
+    @staticmethod
+    def _digest(payload_json: str) -> str:
+        return hashlib.sha1(payload_json.encode()).hexdigest()
+
+    def queue(self, pipe, session_id: str, payload: dict):
+        """Queues the enqueue writes onto `pipe` (e.g. the MemoryStore commit pipeline)."""
+        now = time.time()
+        envelope = json.dumps({"payload": payload, "enqueued_at": now}, sort_keys=True)
+        pipe.set(f"callback:payload:{session_id}", envelope, ex=Config.CALLBACK_RETENTION)
+        pipe.zadd(DUE_KEY, {session_id: now}, nx=True)
+
+    async def enqueue(self, session_id: str, payload: dict):
+        pipe = self.memory_store.redis.pipeline(transaction=False)
+        self.queue(pipe, session_id, payload)
+        await pipe.execute()
+
+    def ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.dispatcher is not None and not self.dispatcher.done():
+            return
+        self._loop = loop
+        self.dispatcher = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                processed = await self.dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("callback dispatcher error", extra={"fields": {"error": str(e)}})
+                processed = 0
+            if processed < Config.CALLBACK_BATCH_SIZE:
+                await asyncio.sleep(Config.CALLBACK_POLL_INTERVAL)
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=Config.CALLBACK_MAX_CONNECTIONS),
+                timeout=httpx.Timeout(Config.CALLBACK_TIMEOUT, connect=5.0),
+            )
+        return self.http_client
+
+    async def dispatch_once(self) -> int:
+        """Claims and delivers one batch of due callbacks. Returns the number claimed."""
+        redis = self.memory_store.redis
+        pipe = redis.pipeline(transaction=False)
+        pipe.zrangebyscore(DUE_KEY, "-inf", time.time(), start=0, num=Config.CALLBACK_BATCH_SIZE, withscores=True)
+        pipe.zcard(DUE_KEY)
+        due, depth = await pipe.execute()
+        CALLBACK_OUTBOX_DEPTH.set(depth)
+        if not due:
+            return 0
+
+        pipe = redis.pipeline(transaction=False)
+        for session_id, _ in due:
+            pipe.zadd(DUE_KEY, {session_id: Config.CALLBACK_LEASE}, xx=True, incr=True)
+            pipe.get(f"callback:payload:{session_id}")
+            pipe.get(f"callback:sent:{session_id}")
+            pipe.get(f"callback:attempts:{session_id}")
+        results = await pipe.execute()
+
+        jobs = []
+        finished = {}  # sessionId -> digest of the payload handled (the entry leaves the outbox)
+        for i, (session_id, score) in enumerate(due):
+            leased_until, envelope, sent, attempts = results[4 * i:4 * i + 4]
+            if leased_until is None or float(leased_until) != score + Config.CALLBACK_LEASE:
+                continue  # claimed by another dispatcher
+            if envelope is None:
+                finished[session_id] = None  # payload expired
+                continue
+            envelope = json.loads(envelope)
+            payload_json = json.dumps(envelope["payload"], sort_keys=True)
+            if sent == self._digest(payload_json):
+                CALLBACKS.inc(outcome="deduped")
+                finished[session_id] = sent
+                continue
+            jobs.append((session_id, envelope, payload_json, int(attempts or 0)))
+
+        outcomes = await asyncio.gather(*(self._post(envelope["payload"]) for _, envelope, _, _ in jobs))
+
+        pipe = redis.pipeline(transaction=False)
+        for (session_id, envelope, payload_json, attempts), error in zip(jobs, outcomes):
+            if error is None:
+                CALLBACKS.inc(outcome="delivered")
+                CALLBACK_LAG.observe(time.time() - envelope["enqueued_at"])
+                pipe.set(f"callback:sent:{session_id}", self._digest(payload_json), ex=Config.CALLBACK_RETENTION)
+                pipe.delete(f"callback:attempts:{session_id}")
+                finished[session_id] = self._digest(payload_json)
+            elif attempts + 1 >= Config.CALLBACK_MAX_ATTEMPTS or error.startswith("permanent"):
+                CALLBACKS.inc(outcome="dead")
+                logger.error("callback dead-lettered", extra={"fields": {
+                    "sessionId": session_id, "attempts": attempts + 1, "error": error}})
+                pipe.lpush(DEAD_KEY, json.dumps({**envelope, "error": error, "attempts": attempts + 1}))
+                pipe.ltrim(DEAD_KEY, 0, DEAD_MAX - 1)
+                pipe.delete(f"callback:attempts:{session_id}")
+                finished[session_id] = self._digest(payload_json)
+            else:
+                CALLBACKS.inc(outcome="retry")
+                pipe.incr(f"callback:attempts:{session_id}")
+                pipe.expire(f"callback:attempts:{session_id}", Config.CALLBACK_RETENTION)
+                pipe.zadd(DUE_KEY, {session_id: time.time() + self._backoff(attempts)}, xx=True)
+        # Outcomes are recorded before the entries leave the outbox
+        if jobs:
+            await pipe.execute()
+        if finished:
+            await self._release(finished)
+        return len(due)
+
+    async def _release(self, finished: dict):
+        """
+        Removes finished entries. A newer payload enqueued while one was in
+        flight found the entry still queued (ZADD NX was a no-op), so it is
+        re-queued here; one enqueued after the ZREM queues itself.
+        """
+        redis = self.memory_store.redis
+        pipe = redis.pipeline(transaction=False)
+        for session_id in finished:
+            pipe.zrem(DUE_KEY, session_id)
+            pipe.get(f"callback:payload:{session_id}")
+        results = await pipe.execute()
+
+        pipe = redis.pipeline(transaction=False)
+        requeue = False
+        for i, (session_id, handled) in enumerate(finished.items()):
+            envelope = results[2 * i + 1]
+            if envelope is None:
+                continue
+            if self._digest(json.dumps(json.loads(envelope)["payload"], sort_keys=True)) != handled:
+                pipe.zadd(DUE_KEY, {session_id: time.time()}, nx=True)
+                requeue = True
+        if requeue:
+            await pipe.execute()
+
+    def _backoff(self, attempts: int) -> float:
+        ceiling = min(Config.CALLBACK_BACKOFF_MAX, Config.CALLBACK_BACKOFF_BASE * (2 ** attempts))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    async def _post(self, payload: dict):
+        """None on success, otherwise an error string ("permanent: ..." for non-retryable 4xx)."""
+        try:
+            response = await self._client().post(Config.CALLBACK_URL, json=payload)
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+        if response.is_success:
+            return None
+        if 400 <= response.status_code < 500 and response.status_code not in (408, 425, 429):
+            return f"permanent: HTTP {response.status_code}"
+        return f"HTTP {response.status_code}"
+
+    async def stop(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+            self.dispatcher = None
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def snapshot(self) -> dict:
+        pipe = self.memory_store.redis.pipeline(transaction=False)
+        pipe.zcard(DUE_KEY)
+        pipe.llen(DEAD_KEY)
+        depth, dead = await pipe.execute()
+        return {
+            "enabled": Config.CALLBACK_DELIVERY_ENABLED,
+            "pending": depth,
+            "dead_letters": dead,
+            "dispatcher_running": self.dispatcher is not None and not self.dispatcher.done(),
+            **{outcome: int(CALLBACKS.value(outcome=outcome)) for outcome in ("delivered", "retry", "dead", "deduped")},
+        }
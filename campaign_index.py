@@ -0,0 +1,195 @@
+import re
+import time
+import random
+import hashlib
+from collections import Counter
+from config import Config
+from models import ExtractedSignals, ExtractedIntelligence
+from metrics import redis_op
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# Variable parts of a campaign template are masked before shingling
+URL_MASK = re.compile(r"\b(?:https?://|www\.)\S+|\b(?:bit\.ly|tinyurl\.com|t\.co|goo\.gl|rb\.gy|is\.gd)/\S+", re.IGNORECASE)
+UPI_MASK = re.compile(r"\b[\w.\-]{2,64}@[a-zA-Z][a-zA-Z0-9]{1,32}\b")
+NUMBER_MASK = re.compile(r"[₹$]?\d[\d,.:/\-]*")
+WORD_PATTERN = re.compile(r"<\w+>|\w+")
+
+
+def shingles(text: str, size: int = 3) -> set:
+    """Word n-grams of the masked, lowercased text."""
+    masked = URL_MASK.sub(" <url> ", text.lower())
+    masked = UPI_MASK.sub(" <upi> ", masked)
+    masked = NUMBER_MASK.sub(" <num> ", masked)
+    words = WORD_PATTERN.findall(masked)
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class CampaignIndex:
+    """
+    MinHash/LSH index of confirmed scam messages, persisted in Redis.
+
+    A message whose estimated Jaccard similarity to an indexed scam is above
+    CAMPAIGN_MATCH_THRESHOLD inherits its verdict and extraction template
+    without calling ExtractionAgent or LLMScorer.
+
+    Layout: lsh:{band}:{bucket} sets of entry ids, lsh:e:{id} hashes (signature,
+    template signals), and lsh:order, a sorted set by insertion time used to
+    evict the oldest entries beyond CAMPAIGN_INDEX_MAX_ENTRIES.
+    """
+
+    def __init__(self, memory_store):
+        self.memory_store = memory_store
+        self.bands = Config.CAMPAIGN_LSH_BANDS
+        self.rows = Config.CAMPAIGN_LSH_ROWS
+        self.num_perm = self.bands * self.rows
+        rng = random.Random(1337)  # fixed: signatures must be stable across workers and restarts
+        self.perms = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(self.num_perm)
+        ]
+        self.stats = {"lookups": 0, "matches": 0, "added": 0, "evicted": 0}
+
+    @property
+    def redis(self):
+        return self.memory_store.redis
+
+    def signature(self, text: str) -> list:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+            for s in shingles(text)
+        ]
+        if not hashes:
+            return []
+        return [
+            min((a * h + b) % MERSENNE_PRIME for h in hashes) & MAX_HASH
+            for a, b in self.perms
+        ]
+
+    def bucket_keys(self, signature: list) -> list:
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            bucket = hashlib.blake2b(",".join(map(str, rows)).encode(), digest_size=8).hexdigest()
+            keys.append(f"lsh:{band}:{bucket}")
+        return keys
+
+    @staticmethod
+    def indexable(text: str, rule_signals: ExtractedSignals) -> bool:
+        """
+        Whether a message from a confirmed scam session is worth indexing. The
+        verdict is per session, so the message itself must look like a campaign
+        template: long enough (CAMPAIGN_MIN_SHINGLES; a short "ok sir" would
+        match any other "ok sir" at 1.0) and carrying its own indicators.
+        """
+        if rule_signals is None or len(shingles(text)) < Config.CAMPAIGN_MIN_SHINGLES:
+            return False
+        intel = rule_signals.intelligence
+        return bool(rule_signals.urgency_detected or rule_signals.sensitive_info_request
+                    or rule_signals.suspicious_links or rule_signals.suspicious_upi or rule_signals.suspicious_phones
+                    or intel.bankAccounts or intel.suspiciousKeywords)
+
+    @staticmethod
+    def encode(signature: list) -> str:
+        return "".join(f"{v:08x}" for v in signature)
+
+    @staticmethod
+    def decode(packed: str) -> list:
+        return [int(packed[i:i + 8], 16) for i in range(0, len(packed), 8)]
+
+    @staticmethod
+    def similarity(a: list, b: list) -> float:
+        if not a or len(a) != len(b):
+            return 0.0
+        return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+    async def lookup(self, text: str, signature: list = None):
+        """
+        Returns (similarity, template ExtractedSignals) of the closest indexed
+        scam above the threshold, or None. Two round trips at most.
+        """
+        self.stats["lookups"] += 1
+        signature = signature if signature is not None else self.signature(text)
+        if not signature:
+            return None
+
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self.bucket_keys(signature):
+            pipe.smembers(key)
+        band_hits = Counter()
+        with redis_op("campaign_buckets"):
+            buckets = await pipe.execute()
+        for members in buckets:
+            band_hits.update(members)
+        if not band_hits:
+            return None
+
+        # Entries sharing the most bands are the likeliest near-duplicates
+        candidates = [entry_id for entry_id, _ in band_hits.most_common(Config.CAMPAIGN_MAX_CANDIDATES)]
+        pipe = self.redis.pipeline(transaction=False)
+        for entry_id in candidates:
+            pipe.hmget(f"lsh:e:{entry_id}", ["sig", "signals"])
+        best = None
+        with redis_op("campaign_candidates"):
+            entries = await pipe.execute()
+        for sig, signals in entries:
+            if not sig:
+                continue
+            score = self.similarity(signature, self.decode(sig))
+            if score >= Config.CAMPAIGN_MATCH_THRESHOLD and (best is None or score > best[0]):
+                best = (score, signals)
+        if best is None:
+            return None
+
+        self.stats["matches"] += 1
+        return best[0], ExtractedSignals.model_validate_json(best[1])
+
+    async def add(self, text: str, signals: ExtractedSignals, signature: list = None):
+        """Indexes a confirmed scam message; evicts the oldest entries beyond the cap."""
+        signature = signature if signature is not None else self.signature(text)
+        if not signature:
+            return
+        packed = self.encode(signature)
+        entry_id = hashlib.sha1(packed.encode()).hexdigest()[:16]
+        # Artifacts are per-message (names, UPI IDs, links differ), only the template is inherited;
+        # so is the state of the source conversation (its end flag, notes about that session)
+        template = signals.model_copy(update={
+            "suspicious_links": [], "suspicious_upi": [], "suspicious_phones": [],
+            "intelligence": ExtractedIntelligence(), "shouldEndConversation": False, "agentNotes": "",
+        })
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(f"lsh:e:{entry_id}", mapping={"sig": packed, "signals": template.model_dump_json()})
+        for key in self.bucket_keys(signature):
+            pipe.sadd(key, entry_id)
+        pipe.zadd("lsh:order", {entry_id: time.time()})
+        pipe.zcard("lsh:order")
+        with redis_op("campaign_add"):
+            size = (await pipe.execute())[-1]
+        self.stats["added"] += 1
+
+        if size > Config.CAMPAIGN_INDEX_MAX_ENTRIES:
+            await self.evict(size - Config.CAMPAIGN_INDEX_MAX_ENTRIES)
+
+    async def evict(self, count: int):
+        """Removes the `count` oldest entries and their bucket memberships."""
+        oldest = await self.redis.zpopmin("lsh:order", count)
+        if not oldest:
+            return
+        entry_ids = [entry_id for entry_id, _ in oldest]
+        pipe = self.redis.pipeline(transaction=False)
+        for entry_id in entry_ids:
+            pipe.hget(f"lsh:e:{entry_id}", "sig")
+        packed_sigs = await pipe.execute()
+
+        pipe = self.redis.pipeline(transaction=False)
+        for entry_id, packed in zip(entry_ids, packed_sigs):
+            if packed:
+                for key in self.bucket_keys(self.decode(packed)):
+                    pipe.srem(key, entry_id)
+            pipe.delete(f"lsh:e:{entry_id}")
+        await pipe.execute()
+        self.stats["evicted"] += len(entry_ids)
@@ -14,6 +14,182 @@ class Config:
     BETA = 0.8   # LLM-based weight
     SCAM_THRESHOLD = 0.75
 
+    # Fusion scorer (risk_fusion.py) and early exit: skip the intent LLM call when
+    # the rule risk alone fixes the verdict for any intent score in [0, 1]. With the
+    # weights above it never fires: the fused risk spans [0.2r, 0.2r + 0.8] for rule
+    # risk r, which always straddles 0.75, so it only pays off with ALPHA > 0.25
+    FUSION_SCORER = os.getenv("FUSION_SCORER", "linear")
+    FUSION_EARLY_EXIT = os.getenv("FUSION_EARLY_EXIT", "true").lower() == "true"
+
+    # Local Intent Classifier (local_classifier.py, trained with train_classifier.py):
+    # hashed n-gram model scored before LLMScorer; the LLM only sees turns whose
+    # scam probability lies between SAFE_MAX and SCAM_MIN. With SPECULATIVE_SCORING the
+    # LLM call still starts early unless the model is confident on the prior timeline
+    LOCAL_CLASSIFIER_ENABLED = os.getenv("LOCAL_CLASSIFIER_ENABLED", "false").lower() == "true"
+    LOCAL_CLASSIFIER_PATH = os.getenv("LOCAL_CLASSIFIER_PATH", "intent_model.json")
+    LOCAL_CLASSIFIER_SAFE_MAX = float(os.getenv("LOCAL_CLASSIFIER_SAFE_MAX", 0.05))
+    LOCAL_CLASSIFIER_SCAM_MIN = float(os.getenv("LOCAL_CLASSIFIER_SCAM_MIN", 0.95))
+
     # LLM Settings
     GROQ_API_KEY = os.getenv("GROQ_API_KEY", "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")
     LLM_MODEL = "llama-3.3-70b-versatile"
+
+    # Rule-based Fast Path (rule_extractor.py)
+    # "on": clear-cut scams skip both LLM calls (the safe band always goes to the LLMs,
+    # its agreement is tracked), "shadow": classify but always use the LLMs, "off": LLM-only
+    FAST_PATH_MODE = os.getenv("FAST_PATH_MODE", "on")
+    FAST_PATH_SCAM_MIN = float(os.getenv("FAST_PATH_SCAM_MIN", 0.9))  # rule score + UPI/bank account + sensitive ask => scam
+    FAST_PATH_SAFE_MAX = float(os.getenv("FAST_PATH_SAFE_MAX", 0.0))  # rule score with no indicators => safe band
+
+    # Speculative Intent Scoring: run LLMScorer concurrently with extraction on the
+    # prior timeline + raw message; re-score SAFE verdicts within the margin below
+    # SCAM_THRESHOLD when extraction surfaced new evidence
+    SPECULATIVE_SCORING = os.getenv("SPECULATIVE_SCORING", "true").lower() == "true"
+    SPECULATIVE_RESCORE_MARGIN = float(os.getenv("SPECULATIVE_RESCORE_MARGIN", 0.15))
+
+    # Rolling Session Context (context_window.py)
+    # LLM prompts get a digest of older turns + the last CONTEXT_RECENT_TURNS deltas verbatim;
+    # every CONTEXT_DIGEST_EVERY turns the oldest deltas are folded into the digest
+    CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", 8))
+    CONTEXT_DIGEST_EVERY = int(os.getenv("CONTEXT_DIGEST_EVERY", 8))
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1200))  # approx. tokens
+
+    # Prompt Compiler (prompt_compiler.py): static system prompts, compact artifacts and a
+    # per-call input budget (approx. tokens, system prompt included); sections over it are trimmed
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 1600))
+    PROMPT_ARTIFACT_MAX_ITEMS = int(os.getenv("PROMPT_ARTIFACT_MAX_ITEMS", 10))  # values per artifact category
+
+    # LLM Gateway (llm_gateway.py), shared by all three agents
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # e.g. http://127.0.0.1:8100 for llm_stub.py
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))  # in-flight requests, all models
+    LLM_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("LLM_MAX_CONCURRENCY_PER_MODEL", 8))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))  # on 429
+    LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", 0.5))  # seconds, doubled per attempt
+    LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", 8))
+
+    # Extraction Cache (extraction_cache.py): LRU in-process + Redis tier with TTL.
+    # Bump EXTRACTION_CACHE_VERSION to invalidate entries without a prompt/model change
+    EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "true").lower() == "true"
+    EXTRACTION_CACHE_SIZE = int(os.getenv("EXTRACTION_CACHE_SIZE", 10000))
+    EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", 7 * 24 * 3600))  # seconds
+    EXTRACTION_CACHE_VERSION = os.getenv("EXTRACTION_CACHE_VERSION", "1")
+
+    # Campaign Index (campaign_index.py): MinHash/LSH over confirmed scam messages.
+    # BANDS x ROWS permutations; a candidate matches at estimated Jaccard >= threshold
+    CAMPAIGN_INDEX_ENABLED = os.getenv("CAMPAIGN_INDEX_ENABLED", "true").lower() == "true"
+    CAMPAIGN_LSH_BANDS = int(os.getenv("CAMPAIGN_LSH_BANDS", 16))
+    CAMPAIGN_LSH_ROWS = int(os.getenv("CAMPAIGN_LSH_ROWS", 4))
+    CAMPAIGN_MATCH_THRESHOLD = float(os.getenv("CAMPAIGN_MATCH_THRESHOLD", 0.7))
+    CAMPAIGN_MAX_CANDIDATES = int(os.getenv("CAMPAIGN_MAX_CANDIDATES", 32))
+    CAMPAIGN_MIN_SHINGLES = int(os.getenv("CAMPAIGN_MIN_SHINGLES", 6))  # shorter messages are never indexed
+    CAMPAIGN_INDEX_MAX_ENTRIES = int(os.getenv("CAMPAIGN_INDEX_MAX_ENTRIES", 200000))  # oldest evicted first
+
+    # Artifact Reputation (reputation_index.py): an artifact seen in >= MIN_SCAM_SESSIONS
+    # confirmed-scam sessions, at >= MIN_SCAM_RATIO of its sessions, is flagged without an LLM
+    REPUTATION_ENABLED = os.getenv("REPUTATION_ENABLED", "true").lower() == "true"
+    REPUTATION_MIN_SCAM_SESSIONS = int(os.getenv("REPUTATION_MIN_SCAM_SESSIONS", 2))
+    REPUTATION_MIN_SCAM_RATIO = float(os.getenv("REPUTATION_MIN_SCAM_RATIO", 0.8))
+    REPUTATION_MAX_SESSIONS = int(os.getenv("REPUTATION_MAX_SESSIONS", 100))  # session ids kept per artifact
+
+    # Persona Reply Mode (persona_worker.py, reply_bank.py)
+    # inline: /detect awaits the persona LLM call (original behaviour)
+    # async:  reply generated by background workers, fetched via GET /reply/{sessionId}/{turn} or webhook
+    # bank:   a canned per-phase reply is returned at once, the LLM reply is still generated for polling
+    PERSONA_MODE = os.getenv("PERSONA_MODE", "inline")
+    PERSONA_WORKERS = int(os.getenv("PERSONA_WORKERS", 4))
+    PERSONA_QUEUE_SIZE = int(os.getenv("PERSONA_QUEUE_SIZE", 1000))  # full queue: fall back to the reply bank
+    PERSONA_REPLY_TTL = int(os.getenv("PERSONA_REPLY_TTL", 3600))  # seconds
+    PERSONA_POLL_INTERVAL = float(os.getenv("PERSONA_POLL_INTERVAL", 0.1))  # seconds, cross-process long-poll
+    PERSONA_MAX_WAIT = float(os.getenv("PERSONA_MAX_WAIT", 30))  # seconds, cap for ?wait=
+    PERSONA_WEBHOOK_URL = os.getenv("PERSONA_WEBHOOK_URL")  # optional, receives {sessionId, turn, reply}
+    PERSONA_WEBHOOK_TIMEOUT = float(os.getenv("PERSONA_WEBHOOK_TIMEOUT", 5))
+
+    # Batch Detection (batch_detect.py, POST /detect/batch)
+    BATCH_MAX_EVENTS = int(os.getenv("BATCH_MAX_EVENTS", 10000))  # per request / CLI window
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 16))  # sessions in flight
+    BATCH_PACK_EXTRACTION = os.getenv("BATCH_PACK_EXTRACTION", "true").lower() == "true"
+    BATCH_EXTRACTION_SIZE = int(os.getenv("BATCH_EXTRACTION_SIZE", 8))  # messages per extraction call
+
+    # Logging (structured_logging.py): JSON records written off the event loop by a queue listener.
+    # LOG_SAMPLE_RATE applies to the per-request verdict record; LOG_VERBOSE adds request header/body dumps
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json | text
+    LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() == "true"
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+    LOG_VERBOSE = os.getenv("LOG_VERBOSE", "false").lower() == "true"
+    LOG_REDACT_HEADERS = os.getenv("LOG_REDACT_HEADERS", "x-api-key,authorization,cookie")
+
+    # Metrics & Tracing (metrics.py): Prometheus text on GET /metrics; OpenTelemetry spans
+    # need TRACING_ENABLED plus an OpenTelemetry SDK/exporter configured in the deployment
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+
+    # Final-result Callbacks (callback_outbox.py): Redis outbox drained by a background dispatcher.
+    # Off by default: the callback is only logged, as the POST to the platform was never enabled
+    CALLBACK_DELIVERY_ENABLED = os.getenv("CALLBACK_DELIVERY_ENABLED", "false").lower() == "true"
+    CALLBACK_URL = os.getenv("CALLBACK_URL", "https://hackathon.guvi.in/api/updateHoneyPotFinalResult")
+    CALLBACK_TIMEOUT = float(os.getenv("CALLBACK_TIMEOUT", 10))
+    CALLBACK_MAX_CONNECTIONS = int(os.getenv("CALLBACK_MAX_CONNECTIONS", 10))
+    CALLBACK_BATCH_SIZE = int(os.getenv("CALLBACK_BATCH_SIZE", 50))  # callbacks claimed per dispatch
+    CALLBACK_LEASE = float(os.getenv("CALLBACK_LEASE", 60))  # seconds a claimed callback stays hidden (> CALLBACK_TIMEOUT)
+    CALLBACK_POLL_INTERVAL = float(os.getenv("CALLBACK_POLL_INTERVAL", 1.0))  # seconds
+    CALLBACK_MAX_ATTEMPTS = int(os.getenv("CALLBACK_MAX_ATTEMPTS", 8))  # then dead-lettered
+    CALLBACK_BACKOFF_BASE = float(os.getenv("CALLBACK_BACKOFF_BASE", 2))  # seconds, doubled per attempt
+    CALLBACK_BACKOFF_MAX = float(os.getenv("CALLBACK_BACKOFF_MAX", 300))
+    CALLBACK_RETENTION = int(os.getenv("CALLBACK_RETENTION", 7 * 24 * 3600))  # seconds
+
+    # Session State (memory_store.py): one hash + one summary list per session, expiring after
+    # SESSION_TTL seconds without activity. With SESSION_ARCHIVE_ENABLED, sessions idle for
+    # SESSION_ARCHIVE_AFTER (keep it below SESSION_TTL) are exported by session_archive.py and deleted
+    SESSION_TTL = int(os.getenv("SESSION_TTL", 24 * 3600))  # seconds, sliding
+    SESSION_LEGACY_FALLBACK = os.getenv("SESSION_LEGACY_FALLBACK", "true").lower() == "true"  # migrate on first touch
+    SESSION_ARCHIVE_ENABLED = os.getenv("SESSION_ARCHIVE_ENABLED", "false").lower() == "true"
+    SESSION_ARCHIVE_AFTER = int(os.getenv("SESSION_ARCHIVE_AFTER", 6 * 3600))  # seconds idle
+    SESSION_ARCHIVE_PATH = os.getenv("SESSION_ARCHIVE_PATH", "session_archive.jsonl")  # default hook: JSONL
+    SESSION_ARCHIVE_INTERVAL = float(os.getenv("SESSION_ARCHIVE_INTERVAL", 60))  # seconds between sweeps
+    SESSION_ARCHIVE_BATCH_SIZE = int(os.getenv("SESSION_ARCHIVE_BATCH_SIZE", 100))
+
+    # Hot-session Cache (session_cache.py): in-process LRU of SessionState, validated against
+    # the session's Redis version counter each turn, so several workers can share sessions
+    SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "true").lower() == "true"
+    SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", 10000))  # sessions per process
+
+    # Per-session Serialization (session_serializer.py): turns of one session run one at a time in
+    # arrival order, different sessions in parallel. local: within this process; redis: plus a
+    # lease lock shared by all workers; off: no ordering (previous behaviour)
+    SESSION_LOCK_MODE = os.getenv("SESSION_LOCK_MODE", "local")
+    SESSION_LOCK_TTL = float(os.getenv("SESSION_LOCK_TTL", 60))  # seconds, lease renewed while held
+    SESSION_LOCK_WAIT = float(os.getenv("SESSION_LOCK_WAIT", 30))  # seconds, then processed unlocked
+    SESSION_LOCK_RETRY_INTERVAL = float(os.getenv("SESSION_LOCK_RETRY_INTERVAL", 0.02))  # seconds
+    # > 0: messages of one session queued within the window share one evaluation (packed
+    # extraction, one intent score and persona reply for the latest message)
+    SESSION_COALESCE_WINDOW_MS = float(os.getenv("SESSION_COALESCE_WINDOW_MS", 0))
+    SESSION_COALESCE_MAX = int(os.getenv("SESSION_COALESCE_MAX", 8))
+
+    # conversationHistory Reconciliation (history_sync.py): the session remembers a fingerprint
+    # of the history it has covered; incoming messages missing from it (cold session after
+    # eviction, lost requests) are recorded before the turn with packed extraction
+    HISTORY_RECONCILE = os.getenv("HISTORY_RECONCILE", "false").lower() == "true"
+    HISTORY_BOOTSTRAP_MAX = int(os.getenv("HISTORY_BOOTSTRAP_MAX", 50))  # most recent messages recorded
+
+    # Request Ingestion (fast_json.py): /detect bodies parsed once from bytes, conversationHistory
+    # validated lazily per message, responses encoded without response_model validation
+    FAST_INGEST = os.getenv("FAST_INGEST", "true").lower() == "true"
+
+    # Worker Processes (serve.py, session_router.py): WEB_WORKERS uvicorn processes, each with its
+    # own connection pools. hash: a router on the public port consistent-hashes sessionId to the
+    # workers (127.0.0.1:WORKER_PORT_BASE+i), so a session's cache and turn order stay in one process;
+    # none: the kernel spreads connections (use SESSION_LOCK_MODE=redis for per-session ordering)
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", 1))
+    WORKER_ROUTING = os.getenv("WORKER_ROUTING", "hash").lower()
+    WORKER_PORT_BASE = int(os.getenv("WORKER_PORT_BASE", 10100))
+    WORKER_HASH_VNODES = int(os.getenv("WORKER_HASH_VNODES", 64))  # ring points per worker
+    WORKER_ID = os.getenv("WORKER_ID", "0")  # set per process by serve.py
+
+    # Startup (warmup.py): each worker opens its Redis / LLM pools at startup and warms them
+    # concurrently (Redis PING, one LLM connection, local classifier load) before GET /ready
+    # reports ready; WARMUP_TIMEOUT bounds each check. Off: ready as soon as the pools exist
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", 5.0))
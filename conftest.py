@@ -0,0 +1,51 @@
+"""
+Shared pytest fixtures.
+
+Tests that drive the app through `main` swap its module-level backends for
+in-memory ones; these fixtures do it with monkeypatch, so every swapped
+global is restored after the test and no test inherits another's Redis,
+LLM gateways or disabled extraction cache.
+"""
+import os
+
+import pytest
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import main
+from fake_redis import FakeRedis
+from llm_stub import LLMStub, stub_gateway
+
+
+@pytest.fixture
+def main_globals(monkeypatch):
+    """Restores main's Redis client, agent gateways and extraction cache after the test."""
+    for target, name in ((main.memory_store, "redis"), (main.extraction_agent, "gateway"),
+                         (main.llm_scorer, "gateway"), (main.persona_agent, "gateway"),
+                         (main.extraction_agent, "cache")):
+        monkeypatch.setattr(target, name, getattr(target, name))
+    yield
+    if main.memory_store.cache is not None:
+        main.memory_store.cache.clear()  # states cached from the test's Redis
+
+
+@pytest.fixture
+def install_stubs(main_globals, monkeypatch):
+    """
+    `install_stubs(stub=None, redis=None) -> (redis, stub)`: a FakeRedis (or
+    `redis`) under the memory store with an empty hot-session cache, the
+    three agents on an LLMStub (or `stub`) and no extraction cache.
+    """
+    def install(stub: LLMStub = None, redis=None) -> tuple:
+        redis = FakeRedis() if redis is None else redis
+        stub = LLMStub() if stub is None else stub
+        gateway = stub_gateway(stub)
+        monkeypatch.setattr(main.memory_store, "redis", redis)
+        if main.memory_store.cache is not None:
+            main.memory_store.cache.clear()
+        for agent in (main.extraction_agent, main.llm_scorer, main.persona_agent):
+            monkeypatch.setattr(agent, "gateway", gateway)
+        monkeypatch.setattr(main.extraction_agent, "cache", None)
+        return redis, stub
+
+    return install
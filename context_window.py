@@ -0,0 +1,122 @@
+import re
+from config import Config
+from models import SessionState
+
+# Summary delta written by ExtractionAgent.compute_summary_delta:
+# [timestamp] sender (phase|tone): text... [TAG, TAG]
+DELTA_PATTERN = re.compile(
+    r"^\[(?P<ts>[^\]]*)\] (?P<sender>\S+) \((?P<phase>[^|)]*)\|(?P<tone>[^)]*)\): "
+    r"(?P<text>.*?)(?: \[(?P<tags>[A-Z_(), 0-9]+)\])?$",
+    re.DOTALL,
+)
+TAG_COUNT_PATTERN = re.compile(r"^(?P<name>[A-Z_]+)\((?P<count>\d+)\)$")
+
+MAX_PHASES = 6
+MAX_HIGHLIGHTS = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English/Latin text)."""
+    return (len(text) + 3) // 4
+
+
+def fold_deltas(digest: dict, lines: list, skipped: int = 0) -> dict:
+    """
+    Folds summary deltas that fall out of the recent window into the session
+    digest. The digest is structured (counts, phase path, highlights) so
+    re-summarizing it keeps a constant size no matter how long the session runs.
+    `skipped` counts older lines that were never loaded (pre-digest sessions).
+    """
+    data = {
+        "turns": 0,
+        "first_ts": "",
+        "last_ts": "",
+        "senders": {},
+        "phases": [],
+        "tones": [],
+        "tags": {},
+        "highlights": [],
+        **(digest or {}),
+    }
+    data["turns"] += skipped
+
+    for line in lines:
+        data["turns"] += 1
+        match = DELTA_PATTERN.match(line)
+        if not match:
+            continue
+        data["first_ts"] = data["first_ts"] or match["ts"]
+        data["last_ts"] = match["ts"]
+        data["senders"][match["sender"]] = data["senders"].get(match["sender"], 0) + 1
+
+        phase = match["phase"]
+        if phase and (not data["phases"] or data["phases"][-1] != phase):
+            data["phases"] = (data["phases"] + [phase])[-MAX_PHASES:]
+        tone = match["tone"]
+        if tone and tone not in data["tones"]:
+            data["tones"] = (data["tones"] + [tone])[-MAX_PHASES:]
+
+        if match["tags"]:
+            for tag in match["tags"].split(", "):
+                counted = TAG_COUNT_PATTERN.match(tag)
+                name, count = (counted["name"], int(counted["count"])) if counted else (tag, 1)
+                data["tags"][name] = data["tags"].get(name, 0) + count
+            data["highlights"] = (data["highlights"] + [match["text"]])[-MAX_HIGHLIGHTS:]
+    return data
+
+
+def render_digest(digest: dict) -> str:
+    """Renders the structured digest as a single timeline line."""
+    if not digest or not digest.get("turns"):
+        return ""
+    parts = [f"[DIGEST] {digest['turns']} earlier turns ({digest['first_ts']} .. {digest['last_ts']})"]
+    if digest["senders"]:
+        parts.append("senders: " + ", ".join(f"{s} x{n}" for s, n in digest["senders"].items()))
+    if digest["phases"]:
+        parts.append("phases: " + " > ".join(digest["phases"]))
+    if digest["tones"]:
+        parts.append("tones: " + ", ".join(digest["tones"]))
+    if digest["tags"]:
+        # Same tag spelling as the deltas, so rule_extractor.timeline_has_flags still sees them
+        tags = [f"{name}({n})" if name in ("LINKS", "UPI") else f"{name} x{n}" for name, n in digest["tags"].items()]
+        parts.append("flags: [" + ", ".join(tags) + "]")
+    if digest["highlights"]:
+        parts.append("highlights: " + " | ".join(digest["highlights"]))
+    return "; ".join(parts)
+
+
+def fit_to_budget(lines: list, budget_tokens: int, header: str = "") -> list:
+    """
+    Keeps the newest lines that fit in `budget_tokens`, then the header (digest)
+    if there is room left, truncating it rather than dropping it when possible.
+    The newest line is always kept, truncated if it alone exceeds the budget.
+    """
+    kept = []
+    used = 0
+    for line in reversed(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget_tokens:
+            if not kept:
+                kept.append(line[:budget_tokens * 4])
+                used = budget_tokens
+            break
+        kept.append(line)
+        used += cost
+
+    remaining = budget_tokens - used
+    if header and remaining > 8:
+        kept.append(header if estimate_tokens(header) < remaining else header[:(remaining - 1) * 4 - 3] + "...")
+    kept.reverse()
+    return kept
+
+
+def build_context(state: SessionState, current_delta: str = None, budget_tokens: int = None) -> list:
+    """Compacted rolling context: digest + last N deltas verbatim (+ this turn), within the token budget."""
+    lines = list(state.summary)
+    if current_delta:
+        lines.append(current_delta)
+    return fit_to_budget(
+        lines,
+        budget_tokens or Config.CONTEXT_TOKEN_BUDGET,
+        header=render_digest(state.digest),
+    )
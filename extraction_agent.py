@@ -1,26 +1,127 @@
 import json
 import re
+import asyncio
+from typing import List
 from models import ScamEventInput, ExtractedSignals
 from config import Config
-from groq import AsyncGroq
+from llm_gateway import LLMGateway, get_gateway
+from extraction_cache import ExtractionCache
+from prompt_compiler import compact, compile_messages
+from structured_logging import get_logger
+from metrics import AGENT_FALLBACKS
+
+logger = get_logger("extraction_agent")
+
+# JSON shape of one extraction result (shared by the single and batch prompts)
+EXTRACTION_SCHEMA = compact("""{
+    "urgency_detected": bool,
+    "sensitive_info_request": bool,
+    "intelligence": {"bankAccounts": [], "bankNames": [], "upiIds": [], "phishingLinks": [], "phoneNumbers": [], "suspiciousKeywords": []},
+    "sentiment": string,
+    "conversation_phase": string (e.g. "Introduction", "Grooming", "Urgency"),
+    "tone": string (e.g. "Friendly", "Aggressive"),
+    "shouldEndConversation": bool (Set to FALSE if the scammer is still responsive or if we can extract more info like Bank/UPI. Set to TRUE only if conversation is clearly over or circular.),
+    "agentNotes": string (Brief summary of tactic)
+}""")
+
+# Static: the message is only sent in the user turn, so identical texts share a cache entry
+# (the cache namespace is derived from this prompt) and the text is not sent twice.
+EXTRACTION_PROMPT = compact("""
+    Analyze the message in the user turn for scam indicators. Extracted data must be precise.
+    Output JSON format:
+    """) + "\n" + EXTRACTION_SCHEMA
+
+# Batch mode: several messages analysed in one LLM call, one result object per message
+BATCH_EXTRACTION_PROMPT = compact("""
+    Analyze each of the following messages independently for scam indicators. Extracted data must be precise.
+    The user turn is a JSON array of messages.
+    Output JSON format: {"results": [...]}, one object per message, in the same order, each in this format:
+    """) + "\n" + EXTRACTION_SCHEMA
 
 class ExtractionAgent:
-    def __init__(self):
-        self.client = AsyncGroq(api_key=Config.GROQ_API_KEY)
+    def __init__(self, gateway: LLMGateway = None, cache: ExtractionCache = None):
+        self.gateway = gateway or get_gateway()
+        self.cache = cache
 
     async def extract_signals(self, event: ScamEventInput) -> ExtractedSignals:
         """
         Uses an LLM (Groq Llama-3) to extract signals.
+        Identical (normalized) message texts are served from the extraction cache.
         """
+        if self.cache is not None:
+            cached = await self.cache.get(event.message.text)
+            if cached is not None:
+                return cached
+
         prompt = self._construct_prompt(event)
         
+        cacheable = True
         try:
             llm_response_json = await self._call_llm(prompt, event.message.text)
         except Exception as e:
-            print(f"Extraction Agent LLM Error: {e}")
-            # Fallback to defaults
+            logger.warning("extraction LLM error", extra={"fields": {"error": str(e)}})
+            AGENT_FALLBACKS.inc(agent="extraction")
+            # Fallback to defaults (never cached)
             llm_response_json = {}
+            cacheable = False
+
+        signals = self._signals_from_json(llm_response_json)
+        if self.cache is not None and cacheable:
+            await self.cache.put(event.message.text, signals)
+        return signals
+
+    async def extract_signals_batch(self, texts: List[str]) -> List[ExtractedSignals]:
+        """
+        Extracts signals for several messages, packing up to BATCH_EXTRACTION_SIZE
+        uncached texts into each LLM call. Duplicate texts are extracted once.
+        A chunk whose response does not line up with its messages is retried
+        message by message.
+        """
+        results = {}
+        pending = []
+        for text in dict.fromkeys(texts):
+            cached = await self.cache.get(text) if self.cache is not None else None
+            if cached is not None:
+                results[text] = cached
+            else:
+                pending.append(text)
+
+        size = max(1, Config.BATCH_EXTRACTION_SIZE)
+        chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+        for chunk, signals in zip(chunks, await asyncio.gather(*(self._extract_chunk(c) for c in chunks))):
+            results.update(zip(chunk, signals))
+        return [results[text] for text in texts]
 
+    async def _extract_chunk(self, texts: List[str]) -> List[ExtractedSignals]:
+        if len(texts) > 1:
+            try:
+                completion = await self.gateway.chat(
+                    agent="extraction",
+                    model=Config.LLM_MODEL,
+                    messages=compile_messages("extraction_batch", BATCH_EXTRACTION_PROMPT, [
+                        ("Analyze these messages", json.dumps(texts), "keep"),
+                    ]),
+                    temperature=0.0,
+                    response_format={"type": "json_object"}
+                )
+                items = json.loads(completion.choices[0].message.content).get("results", [])
+                if len(items) == len(texts):
+                    signals = [self._signals_from_json(item) for item in items]
+                    if self.cache is not None:
+                        for text, sig in zip(texts, signals):
+                            await self.cache.put(text, sig)
+                    return signals
+                logger.warning("batch extraction misaligned", extra={"fields": {"results": len(items), "messages": len(texts)}})
+            except Exception as e:
+                logger.warning("batch extraction error", extra={"fields": {"error": str(e)}})
+                AGENT_FALLBACKS.inc(agent="extraction_batch")
+        return list(await asyncio.gather(*(
+            self.extract_signals(ScamEventInput(sessionId="batch", message={"sender": "scammer", "text": text}))
+            for text in texts
+        )))
+
+    @staticmethod
+    def _signals_from_json(llm_response_json: dict) -> ExtractedSignals:
         return ExtractedSignals(
             urgency_detected=llm_response_json.get("urgency_detected", False),
             sensitive_info_request=llm_response_json.get("sensitive_info_request", False),
@@ -36,43 +137,19 @@ class ExtractionAgent:
         )
     
     def _construct_prompt(self, event: ScamEventInput) -> str:
-        """Constructs the prompt for the Extraction Agent."""
-        return f"""
-        Analyze the following message for scam indicators. Extracted data must be precise.
-        
-        Message: "{event.message.text}"
-        Context: Session {event.sessionId}
-        
-        Output JSON format:
-        {{
-            "urgency_detected": bool,
-            "sensitive_info_request": bool,
-            "intelligence": {{
-                "bankAccounts": [],
-                "bankNames": [],
-                "upiIds": [],
-                "phishingLinks": [],
-                "phoneNumbers": [],
-                "suspiciousKeywords": []
-            }},
-            "sentiment": string,
-            "conversation_phase": string (e.g. "Introduction", "Grooming", "Urgency"),
-            "tone": string (e.g. "Friendly", "Aggressive"),
-            "shouldEndConversation": bool (Set to FALSE if the scammer is still responsive or if we can extract more info like Bank/UPI. Set to TRUE only if conversation is clearly over or circular.),
-            "agentNotes": string (Brief summary of tactic)
-        }}
-        """
+        """System prompt for the Extraction Agent (static; the text goes in the user turn)."""
+        return EXTRACTION_PROMPT
 
     async def _call_llm(self, system_prompt: str, user_text: str) -> dict:
         """
-        Calls Groq API.
+        Calls Groq API (through the shared LLM gateway).
         """
-        completion = await self.client.chat.completions.create(
+        completion = await self.gateway.chat(
+            agent="extraction",
             model=Config.LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyze this text: {user_text}"}
-            ],
+            messages=compile_messages("extraction", system_prompt, [
+                ("Analyze this text", user_text, "clip"),
+            ]),
             temperature=0.0,
             response_format={"type": "json_object"}
         )
@@ -80,6 +157,11 @@ class ExtractionAgent:
         content = completion.choices[0].message.content
         return json.loads(content)
 
+    def compute_raw_delta(self, event: ScamEventInput) -> str:
+        """Timeline line for a message that has not been through extraction yet."""
+        timestamp = event.message.timestamp.isoformat()
+        return f"[{timestamp}] {event.message.sender} (pending): {event.message.text}"
+
     def compute_summary_delta(self, event: ScamEventInput, signals: ExtractedSignals) -> str:
         """Creates a structured summary line for the append-only log."""
         timestamp = event.message.timestamp.isoformat()
@@ -0,0 +1,99 @@
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from config import Config
+from models import ExtractedSignals
+from structured_logging import get_logger
+from metrics import redis_op
+
+logger = get_logger("extraction_cache")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used for cache keys: Unicode NFKC, whitespace collapsed.
+    Case is kept, since extracted artifacts (UPI IDs, links) are returned verbatim.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class ExtractionCache:
+    """
+    Content-addressed cache of ExtractedSignals keyed on normalized message text.
+
+    Two tiers: an in-process LRU and a shared Redis tier with TTL. Keys are
+    namespaced by a fingerprint of the extraction prompt template and model, so
+    changing either (or EXTRACTION_CACHE_VERSION) invalidates every entry.
+    """
+
+    def __init__(self, memory_store, prompt_template: str):
+        # Redis is reached through the MemoryStore so both share one connection pool
+        self.memory_store = memory_store
+        self.namespace = hashlib.sha256(
+            f"{prompt_template}|{Config.LLM_MODEL}|{Config.EXTRACTION_CACHE_VERSION}".encode()
+        ).hexdigest()[:12]
+        self.local = OrderedDict()
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0, "redis_errors": 0}
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        return f"extract_cache:{self.namespace}:{digest}"
+
+    def _remember(self, key: str, value: str):
+        self.local[key] = value
+        self.local.move_to_end(key)
+        while len(self.local) > Config.EXTRACTION_CACHE_SIZE:
+            self.local.popitem(last=False)
+
+    async def get(self, text: str):
+        key = self.key(text)
+        value = self.local.get(key)
+        if value is not None:
+            self.local.move_to_end(key)
+            self.stats["local_hits"] += 1
+            return ExtractedSignals.model_validate_json(value)
+
+        try:
+            with redis_op("extraction_cache_get"):
+                value = await self.memory_store.redis.get(key)
+        except Exception as e:
+            logger.warning("extraction cache redis error", extra={"fields": {"error": str(e)}})
+            self.stats["redis_errors"] += 1
+            value = None
+        if value is not None:
+            self.stats["redis_hits"] += 1
+            self._remember(key, value)
+            return ExtractedSignals.model_validate_json(value)
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, text: str, signals: ExtractedSignals):
+        key = self.key(text)
+        value = signals.model_dump_json()
+        self._remember(key, value)
+        self.stats["stores"] += 1
+        try:
+            with redis_op("extraction_cache_put"):
+                await self.memory_store.redis.set(key, value, ex=Config.EXTRACTION_CACHE_TTL)
+        except Exception as e:
+            logger.warning("extraction cache redis error", extra={"fields": {"error": str(e)}})
+            self.stats["redis_errors"] += 1
+
+    async def invalidate(self) -> int:
+        """Drops every entry of the current namespace from both tiers."""
+        self.local.clear()
+        removed = 0
+        async for key in self.memory_store.redis.scan_iter(match=f"extract_cache:{self.namespace}:*"):
+            removed += await self.memory_store.redis.delete(key)
+        return removed
+
+    def snapshot(self) -> dict:
+        hits = self.stats["local_hits"] + self.stats["redis_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "namespace": self.namespace,
+            "local_entries": len(self.local),
+            "hit_rate": (hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,312 @@
+import fnmatch
+import time
+
+
+class FakeRedis:
+    """
+    Minimal in-memory stand-in for `redis.asyncio.Redis` (decode_responses=True).
+    Used by the offline tests and benchmarks. Every awaited command and every
+    pipeline `execute()` counts as one network round trip.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+        self.round_trips = 0
+        self.commands = 0
+
+    def reset_stats(self):
+        self.round_trips = 0
+        self.commands = 0
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self)
+
+    def __getattr__(self, name):
+        impl = getattr(self, f"_cmd_{name}", None)
+        if impl is None:
+            raise AttributeError(name)
+
+        async def command(*args, **kwargs):
+            self.round_trips += 1
+            self.commands += 1
+            return impl(*args, **kwargs)
+
+        return command
+
+    async def scan_iter(self, match="*", count=None):
+        self.round_trips += 1
+        for key in self._cmd_keys(match):
+            yield key
+
+    # --- internals ---
+
+    def _live(self, key):
+        deadline = self.expiry.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return self.data.get(key)
+
+    def _ensure(self, key, factory):
+        val = self._live(key)
+        if val is None:
+            val = factory()
+            self.data[key] = val
+        return val
+
+    # --- strings ---
+
+    def _cmd_ping(self):
+        return True
+
+    def _cmd_get(self, key):
+        val = self._live(key)
+        return None if val is None else str(val)
+
+    def _cmd_set(self, key, value, ex=None, px=None, nx=False):
+        if nx and self._live(key) is not None:
+            return None
+        self.data[key] = str(value)
+        self.expiry.pop(key, None)
+        if ex is not None:
+            self._cmd_expire(key, ex)
+        if px is not None:
+            self.expiry[key] = time.monotonic() + px / 1000.0
+        return True
+
+    def _cmd_incr(self, key):
+        return self._cmd_incrby(key, 1)
+
+    def _cmd_incrby(self, key, amount):
+        val = int(self._live(key) or 0) + int(amount)
+        self.data[key] = str(val)
+        return val
+
+    # --- keys ---
+
+    def _cmd_delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._live(key) is not None:
+                removed += 1
+            self.data.pop(key, None)
+            self.expiry.pop(key, None)
+        return removed
+
+    def _cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._live(key) is not None)
+
+    def _cmd_expire(self, key, seconds):
+        if self._live(key) is None:
+            return False
+        self.expiry[key] = time.monotonic() + seconds
+        return True
+
+    def _cmd_ttl(self, key):
+        if self._live(key) is None:
+            return -2
+        deadline = self.expiry.get(key)
+        if deadline is None:
+            return -1
+        return max(0, int(deadline - time.monotonic()))
+
+    def _cmd_keys(self, pattern="*"):
+        return [k for k in list(self.data) if self._live(k) is not None and fnmatch.fnmatchcase(k, pattern)]
+
+    # --- sets ---
+
+    def _cmd_sadd(self, key, *members):
+        s = self._ensure(key, set)
+        before = len(s)
+        s.update(str(m) for m in members)
+        return len(s) - before
+
+    def _cmd_smembers(self, key):
+        return set(self._live(key) or set())
+
+    def _cmd_srem(self, key, *members):
+        s = self._live(key) or set()
+        removed = len(s & set(members))
+        s.difference_update(members)
+        if not s:
+            self.data.pop(key, None)
+        return removed
+
+    def _cmd_scard(self, key):
+        return len(self._live(key) or set())
+
+    # --- lists ---
+
+    def _cmd_rpush(self, key, *values):
+        lst = self._ensure(key, list)
+        lst.extend(str(v) for v in values)
+        return len(lst)
+
+    def _cmd_lpush(self, key, *values):
+        lst = self._ensure(key, list)
+        for v in values:
+            lst.insert(0, str(v))
+        return len(lst)
+
+    def _cmd_lrange(self, key, start, end):
+        lst = self._live(key) or []
+        n = len(lst)
+        if start < 0:
+            start = max(n + start, 0)
+        if end < 0:
+            end = n + end
+        return list(lst[start:end + 1])
+
+    def _cmd_llen(self, key):
+        return len(self._live(key) or [])
+
+    def _cmd_ltrim(self, key, start, end):
+        lst = self._live(key)
+        if lst is None:
+            return True
+        self.data[key] = self._cmd_lrange(key, start, end)
+        return True
+
+    # --- sorted sets ---
+
+    def _cmd_zadd(self, key, mapping, nx=False, xx=False, incr=False):
+        if incr:
+            (member, amount), = mapping.items()
+            z = self._live(key) or {}
+            if (nx and str(member) in z) or (xx and str(member) not in z):
+                return None
+            z = self._ensure(key, dict)
+            z[str(member)] = z.get(str(member), 0.0) + float(amount)
+            return z[str(member)]
+        if xx:
+            mapping = {m: s for m, s in mapping.items() if str(m) in (self._live(key) or {})}
+        z = self._ensure(key, dict)
+        added = sum(1 for m in mapping if str(m) not in z)
+        z.update({str(m): float(s) for m, s in mapping.items() if not (nx and str(m) in z)})
+        return added
+
+    def _cmd_zcard(self, key):
+        return len(self._live(key) or {})
+
+    def _cmd_zscore(self, key, member):
+        return (self._live(key) or {}).get(member)
+
+    def _cmd_zrem(self, key, *members):
+        z = self._live(key) or {}
+        removed = sum(1 for m in members if z.pop(m, None) is not None)
+        if not z:
+            self.data.pop(key, None)
+        return removed
+
+    def _cmd_zrange(self, key, start, end, withscores=False):
+        z = self._live(key) or {}
+        ordered = sorted(z.items(), key=lambda item: (item[1], item[0]))
+        n = len(ordered)
+        if start < 0:
+            start = max(n + start, 0)
+        if end < 0:
+            end = n + end
+        window = ordered[start:end + 1]
+        return window if withscores else [m for m, _ in window]
+
+    def _cmd_zrangebyscore(self, key, min, max, start=None, num=None, withscores=False):
+        z = self._live(key) or {}
+        lo = float("-inf") if min == "-inf" else float(min)
+        hi = float("inf") if max == "+inf" else float(max)
+        window = sorted(((m, s) for m, s in z.items() if lo <= s <= hi), key=lambda item: (item[1], item[0]))
+        if start is not None and num is not None:
+            window = window[start:start + num]
+        return window if withscores else [m for m, _ in window]
+
+    def _cmd_zpopmin(self, key, count=1):
+        popped = self._cmd_zrange(key, 0, count - 1, withscores=True)
+        self._cmd_zrem(key, *[m for m, _ in popped])
+        return popped
+
+    # --- scripts ---
+
+    def _cmd_eval(self, script, numkeys, *keys_and_args):
+        """Only the token-guarded del/pexpire scripts of session_serializer.py."""
+        key, token, *args = keys_and_args
+        if self._cmd_get(key) != str(token):
+            return 0
+        if "pexpire" in script:
+            self.expiry[key] = time.monotonic() + int(args[0]) / 1000.0
+            return 1
+        return self._cmd_delete(key)
+
+    # --- hashes ---
+
+    def _cmd_hset(self, key, field=None, value=None, mapping=None):
+        h = self._ensure(key, dict)
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = sum(1 for f in items if f not in h)
+        h.update({str(f): str(v) for f, v in items.items()})
+        return added
+
+    def _cmd_hsetnx(self, key, field, value):
+        h = self._ensure(key, dict)
+        if field in h:
+            return 0
+        h[field] = str(value)
+        return 1
+
+    def _cmd_hget(self, key, field):
+        return (self._live(key) or {}).get(field)
+
+    def _cmd_hmget(self, key, *fields):
+        h = self._live(key) or {}
+        if len(fields) == 1 and isinstance(fields[0], (list, tuple)):
+            fields = fields[0]
+        return [h.get(f) for f in fields]
+
+    def _cmd_hgetall(self, key):
+        return dict(self._live(key) or {})
+
+    def _cmd_hincrby(self, key, field, amount=1):
+        h = self._ensure(key, dict)
+        val = int(h.get(field, 0)) + int(amount)
+        h[field] = str(val)
+        return val
+
+    def _cmd_hdel(self, key, *fields):
+        h = self._live(key) or {}
+        removed = sum(1 for f in fields if h.pop(f, None) is not None)
+        if not h:
+            self.data.pop(key, None)
+        return removed
+
+
+class FakePipeline:
+    """Queues commands and replays them on `execute()` as a single round trip."""
+
+    def __init__(self, store: FakeRedis):
+        self.store = store
+        self.queue = []
+
+    def __getattr__(self, name):
+        impl = getattr(self.store, f"_cmd_{name}", None)
+        if impl is None:
+            raise AttributeError(name)
+
+        def queue_command(*args, **kwargs):
+            self.queue.append((impl, args, kwargs))
+            return self
+
+        return queue_command
+
+    async def execute(self):
+        self.store.round_trips += 1
+        self.store.commands += len(self.queue)
+        results = [impl(*args, **kwargs) for impl, args, kwargs in self.queue]
+        self.queue = []
+        return results
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.queue = []
@@ -0,0 +1,134 @@
+"""
+Fast ingestion / serialization path for /detect (FAST_INGEST).
+
+The body is parsed once from bytes (orjson when installed, json otherwise).
+Everything but conversationHistory is validated up front; history items are
+only type-checked (an invalid one is still a 422 at ingestion) and stay the
+decoded list behind a HistoryView that builds a Message only when indexed.
+Slices are views over the same list, and history fingerprints read sender /
+text straight from the raw items, so a turn that never looks at individual
+history messages never builds Message objects for them.
+
+Responses are encoded from plain dicts, with orjson or AgentAPIResponse's
+compiled pydantic-core serializer, instead of response_model validation.
+"""
+import json
+from datetime import datetime
+from typing import List, Sequence
+from typing_extensions import NotRequired, TypedDict
+from pydantic import TypeAdapter, ValidationError
+from models import Message, ScamEventInput, AgentAPIResponse
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class HistoryItem(TypedDict):
+    """Message's fields as a plain dict: validating against it checks an item without building a Message."""
+    sender: str
+    text: str
+    timestamp: NotRequired[datetime]
+
+
+HISTORY_ITEMS = TypeAdapter(List[HistoryItem])
+
+
+def loads(body: bytes):
+    """JSON from bytes; raises ValueError on malformed input (as orjson.JSONDecodeError does)."""
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def dumps(obj) -> bytes:
+    return orjson.dumps(obj) if orjson is not None else json.dumps(obj, separators=(",", ":")).encode()
+
+
+class HistoryView(Sequence):
+    """Read-only, lazily validated view over decoded conversationHistory items."""
+
+    __slots__ = ("raw", "start", "stop", "validated")
+
+    def __init__(self, raw: list, start: int = 0, stop: int = None, validated: dict = None):
+        self.raw = raw
+        self.start = start
+        self.stop = len(raw) if stop is None else stop
+        self.validated = {} if validated is None else validated  # shared by views of one list
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return HistoryView(self.raw, self.start + start, self.start + max(start, stop), self.validated)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        position = self.start + index
+        message = self.validated.get(position)
+        if message is None:
+            message = self.validated[position] = Message.model_validate(self.raw[position])
+        return message
+
+    def sender_text(self):
+        """(sender, text) per item without building Message objects (items were checked by event_from_data)."""
+        for item in self.raw[self.start:self.stop]:
+            yield item["sender"], item["text"]
+
+    def __repr__(self) -> str:
+        return f"HistoryView({len(self)} messages)"
+
+
+def event_from_data(data) -> ScamEventInput:
+    """
+    ScamEventInput from decoded JSON. History items are type-checked here, so an
+    invalid one is rejected at ingestion with the usual error and location, but
+    Message objects are only built when an item is used.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("event must be a JSON object")
+    history = data.get("conversationHistory", [])
+    if not isinstance(history, list):
+        raise ValueError("conversationHistory must be a list")
+    try:
+        HISTORY_ITEMS.validate_python(history)
+    except ValidationError:
+        return ScamEventInput.model_validate(data)  # raises the usual error, located in conversationHistory
+    # One compiled validation pass for everything else, then the view stands in for the list
+    event = ScamEventInput.model_validate({**data, "conversationHistory": []})
+    event.__dict__["conversationHistory"] = HistoryView(history)
+    return event
+
+
+def parse_event(body: bytes) -> ScamEventInput:
+    return event_from_data(loads(body))
+
+
+def encode_response(status: str, reply=None, **extra) -> bytes:
+    """AgentAPIResponse JSON (status, reply, and replyTurn/replyPending when set)."""
+    if orjson is not None:
+        return orjson.dumps({"status": status, "reply": reply, **extra})
+    response = AgentAPIResponse.model_construct(status=status, reply=reply, **extra)
+    return AgentAPIResponse.__pydantic_serializer__.to_json(response, exclude_unset=True)
+
+
+def request_body_schema(model) -> dict:
+    """`openapi_extra` documenting `model` as the JSON body of an endpoint that reads raw bytes."""
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+
+    def inline(node):
+        if isinstance(node, dict):
+            ref = node.get("$ref", "")
+            if ref.startswith("#/$defs/"):
+                return inline(defs[ref[len("#/$defs/"):]])
+            return {key: inline(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [inline(value) for value in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": inline(schema)}}}}
@@ -0,0 +1,82 @@
+"""
+conversationHistory reconciliation (HISTORY_RECONCILE).
+
+Every request carries the whole conversation so far. The session hash keeps
+a chained fingerprint of the history the server has already covered (the
+previous request's history plus its message) and its length, loaded with the
+rest of the state by `begin_turn`. Per request:
+
+  in sync     the covered prefix matches: only the new suffix is looked at,
+              and in the normal flow it holds nothing but our own reply
+  caught up   the suffix has incoming messages the server never processed
+              (a lost request, another deployment): they are recorded first
+  bootstrap   cold session (new, evicted or archived) with a history: the
+              incoming messages are recorded in one batched pass
+  diverged    the prefix does not match (history edited or truncated): nothing
+              is re-processed, the fingerprint is re-anchored on this history
+"""
+import hashlib
+from config import Config
+from metrics import REGISTRY, Counter
+
+HISTORY_RECONCILE = REGISTRY.register(Counter(
+    "scam_agent_history_reconcile_total", "conversationHistory reconciliation outcomes", ("outcome",)))
+
+# Sender of the replies we generate; everything else in the history is incoming
+OWN_SENDER = "user"
+
+
+def sender_text(messages):
+    """(sender, text) pairs; a fast_json.HistoryView yields them without validating items."""
+    pairs = getattr(messages, "sender_text", None)
+    return pairs() if pairs is not None else ((message.sender, message.text) for message in messages)
+
+
+def fingerprint(messages, seed: str = "") -> str:
+    """Chained digest of (sender, text) pairs; extending a prefix's fingerprint gives the whole one."""
+    digest = seed
+    for sender, text in sender_text(messages):
+        digest = hashlib.blake2b(f"{digest}\x1f{sender}\x1f{text}".encode(), digest_size=12).hexdigest()
+    return digest
+
+
+class HistoryReconciler:
+    def __init__(self):
+        self.stats = {"in_sync": 0, "caught_up": 0, "bootstrap": 0, "diverged": 0, "anchored": 0,
+                      "messages_recorded": 0}
+
+    def plan(self, event, state) -> tuple:
+        """
+        (backlog, history) for a turn whose state was just loaded by `begin_turn`:
+        incoming history messages to record before this one (oldest first, at most
+        HISTORY_BOOTSTRAP_MAX), and the (fingerprint, length) to store with the turn.
+        """
+        history = event.conversationHistory
+        covered = state.history_len
+        if covered and len(history) >= covered and fingerprint(history[:covered]) == state.history_fp:
+            new = history[covered:]
+            seed = state.history_fp
+            outcome = "in_sync"
+        else:
+            new = history
+            seed = ""
+            if covered:
+                outcome = "diverged"
+            elif state.message_count == 1:
+                outcome = "bootstrap" if history else "in_sync"
+            else:
+                outcome = "anchored"  # session predates reconciliation: nothing to compare with
+        backlog = []
+        if outcome in ("in_sync", "bootstrap"):
+            incoming = [i for i, (sender, _) in enumerate(sender_text(new)) if sender != OWN_SENDER]
+            if incoming and outcome == "in_sync":
+                outcome = "caught_up"
+            if Config.HISTORY_BOOTSTRAP_MAX > 0:
+                backlog = [new[i] for i in incoming[-Config.HISTORY_BOOTSTRAP_MAX:]]
+        self.stats[outcome] += 1
+        self.stats["messages_recorded"] += len(backlog)
+        HISTORY_RECONCILE.inc(outcome=outcome)
+        return backlog, (fingerprint([event.message], fingerprint(new, seed)), len(history) + 1)
+
+    def snapshot(self) -> dict:
+        return {"enabled": Config.HISTORY_RECONCILE, **self.stats}
@@ -0,0 +1,288 @@
+import os
+import time
+import random
+import asyncio
+import importlib.util
+from collections import deque
+import httpx
+from groq import AsyncGroq, RateLimitError
+from config import Config
+from metrics import LLM_SECONDS, LLM_CALLS, LLM_TOKENS, LLM_CALL_TOKENS, LLM_FIRST_TOKEN_SECONDS, span
+
+
+class FairLimiter:
+    """
+    FIFO semaphore: waiters are admitted strictly in arrival order, so a burst
+    from one caller cannot starve requests that queued earlier.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.available = limit
+        self.waiters = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self.waiters)
+
+    async def acquire(self):
+        if self.available > 0 and not self.waiters:
+            self.available -= 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just before cancellation, pass it on
+                self.release()
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+            raise
+
+    def release(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.available += 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+
+class LLMGateway:
+    """
+    Single entry point for all Groq calls made by the agents.
+
+    - one pooled (HTTP/2 when `h2` is installed) httpx client shared by every agent
+    - global and per-model concurrency limits with FIFO queueing (backpressure)
+    - 429 retries with jittered exponential backoff, honoring Retry-After
+    - queue depth / in-flight / latency stats, per-agent latency/token/error metrics
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient = None, base_url: str = None):
+        self.base_url = base_url
+        self.owns_client = http_client is None  # injected clients (stubs, tests) are left alone
+        self._pid = os.getpid()
+        self.http_client = None
+        self._client = None
+        if http_client is not None:
+            self._open(http_client)
+        # Otherwise the pooled client is built by connect(): at worker startup or on first use
+        self.global_limit = FairLimiter(Config.LLM_MAX_CONCURRENCY)
+        self.model_limits = {}
+        self.stats = {
+            "requests": 0,
+            "completed": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "in_flight": 0,
+        }
+        self.latencies_ms = deque(maxlen=1024)
+        self.tokens = {}  # agent -> calls, tokens in / out as reported by the API
+
+    @staticmethod
+    def _pooled_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=Config.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.LLM_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(Config.LLM_TIMEOUT, connect=5.0),
+        )
+
+    def _open(self, http_client: httpx.AsyncClient):
+        self.http_client = http_client
+        self._client = AsyncGroq(
+            api_key=Config.GROQ_API_KEY,
+            base_url=self.base_url or Config.GROQ_BASE_URL or None,
+            http_client=self.http_client,
+            max_retries=0,  # retries are handled here, outside the concurrency slots
+        )
+
+    @property
+    def client(self) -> AsyncGroq:
+        if self._client is None:
+            self.connect()
+        return self._client
+
+    def connect(self):
+        """
+        Builds the pooled client (worker startup, or the first call), or a fresh one
+        if the current one was closed or created before a fork.
+        """
+        if self.owns_client and (self.http_client is None or self.http_client.is_closed
+                                 or self._pid != os.getpid()):
+            self._pid = os.getpid()
+            self._open(self._pooled_client())
+
+    async def warm(self):
+        """
+        Opens a pooled connection (TCP + TLS, HTTP/2 when available) before the first
+        real call. Any HTTP status will do; only a transport error is a failure.
+        """
+        url = str(self.client.base_url).rstrip("/") + "/openai/v1/models"
+        response = await self.http_client.get(url, headers={"Authorization": f"Bearer {Config.GROQ_API_KEY}"})
+        await response.aclose()
+
+    def _model_limit(self, model: str) -> FairLimiter:
+        if model not in self.model_limits:
+            self.model_limits[model] = FairLimiter(Config.LLM_MAX_CONCURRENCY_PER_MODEL)
+        return self.model_limits[model]
+
+    def _backoff(self, attempt: int, error: RateLimitError) -> float:
+        retry_after = None
+        try:
+            retry_after = float(error.response.headers.get("retry-after"))
+        except (TypeError, ValueError, AttributeError):
+            pass
+        ceiling = min(Config.LLM_BACKOFF_MAX, Config.LLM_BACKOFF_BASE * (2 ** attempt))
+        delay = random.uniform(0, ceiling)  # full jitter
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, Config.LLM_BACKOFF_MAX))
+        return delay
+
+    async def chat(self, agent: str = "other", **kwargs):
+        """
+        Same arguments as `client.chat.completions.create`; `agent` labels the
+        call in metrics and traces (extraction, scorer, persona).
+        """
+        model = kwargs.get("model", Config.LLM_MODEL)
+        self.stats["requests"] += 1
+        with span("llm.chat", agent=agent, model=model), LLM_SECONDS.time(agent=agent):
+            completion = await self._chat_with_retries(agent, model, kwargs)
+        self._record_usage(agent, getattr(completion, "usage", None))
+        return completion
+
+    def _record_usage(self, agent: str, usage):
+        """Tokens in / out of one call (per-call histogram, totals per agent)."""
+        if usage is None:
+            return
+        tokens_in, tokens_out = usage.prompt_tokens or 0, usage.completion_tokens or 0
+        LLM_TOKENS.inc(tokens_in, agent=agent, direction="prompt")
+        LLM_TOKENS.inc(tokens_out, agent=agent, direction="completion")
+        LLM_CALL_TOKENS.observe(tokens_in, agent=agent, direction="prompt")
+        LLM_CALL_TOKENS.observe(tokens_out, agent=agent, direction="completion")
+        totals = self.tokens.setdefault(agent, {"calls": 0, "in": 0, "out": 0})
+        totals["calls"] += 1
+        totals["in"] += tokens_in
+        totals["out"] += tokens_out
+
+    async def chat_stream(self, agent: str = "other", **kwargs):
+        """
+        Streaming `chat`: yields content deltas as they arrive. The concurrency
+        slots are held until the stream ends; a 429 is retried only before
+        the first token (after that, the error propagates to the caller).
+        """
+        model = kwargs.get("model", Config.LLM_MODEL)
+        self.stats["requests"] += 1
+        start = time.perf_counter()
+        attempt = 0
+        with span("llm.chat_stream", agent=agent, model=model):
+            while True:
+                try:
+                    async with self._model_limit(model), self.global_limit:
+                        self.stats["in_flight"] += 1
+                        try:
+                            stream = await self.client.chat.completions.create(stream=True, **kwargs)
+                            first = True
+                            async for chunk in stream:
+                                delta = chunk.choices[0].delta.content if chunk.choices else None
+                                if delta:
+                                    if first:
+                                        LLM_FIRST_TOKEN_SECONDS.observe(time.perf_counter() - start, agent=agent)
+                                        first = False
+                                    yield delta
+                                self._record_usage(agent, getattr(getattr(chunk, "x_groq", None), "usage", None))
+                        finally:
+                            self.stats["in_flight"] -= 1
+                    elapsed = time.perf_counter() - start
+                    self.latencies_ms.append(elapsed * 1000)
+                    LLM_SECONDS.observe(elapsed, agent=agent)
+                    self.stats["completed"] += 1
+                    LLM_CALLS.inc(agent=agent, outcome="ok")
+                    return
+                except RateLimitError as e:
+                    self.stats["rate_limited"] += 1
+                    LLM_CALLS.inc(agent=agent, outcome="rate_limited")
+                    if attempt >= Config.LLM_MAX_RETRIES:
+                        self.stats["errors"] += 1
+                        LLM_CALLS.inc(agent=agent, outcome="error")
+                        raise
+                    await asyncio.sleep(self._backoff(attempt, e))
+                    attempt += 1
+                    self.stats["retries"] += 1
+                except Exception:
+                    self.stats["errors"] += 1
+                    LLM_CALLS.inc(agent=agent, outcome="error")
+                    raise
+
+    async def _chat_with_retries(self, agent: str, model: str, kwargs: dict):
+        attempt = 0
+        while True:
+            try:
+                async with self._model_limit(model), self.global_limit:
+                    self.stats["in_flight"] += 1
+                    start = time.perf_counter()
+                    try:
+                        completion = await self.client.chat.completions.create(**kwargs)
+                    finally:
+                        self.stats["in_flight"] -= 1
+                self.latencies_ms.append((time.perf_counter() - start) * 1000)
+                self.stats["completed"] += 1
+                LLM_CALLS.inc(agent=agent, outcome="ok")
+                return completion
+            except RateLimitError as e:
+                self.stats["rate_limited"] += 1
+                LLM_CALLS.inc(agent=agent, outcome="rate_limited")
+                if attempt >= Config.LLM_MAX_RETRIES:
+                    self.stats["errors"] += 1
+                    LLM_CALLS.inc(agent=agent, outcome="error")
+                    raise
+                # Back off without holding a concurrency slot
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+                self.stats["retries"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+                LLM_CALLS.inc(agent=agent, outcome="error")
+                raise
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self.latencies_ms)
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+
+        return {
+            **self.stats,
+            "queue_depth": self.global_limit.queued + sum(l.queued for l in self.model_limits.values()),
+            "latency_ms": {"p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99), "samples": len(latencies)},
+            "tokens": {agent: {**totals, "in_per_call": round(totals["in"] / totals["calls"], 1),
+                               "out_per_call": round(totals["out"] / totals["calls"], 1)}
+                       for agent, totals in self.tokens.items()},
+        }
+
+    async def aclose(self):
+        if self.http_client is not None:
+            await self.http_client.aclose()
+
+
+_gateway = None
+
+
+def get_gateway() -> LLMGateway:
+    """Process-wide gateway shared by ExtractionAgent, LLMScorer and PersonaAgent."""
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
@@ -1,11 +1,24 @@
 import json
-from groq import AsyncGroq
 from config import Config
 from models import LLMIntentScore
+from llm_gateway import LLMGateway, get_gateway
+from prompt_compiler import compact, compile_messages, encode_artifacts
+from structured_logging import get_logger
+from metrics import AGENT_FALLBACKS
+
+logger = get_logger("llm_scorer")
+
+SCORER_PROMPT = compact("""
+    You are an expert Scam Detection Analyst.
+    Your task is to analyze the conversation timeline and extracted artifacts to determine if the user is interacting with a scammer.
+    Calculate an 'intent_score' from 0.0 (Safe) to 1.0 (Definite Scam).
+    Provide a concise 'reasoning' for your score.
+    Output MUST be valid JSON: {"intent_score": float, "reasoning": "string"}
+    """)
 
 class LLMScorer:
-    def __init__(self):
-        self.client = AsyncGroq(api_key=Config.GROQ_API_KEY)
+    def __init__(self, gateway: LLMGateway = None):
+        self.gateway = gateway or get_gateway()
 
     async def score_intent(self, summary_timeline: list, artifacts: dict) -> LLMIntentScore:
         """
@@ -13,57 +26,32 @@ class LLMScorer:
         """
         if not summary_timeline:
             return LLMIntentScore(intent_score=0.0, reasoning="No history to analyze.")
-        
-        # Construct Prompt
-        # We pass the full timeline and identified artifacts
-        timeline_str = "\n".join(summary_timeline)
-        artifacts_str = json.dumps(artifacts, indent=2)
-        
-        system_prompt = """
-        You are an expert Scam Detection Analyst.
-        Your task is to analyze the conversation history and extracted artifacts to determine if the user is interacting with a scammer.
-        
-        Calculate an 'intent_score' from 0.0 (Safe) to 1.0 (Definite Scam).
-        Provide a concise 'reasoning' for your score.
-        
-        Output MUST be valid JSON:
-        {
-            "intent_score": float,
-            "reasoning": "string"
-        }
-        """
-        
-        user_prompt = f"""
-        Analyze this session:
-        
-        [ARTIFACTS]
-        {artifacts_str}
-        
-        [TIMELINE]
-        {timeline_str}
-        
-        Generate JSON risk assessment.
-        """
-        
+
+        # We pass the identified artifacts (compact, empty categories dropped) and the
+        # rolling timeline (digest + recent deltas), oldest lines dropped first over budget
+        messages = compile_messages("scorer", SCORER_PROMPT, [
+            ("Artifacts", encode_artifacts(artifacts), "clip"),
+            ("Timeline", list(summary_timeline), "lines"),
+        ])
+
         try:
-            completion = await self.client.chat.completions.create(
+            completion = await self.gateway.chat(
+                agent="scorer",
                 model=Config.LLM_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
                 temperature=0.0,
                 response_format={"type": "json_object"}
             )
-            
+
             response_content = completion.choices[0].message.content
             data = json.loads(response_content)
-            
+
             return LLMIntentScore(
                 intent_score=float(data.get("intent_score", 0.0)),
                 reasoning=data.get("reasoning", "Analysis failed.")
             )
-            
+
         except Exception as e:
-            print(f"LLM Error: {e}")
+            logger.warning("intent scoring LLM error", extra={"fields": {"error": str(e)}})
+            AGENT_FALLBACKS.inc(agent="scorer")
             return LLMIntentScore(intent_score=0.5, reasoning=f"Error calling LLM: {str(e)}")
@@ -0,0 +1,264 @@
+"""
+Deterministic stand-in for the Groq chat completions API.
+
+Serves POST /openai/v1/chat/completions (also with "stream": true, as
+server-sent chunks) with configurable latency and injected 429s, answering each agent's prompt with a plausible, repeatable
+response. Run it in-process through `httpx.ASGITransport` (tests, benchmarks)
+or as a local server:
+
+    python llm_stub.py --port 8100 --latency-ms 300
+    GROQ_BASE_URL=http://127.0.0.1:8100 uvicorn main:app
+"""
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from models import ScamEventInput
+from rule_extractor import RuleExtractor, timeline_has_flags
+from llm_gateway import LLMGateway
+
+EXTRACTION_MARKER = "scam indicators"
+SCORER_MARKER = "Scam Detection Analyst"
+PERSONA_MARKER = "Persona Agent"
+
+
+class LLMStub:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, rate_limit_every: int = 0,
+                 seed: int = 7, kind_latency_ms: dict = None, token_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.kind_latency_ms = kind_latency_ms or {}  # per-agent override, e.g. {"persona": 1200}
+        self.jitter_ms = jitter_ms
+        self.token_ms = token_ms  # generation time per output token (word), after the first-token latency
+        self.rate_limit_every = rate_limit_every
+        self.random = random.Random(seed)
+        self.rules = RuleExtractor()
+        self.requests = 0
+        self.calls = {"extraction": 0, "scorer": 0, "persona": 0, "other": 0}
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompt_bytes = 0
+
+    def reset(self):
+        self.requests = 0
+        self.calls = {k: 0 for k in self.calls}
+        self.rate_limited = 0
+        self.max_in_flight = 0
+        self.prompt_bytes = 0
+
+    def classify(self, messages: list) -> str:
+        system = messages[0]["content"] if messages else ""
+        if EXTRACTION_MARKER in system:
+            return "extraction"
+        if SCORER_MARKER in system:
+            return "scorer"
+        if PERSONA_MARKER in system:
+            return "persona"
+        return "other"
+
+    def extract(self, text: str) -> dict:
+        event = ScamEventInput(sessionId="stub", message={"sender": "scammer", "text": text})
+        signals = self.rules.extract_signals(event)
+        return {
+            "urgency_detected": signals.urgency_detected,
+            "sensitive_info_request": signals.sensitive_info_request,
+            "intelligence": signals.intelligence.model_dump(),
+            "sentiment": "negative" if signals.urgency_detected else "neutral",
+            "conversation_phase": signals.conversation_phase,
+            "tone": "Aggressive" if signals.urgency_detected else "Friendly",
+            "shouldEndConversation": bool(re.search(r"\b(bye|blocking you)\b", text, re.IGNORECASE)),
+            "agentNotes": "stub extraction",
+        }
+
+    def answer(self, kind: str, messages: list) -> str:
+        user = messages[-1]["content"] if messages else ""
+        if kind == "extraction":
+            if user.startswith("Analyze these messages: "):
+                texts = json.loads(user.split(": ", 1)[1])
+                return json.dumps({"results": [self.extract(text) for text in texts]})
+            return json.dumps(self.extract(user.split("Analyze this text: ", 1)[-1]))
+        if kind == "scorer":
+            flagged = timeline_has_flags(user.splitlines()) or "@" in user
+            return json.dumps({
+                "intent_score": 0.9 if flagged else 0.1,
+                "reasoning": "stub: suspicious indicators in timeline" if flagged else "stub: benign",
+            })
+        if kind == "persona":
+            return "Wait, why do you need that? Is this really from the bank?"
+        return "{}"
+
+    async def complete(self, body: dict):
+        self.requests += 1
+        messages = body.get("messages", [])
+        self.prompt_bytes += sum(len(str(m.get("content", "")).encode()) for m in messages)
+        if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+            self.rate_limited += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": "0"},
+                content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+            )
+
+        kind = self.classify(messages)
+        self.calls[kind] += 1
+        content = self.answer(kind, messages)
+        tokens = re.findall(r"\S+\s*", content)
+        delay = self.kind_latency_ms.get(kind, self.latency_ms) + (self.random.uniform(0, self.jitter_ms) if self.jitter_ms else 0.0)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        completion_tokens = len(content) // 4
+        if body.get("stream"):
+            return StreamingResponse(self.stream(body, tokens, delay, prompt_tokens, completion_tokens),
+                                     media_type="text/event-stream")
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            delay += self.token_ms * len(tokens)
+            if delay:
+                await asyncio.sleep(delay / 1000)
+        finally:
+            self.in_flight -= 1
+        return JSONResponse({
+            "id": f"chatcmpl-stub-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+
+    async def stream(self, body: dict, tokens: list, delay: float, prompt_tokens: int, completion_tokens: int):
+        """Chat completion chunks as server-sent events, one per word."""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if delay:
+                await asyncio.sleep(delay / 1000)
+            chunk = {"id": f"chatcmpl-stub-{self.requests}", "object": "chat.completion.chunk",
+                     "created": int(time.time()), "model": body.get("model", "stub")}
+            for i, token in enumerate(tokens):
+                if i and self.token_ms:
+                    await asyncio.sleep(self.token_ms / 1000)
+                choice = {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                yield f"data: {json.dumps({**chunk, 'choices': [choice]})}\n\n"
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+            final = {"index": 0, "delta": {}, "finish_reason": "stop"}
+            yield f"data: {json.dumps({**chunk, 'choices': [final], 'x_groq': {'usage': usage}})}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            self.in_flight -= 1
+
+
+def create_stub_app(stub: LLMStub) -> FastAPI:
+    stub_app = FastAPI(title="Groq Stub")
+
+    @stub_app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await stub.complete(await request.json())
+
+    return stub_app
+
+
+class StreamingASGITransport(httpx.AsyncBaseTransport):
+    """
+    In-process ASGI transport that hands response body chunks over as the
+    app sends them (httpx.ASGITransport buffers the whole body), so
+    streamed responses keep their timing in tests and benchmarks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": request.method, "scheme": request.url.scheme,
+            "path": request.url.path, "raw_path": request.url.raw_path.split(b"?")[0],
+            "query_string": request.url.query, "root_path": "",
+            "headers": [(k.lower(), v) for k, v in request.headers.raw],
+            "server": (request.url.host, request.url.port or 80), "client": ("127.0.0.1", 123),
+        }
+        chunks = asyncio.Queue()
+        started = asyncio.get_running_loop().create_future()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Event().wait()  # no disconnect until the app is cancelled
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                started.set_result(message)
+            elif message["type"] == "http.response.body":
+                if message.get("body"):
+                    await chunks.put(message["body"])
+                if not message.get("more_body", False):
+                    await chunks.put(None)
+
+        async def run():
+            try:
+                await self.app(scope, receive, send)
+            except Exception as e:
+                if not started.done():
+                    started.set_exception(e)
+            finally:
+                await chunks.put(None)
+
+        task = asyncio.create_task(run())
+        start = await started
+
+        class Body(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                while (chunk := await chunks.get()) is not None:
+                    yield chunk
+
+            async def aclose(self):
+                if not task.done():
+                    task.cancel()
+
+        return httpx.Response(start["status"], headers=start.get("headers", []), stream=Body())
+
+
+def stub_gateway(stub: LLMStub) -> LLMGateway:
+    """LLMGateway whose Groq client talks to the stub in-process (no sockets)."""
+    http_client = httpx.AsyncClient(
+        transport=StreamingASGITransport(create_stub_app(stub)),
+        base_url="http://llm-stub",
+    )
+    return LLMGateway(http_client=http_client, base_url="http://llm-stub")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local Groq chat completions stub")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_stub_app(LLMStub(args.latency_ms, args.jitter_ms, args.rate_limit_every)),
+        host="127.0.0.1",
+        port=args.port,
+    )
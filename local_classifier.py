@@ -0,0 +1,185 @@
+"""
+Local intent classifier: hashed word n-grams + logistic regression, CPU-only
+and dependency-free. It scores a session timeline in microseconds and is the
+first-pass intent score; LLMScorer is only called when the probability falls
+between LOCAL_CLASSIFIER_SAFE_MAX and LOCAL_CLASSIFIER_SCAM_MIN.
+
+Models are versioned JSON files (training time + weight digest) written by
+train_classifier.py from labeled sessions exported out of Redis.
+"""
+import re
+import json
+import math
+import time
+import zlib
+import random
+import hashlib
+from typing import Optional
+from config import Config
+from models import LLMIntentScore
+from structured_logging import get_logger
+from metrics import REGISTRY, Counter
+
+logger = get_logger("local_classifier")
+
+LOCAL_CLASSIFIER = REGISTRY.register(Counter(
+    "scam_agent_local_classifier_total",
+    "Local intent classifier decisions (confident verdicts skip the LLM scorer)", ("outcome",)))
+
+MODEL_FORMAT = 1
+# Words, tags (URGENCY, SENSITIVE_ASK) and artifacts; timestamps and amounts carry no intent
+TOKEN_RE = re.compile(r"[a-z][a-z0-9_@.]*")
+
+
+class HashedNgramModel:
+    """Logistic regression over hashed (crc32) word n-grams, L2-normalized counts."""
+
+    def __init__(self, n_features: int = 2 ** 18, ngram: int = 2, weights: dict = None,
+                 bias: float = 0.0, meta: dict = None):
+        self.n_features = n_features
+        self.ngram = ngram
+        self.weights = weights or {}
+        self.bias = bias
+        self.meta = meta or {}
+
+    @property
+    def version(self) -> str:
+        return self.meta.get("version", "untrained")
+
+    def featurize(self, timeline: list) -> dict:
+        counts = {}
+        for line in timeline:
+            tokens = TOKEN_RE.findall(line.lower())
+            for n in range(1, self.ngram + 1):
+                for i in range(len(tokens) - n + 1):
+                    index = zlib.crc32(" ".join(tokens[i:i + n]).encode()) % self.n_features
+                    counts[index] = counts.get(index, 0.0) + 1.0
+        norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+        return {index: v / norm for index, v in counts.items()}
+
+    def _probability(self, features: dict, weights: dict = None) -> float:
+        weights = self.weights if weights is None else weights
+        z = self.bias + sum(weights.get(index, 0.0) * v for index, v in features.items())
+        return 1.0 / (1.0 + math.exp(-max(min(z, 30.0), -30.0)))
+
+    def predict(self, timeline: list) -> float:
+        """Scam probability for a timeline (list of summary lines)."""
+        return self._probability(self.featurize(timeline))
+
+    def predict_batch(self, timelines: list) -> list:
+        return [self._probability(self.featurize(timeline)) for timeline in timelines]
+
+    @classmethod
+    def train(cls, examples: list, epochs: int = 15, learning_rate: float = 1.0, l2: float = 1e-5,
+              seed: int = 0, **params) -> "HashedNgramModel":
+        """SGD on [(timeline, label)] with label 1 = scam, 0 = safe."""
+        model = cls(**params)
+        data = [(model.featurize(timeline), float(label)) for timeline, label in examples]
+        rng = random.Random(seed)
+        weights = {}
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+            for features, label in data:
+                error = model._probability(features, weights) - label
+                model.bias -= rate * error
+                for index, v in features.items():
+                    w = weights.get(index, 0.0)
+                    weights[index] = w - rate * (error * v + l2 * w)
+        model.weights = {index: round(w, 6) for index, w in weights.items() if abs(w) >= 1e-6}
+        model.bias = round(model.bias, 6)
+        positives = sum(1 for _, label in examples if label)
+        model.meta = {
+            "trained_at": int(time.time()),
+            "examples": len(examples),
+            "positives": positives,
+            "epochs": epochs,
+        }
+        model.meta["version"] = model._make_version()
+        return model
+
+    def _make_version(self) -> str:
+        digest = hashlib.sha256(json.dumps(
+            [self.n_features, self.ngram, self.bias, sorted(self.weights.items())]).encode()).hexdigest()
+        stamp = time.strftime("%Y%m%d%H%M%S", time.gmtime(self.meta.get("trained_at", 0)))
+        return f"{stamp}-{digest[:8]}"
+
+    def to_dict(self) -> dict:
+        return {
+            "format": MODEL_FORMAT,
+            "kind": "hashed_ngram_logreg",
+            "n_features": self.n_features,
+            "ngram": self.ngram,
+            "bias": self.bias,
+            "meta": self.meta,
+            "weights": {str(index): w for index, w in sorted(self.weights.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HashedNgramModel":
+        if data.get("format") != MODEL_FORMAT or data.get("kind") != "hashed_ngram_logreg":
+            raise ValueError(f"Unsupported model format {data.get('kind')!r} v{data.get('format')}")
+        return cls(n_features=int(data["n_features"]), ngram=int(data["ngram"]),
+                   weights={int(index): float(w) for index, w in data["weights"].items()},
+                   bias=float(data["bias"]), meta=data.get("meta", {}))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramModel":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+class LocalIntentClassifier:
+    """
+    Pipeline tier in front of LLMScorer. `score_intent` returns an LLMIntentScore
+    when the model is confident and None when the LLM should decide.
+    """
+
+    def __init__(self, path: str = None, model: HashedNgramModel = None, lazy: bool = False):
+        self.model = model
+        self.path = path if model is None else None  # still to be loaded
+        self.stats = {"confident_scam": 0, "confident_safe": 0, "uncertain": 0}
+        if self.path and not lazy:
+            self.ensure_loaded()
+
+    def ensure_loaded(self):
+        """Loads the model given at construction, once (startup warm-up or first use)."""
+        if self.path:
+            path, self.path = self.path, None
+            self.load(path)
+
+    def load(self, path: str) -> bool:
+        try:
+            self.model = HashedNgramModel.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            # No usable model: every turn goes to the LLM scorer, as without this tier
+            logger.warning("local classifier not loaded", extra={"fields": {"path": path, "error": str(e)}})
+            self.model = None
+            return False
+        logger.info("local classifier loaded", extra={"fields": {"path": path, "version": self.model.version}})
+        return True
+
+    def score_intent(self, summary_timeline: list) -> Optional[LLMIntentScore]:
+        self.ensure_loaded()
+        if self.model is None or not summary_timeline:
+            return None
+        probability = self.model.predict(summary_timeline)
+        if probability >= Config.LOCAL_CLASSIFIER_SCAM_MIN:
+            outcome = "confident_scam"
+        elif probability <= Config.LOCAL_CLASSIFIER_SAFE_MAX:
+            outcome = "confident_safe"
+        else:
+            outcome = "uncertain"
+        self.stats[outcome] += 1
+        LOCAL_CLASSIFIER.inc(outcome=outcome)
+        if outcome == "uncertain":
+            return None
+        return LLMIntentScore(intent_score=probability,
+                              reasoning=f"Local classifier {self.model.version}: p={probability:.3f}")
+
+    def snapshot(self) -> dict:
+        return {"enabled": True, "version": self.model.version if self.model else None, **self.stats}
@@ -1,19 +1,92 @@
-from fastapi import FastAPI, HTTPException, Security, Header,Request
+import time
+IMPORT_STARTED = time.perf_counter()  # startup phase timings (warmup.py)
+
+from fastapi import FastAPI, APIRouter, HTTPException, Security, Header,Request
 from fastapi.security import APIKeyHeader
-from models import ScamEventInput, AgentAPIResponse
+from models import ScamEventInput, AgentAPIResponse, ExtractedSignals, ScamDetectionResult, SessionState
 from config import Config
-from extraction_agent import ExtractionAgent
+from extraction_agent import ExtractionAgent, EXTRACTION_PROMPT
+from extraction_cache import ExtractionCache
 from risk_engine import RiskEngine
+from risk_fusion import get_fusion_scorer
 from memory_store import MemoryStore
 from llm_scorer import LLMScorer
+from local_classifier import LocalIntentClassifier
 from persona_agent import PersonaAgent
-import httpx
+from rule_extractor import RuleExtractor, timeline_has_flags
+from context_window import build_context
+from llm_gateway import get_gateway
+from campaign_index import CampaignIndex
+from reputation_index import ReputationIndex
+from persona_worker import PersonaWorkerPool
+from callback_outbox import CallbackOutbox, final_result_payload
+from session_archive import SessionArchiver
+from session_serializer import SessionSerializer
+from history_sync import HistoryReconciler
+from warmup import Warmup
+from reply_bank import pick_reply
+from batch_detect import parse_batch, run_batch
+from fast_json import parse_event, encode_response, request_body_schema
+from structured_logging import setup_logging, get_logger, sample_request, StageTimer
+from metrics import REGISTRY, DETECTIONS, SESSION_SCAM_CHECKS, LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, span
 import os
+import json
 import asyncio
-from fastapi.responses import JSONResponse
+import logging
+from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse, Response
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-app = FastAPI(title="Scam Detection Agent")
+setup_logging()
+logger = get_logger("api")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Per-worker startup and shutdown. The components below are module objects, but
+    every worker process (serve.py) opens its own Redis and LLM connection pools,
+    warms them (warmup.py) and runs its own background tasks here, on its own loop.
+    """
+    warmup.record("import", IMPORT_SECONDS)
+    with warmup.phase("startup"):
+        with warmup.phase("connect"):
+            memory_store.connect()
+            gateways = llm_gateways()
+            for gateway in gateways:
+                gateway.connect()
+        if Config.WARMUP_ENABLED:
+            checks = {"redis": lambda: memory_store.redis.ping()}
+            for i, gateway in enumerate(gateways):
+                checks["llm" if len(gateways) == 1 else f"llm.{i}"] = gateway.warm
+            if local_classifier is not None:
+                checks["local_classifier"] = lambda: asyncio.to_thread(local_classifier.ensure_loaded)
+            await warmup.run(checks)
+        else:
+            warmup.ready = True
+        with warmup.phase("background"):
+            if Config.PERSONA_MODE != "inline":
+                persona_workers.ensure_started()
+            if Config.CALLBACK_DELIVERY_ENABLED:
+                callback_outbox.ensure_started()
+            if Config.SESSION_ARCHIVE_ENABLED:
+                session_archiver.ensure_started()
+    logger.info("worker started", extra={"fields": {"worker": Config.WORKER_ID, "pid": os.getpid(),
+                                                    **warmup.snapshot()}})
+    try:
+        yield
+    finally:
+        warmup.reset()
+        await persona_workers.stop()
+        await callback_outbox.stop()
+        await session_archiver.stop()
+        for gateway in llm_gateways():
+            if gateway.owns_client:
+                await gateway.aclose()
+        await memory_store.close()
+
+router = APIRouter()
 
 # Security Scheme
 API_KEY_NAME = "x-api-key"
@@ -24,7 +97,6 @@ api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
 # Add this block to your main FastAPI application file (main.py or app.py)
 
-@app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
     """
     Ensures all standard HTTP errors (403, 404, 500) return a JSON body 
@@ -38,16 +110,13 @@ async def http_exception_handler(request, exc):
         },
     )
 
-@app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """
     Catches all UNHANDLED exceptions (Python crashes) and returns a 500 
     JSON error. This is the single most important fix for "Expecting value".
     """
-    # Log the full traceback to your console for debugging
-    import traceback
-    print("FATAL UNHANDLED EXCEPTION:")
-    traceback.print_exc()
+    # Log the full traceback for debugging
+    logger.error("unhandled exception", exc_info=exc, extra={"fields": {"path": request.url.path}})
 
     return JSONResponse(
         status_code=500,
@@ -62,7 +131,7 @@ async def get_api_key(api_key: str = Security(api_key_header)):
     EXPECTED_KEY = os.getenv("SERVICE_API_KEY")
     if not EXPECTED_KEY:
         # Fallback or Error. For now, let's warn.
-        print("WARNING: SERVICE_API_KEY not set in .env")
+        logger.warning("SERVICE_API_KEY not set in .env")
         raise HTTPException(status_code=500, detail="Server Configuration Error")
         
     if api_key != EXPECTED_KEY:
@@ -74,45 +143,320 @@ async def get_api_key(api_key: str = Security(api_key_header)):
 
 # Initialize Components
 memory_store = MemoryStore()
-extraction_agent = ExtractionAgent()
+extraction_agent = ExtractionAgent(
+    cache=ExtractionCache(memory_store, EXTRACTION_PROMPT) if Config.EXTRACTION_CACHE_ENABLED else None
+)
 risk_engine = RiskEngine()
+fusion_scorer = get_fusion_scorer()
 llm_scorer = LLMScorer()
+local_classifier = LocalIntentClassifier(Config.LOCAL_CLASSIFIER_PATH, lazy=True) if Config.LOCAL_CLASSIFIER_ENABLED else None
 persona_agent = PersonaAgent()
+rule_extractor = RuleExtractor()
+campaign_index = CampaignIndex(memory_store)
+reputation_index = ReputationIndex(memory_store)
+persona_workers = PersonaWorkerPool(persona_agent, memory_store)
+callback_outbox = CallbackOutbox(memory_store)
+session_archiver = SessionArchiver(memory_store)
+session_serializer = SessionSerializer(memory_store, lambda items: process_burst(items))
+history_reconciler = HistoryReconciler()
+warmup = Warmup()
+speculation_stats = {"speculative": 0, "rescored": 0}
+fusion_stats = {"early_exit_scam": 0, "early_exit_safe": 0}
 
-@app.post("/detect", response_model=AgentAPIResponse)
-async def detect_scam(event: ScamEventInput,  request: Request, api_key: str = Security(get_api_key)):
-    # logging block
-    print("\n" + "="*70)
-    print(f"DEBUG: RECEIVED NEW REQUEST at {request.url}")
+def llm_gateways() -> list:
+    """Distinct gateways the agents call through (one shared pool unless replaced, e.g. by stubs)."""
+    return list({id(agent.gateway): agent.gateway for agent in (extraction_agent, llm_scorer, persona_agent)}.values())
 
-    # 1. Log all Headers (Crucial for Content-Type and x-api-key check)
-    print("DEBUG: RECEIVED HEADERS:")
-    for key, value in request.headers.items():
-        print(f"  {key}: {value}")
-    
-    # 2. Log Raw Body (The absolute best way to catch non-JSON data)
-    # WARNING: To get the raw body, you must call .body() BEFORE the Pydantic 
-    # model (ScamEventInput) attempts to access it. Fortunately, FastAPI will
-    # handle the body access even with the Pydantic dependency.
+def parse_detect_body(body: bytes) -> ScamEventInput:
+    """ScamEventInput from a raw /detect body; invalid input is a 422 as with a typed parameter."""
     try:
-        raw_body = await request.body()
-        # Decode body to see it as a string, including any leading/trailing garbage
-        print("DEBUG: RAW REQUEST BODY:")
-        print(raw_body.decode('utf-8'))
-    except Exception as e:
-        print(f"DEBUG: Could not read raw body: {e}")
-    
-    print("="*70 + "\n")
-    
-    # Step 0: Increment Message Count
-    total_msgs = await memory_store.increment_message_count(event.sessionId)
+        if Config.FAST_INGEST:
+            return parse_event(body)
+        return ScamEventInput.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])}
+                                      for error in e.errors(include_url=False)], body=body)
+    except ValueError as e:
+        raise RequestValidationError([{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}],
+                                     body=body)
+
+DETECT_REQUEST_BODY = request_body_schema(ScamEventInput)
+
+@router.post("/detect", response_model=AgentAPIResponse, response_model_exclude_unset=True,
+          openapi_extra=DETECT_REQUEST_BODY)
+async def detect_scam(request: Request, api_key: str = Security(get_api_key)):
+    # Body read once as bytes and parsed here (see fast_json.py), not by a typed parameter
+    body = await request.body()
+    event = parse_detect_body(body)
+    # Verbose request dump (headers + raw body), off by default; x-api-key is redacted
+    if Config.LOG_VERBOSE and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("request received", extra={"fields": {
+            "url": str(request.url),
+            "headers": dict(request.headers),
+            "body": body.decode("utf-8", errors="replace"),
+        }})
+
+    with span("detect", sessionId=event.sessionId):
+        result = await serialized_process_event(event)
+    reply_ticket = {}
+    if result.replyPending is not None:
+        reply_ticket = {"replyTurn": result.totalMessagesExchanged, "replyPending": result.replyPending}
+    if Config.FAST_INGEST:
+        return Response(content=encode_response("success", result.reply or None, **reply_ticket),
+                        media_type="application/json")
+    return AgentAPIResponse(
+        status="success",
+        reply=result.reply or None,
+        **reply_ticket
+    )
+
+@router.post("/detect/stream", openapi_extra=DETECT_REQUEST_BODY)
+async def detect_scam_stream(request: Request, api_key: str = Security(get_api_key)):
+    """
+    Same pipeline as /detect, answered as Server-Sent Events: one `token` event per
+    persona reply token as it arrives from the LLM, then a `verdict` event with the
+    full reply. The turn (timeline, stored reply, callback) completes even if the
+    client disconnects mid-stream.
+    """
+    event = parse_detect_body(await request.body())
+    tokens = asyncio.Queue()
+    with span("detect", sessionId=event.sessionId):
+        task = asyncio.create_task(serialized_process_event(event, reply_sink=tokens))
+    task.add_done_callback(lambda _: tokens.put_nowait(None))
+
+    async def stream():
+        while (token := await tokens.get()) is not None:
+            yield sse_event("token", {"text": token})
+        try:
+            result = await task
+        except Exception as e:
+            logger.error("stream detect failed", exc_info=e, extra={"fields": {"sessionId": event.sessionId}})
+            yield sse_event("error", {"status": "error", "message": "Internal Server Error"})
+            return
+        verdict = {"status": "success", "scamDetected": result.scamDetected, "reply": result.reply or None,
+                   "totalMessagesExchanged": result.totalMessagesExchanged}
+        if result.replyPending is not None:
+            verdict.update(replyTurn=result.totalMessagesExchanged, replyPending=result.replyPending)
+        yield sse_event("verdict", verdict)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def sse_event(name: str, data: dict) -> str:
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+async def serialized_process_event(event: ScamEventInput, signals: ExtractedSignals = None,
+                                   respond: bool = True, reply_sink: asyncio.Queue = None) -> ScamDetectionResult:
+    """`process_event` in per-session arrival order (see session_serializer.py)."""
+    return await session_serializer.submit(event.sessionId, (event, signals, respond, reply_sink))
+
+async def process_burst(items: list) -> list:
+    """
+    Runs a session's queued (event, signals, respond, reply_sink) items. A coalesced burst
+    is evaluated once: extraction for the whole burst is packed into one LLM
+    call, earlier messages are only recorded (count, timeline, artifacts), and
+    the latest message goes through the full pipeline with them in context.
+    Earlier messages share its verdict and get no reply of their own (nothing
+    is streamed to their reply sinks).
+    """
+    if len(items) == 1:
+        return [await process_event(*items[0])]
+
+    to_extract = [event.message.text for event, signals, *_ in items if signals is None]
+    extracted = iter(await extraction_agent.extract_signals_batch(to_extract)) if to_extract else iter(())
+    burst_signals = [signals if signals is not None else next(extracted) for _, signals, *_ in items]
 
-    # Step 1: Extract Signals & Compute Summary Delta
-    signals = await extraction_agent.extract_signals(event)
+    counts = []
+    for (event, *_), signals in zip(items[:-1], burst_signals[:-1]):
+        counts.append(await record_turn(event, signals))
+    event, _, respond, reply_sink = items[-1]
+    last = await process_event(event, signals=burst_signals[-1], respond=respond, reply_sink=reply_sink)
+    earlier = [
+        last.model_copy(update={"reply": "", "replyPending": None, "extractedIntelligence": signals.intelligence,
+                                "totalMessagesExchanged": count})
+        for signals, count in zip(burst_signals, counts)
+    ]
+    return earlier + [last]
+
+async def record_turn(event: ScamEventInput, signals: ExtractedSignals) -> int:
+    """Stores a message without evaluating it (earlier messages of a coalesced burst)."""
+    state = await memory_store.begin_turn(event.sessionId)
+    # The history fingerprint advances past this message too: the burst's later
+    # messages carry it in their conversationHistory, it is not backlog for them
+    history_sync = None
+    if Config.HISTORY_RECONCILE:
+        backlog, history_sync = history_reconciler.plan(event, state)
+        if backlog:
+            state = await catch_up_history(event.sessionId, backlog, state)
+    new_artifacts = turn_artifacts(signals)
+
+    def queue_reputation(pipe):
+        if Config.REPUTATION_ENABLED:
+            reputation_index.queue_updates(pipe, event.sessionId, state.artifacts,
+                                           MemoryStore.merge_artifacts(state.artifacts, new_artifacts),
+                                           was_scam=state.is_scam, is_scam=state.is_scam)
+
+    await memory_store.commit_turn(event.sessionId, new_artifacts,
+                                   extraction_agent.compute_summary_delta(event, signals),
+                                   state=state, pipeline_hook=queue_reputation, history=history_sync)
+    return state.message_count
+
+async def catch_up_history(session_id: str, messages: list, state: SessionState) -> SessionState:
+    """
+    Records history messages the session never processed, like the earlier messages
+    of a coalesced burst: one packed extraction pass and one Redis round trip.
+    """
+    extracted = await extraction_agent.extract_signals_batch([message.text for message in messages])
+    turns = []
+    known_artifacts = state.artifacts
+    for message, signals in zip(messages, extracted):
+        new_artifacts = turn_artifacts(signals)
+        known_artifacts = MemoryStore.merge_artifacts(known_artifacts, new_artifacts)
+        turn_event = ScamEventInput(sessionId=session_id, message=message)
+        turns.append((new_artifacts, extraction_agent.compute_summary_delta(turn_event, signals)))
+
+    def queue_reputation(pipe):
+        if Config.REPUTATION_ENABLED:
+            reputation_index.queue_updates(pipe, session_id, state.artifacts, known_artifacts,
+                                           was_scam=state.is_scam, is_scam=state.is_scam)
+
+    return await memory_store.append_turns(session_id, turns, state, pipeline_hook=queue_reputation)
+
+def turn_artifacts(signals: ExtractedSignals) -> dict:
+    # Store all ExtractedIntelligence fields
+    new_artifacts = signals.intelligence.model_dump(exclude_none=True)
+    # Also map legacy keys if needed for internal scoring (though we can switch scoring to use new keys too)
+    if signals.suspicious_links: new_artifacts["suspicious_links"] = signals.suspicious_links
+    if signals.suspicious_upi: new_artifacts["upi_ids"] = signals.suspicious_upi
+    if signals.suspicious_phones: new_artifacts["phone_numbers"] = signals.suspicious_phones
+    return new_artifacts
+
+async def process_event(event: ScamEventInput, signals: ExtractedSignals = None,
+                        respond: bool = True, reply_sink: asyncio.Queue = None) -> ScamDetectionResult:
+    """
+    Runs the detection pipeline for one message (shared by /detect and /detect/batch).
+    `signals` are pre-extracted signals (batch mode packs extraction into fewer LLM
+    calls); `respond=False` skips the persona reply and the final callback (backfills).
+    With a `reply_sink` queue the persona reply is streamed inline, token by token,
+    whatever PERSONA_MODE says (/detect/stream).
+    """
+    speculative_tasks = []
+    try:
+        return await run_pipeline(event, signals, respond, reply_sink, speculative_tasks)
+    finally:
+        # Not awaited when a step after it raised: don't leave the scoring call running
+        for task in speculative_tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def run_pipeline(event: ScamEventInput, signals: ExtractedSignals, respond: bool,
+                       reply_sink: asyncio.Queue, speculative_tasks: list) -> ScamDetectionResult:
+    """process_event's body; speculative intent scoring tasks it starts go to `speculative_tasks`."""
+    timer = StageTimer()
+    if Config.CALLBACK_DELIVERY_ENABLED:
+        # Drains callbacks left in the outbox by a previous process, too
+        callback_outbox.ensure_started()
+    if Config.SESSION_ARCHIVE_ENABLED:
+        session_archiver.ensure_started()
+
+    # Regex/keyword extraction (no LLM), feeds the fast path, reputation and campaign lookups
+    rule_signals = None
+    if Config.FAST_PATH_MODE != "off" or Config.CAMPAIGN_INDEX_ENABLED or Config.REPUTATION_ENABLED:
+        with timer.stage("rules"):
+            rule_signals = rule_extractor.extract_signals(event)
+
+    # Step 0: Increment Message Count & Load Session State (1 round trip), concurrently
+    # with the batched reputation lookup of this message's artifacts (1 round trip)
+    reputation = {}
+    with timer.stage("state_load"):
+        if rule_signals is not None and Config.REPUTATION_ENABLED:
+            state, reputation = await asyncio.gather(
+                memory_store.begin_turn(event.sessionId),
+                reputation_index.lookup(rule_signals.intelligence.model_dump()),
+            )
+        else:
+            state = await memory_store.begin_turn(event.sessionId)
+
+    # Step 0b: Reconcile conversationHistory: record incoming messages this session never
+    # processed (cold bootstrap, missed turns) in one batched pass, ahead of this turn
+    history_sync = None
+    if Config.HISTORY_RECONCILE:
+        backlog, history_sync = history_reconciler.plan(event, state)
+        if backlog:
+            with timer.stage("history_catch_up"):
+                state = await catch_up_history(event.sessionId, backlog, state)
+    total_msgs = state.message_count
+    SESSION_SCAM_CHECKS.inc(result="already_scam" if state.is_scam else "not_scam")
+    known_bad = reputation_index.known_bad(reputation) if reputation and not state.is_scam else []
+
+    # Step 1: Rule-based Pre-classification
+    band = "ambiguous"
+    rule_assessment = None
+    if rule_signals is not None and not state.is_scam:
+        rule_assessment = risk_engine.compute_risk(rule_signals, known_bad)
+    if Config.FAST_PATH_MODE != "off" and rule_assessment is not None:
+        band = risk_engine.classify_band(rule_assessment, rule_signals, timeline_has_flags(build_context(state)))
+        rule_extractor.record(band)
+
+    # A shortcut verdict skips ExtractionAgent and LLMScorer entirely
+    shortcut_reason = None
+    if rule_assessment is not None and rule_assessment.known_bad_artifacts:
+        shortcut_reason = "Known-bad artifacts from earlier scam sessions"
+        shortcut_path = "known_bad"
+        shortcut_signals = rule_signals
+        shortcut_scam = True
+        shortcut_risk = None  # rule risk (1.0)
+    elif Config.FAST_PATH_MODE == "on" and band == "scam":
+        shortcut_reason = f"Rule-based fast path ({band})"
+        shortcut_path = "fast_path"
+        shortcut_signals = rule_signals
+        shortcut_scam = band == "scam"
+        shortcut_risk = None  # rule risk
+
+    # Step 1b: Near-duplicate Campaign Lookup (MinHash/LSH over confirmed scams, no LLM)
+    campaign_signature = None
+    if shortcut_reason is None and not state.is_scam and Config.CAMPAIGN_INDEX_ENABLED:
+        with timer.stage("campaign_lookup"):
+            campaign_signature = campaign_index.signature(event.message.text)
+            campaign_match = await campaign_index.lookup(event.message.text, campaign_signature)
+        if campaign_match:
+            similarity, template = campaign_match
+            # Inherit the campaign's verdict and template; artifacts and the end flag come from
+            # this message (entries indexed before templates were cleared may still carry one)
+            shortcut_signals = template.model_copy(update={
+                "suspicious_links": rule_signals.suspicious_links,
+                "suspicious_upi": rule_signals.suspicious_upi,
+                "suspicious_phones": rule_signals.suspicious_phones,
+                "intelligence": rule_signals.intelligence,
+                "shouldEndConversation": rule_signals.shouldEndConversation,
+            })
+            shortcut_reason = f"Near-duplicate of known scam campaign (similarity {similarity:.2f})"
+            shortcut_path = "campaign"
+            shortcut_scam = True
+            shortcut_risk = similarity
+
+    # Step 2: Extract Signals & Compute Summary Delta
+    # Speculative mode: intent scoring only needs the prior timeline plus the raw
+    # message, so it runs concurrently with extraction and is reconciled at fusion.
+    # Not started when the local classifier is already confident on the prior timeline.
+    speculative_task = None
+    if shortcut_reason is None and not state.is_scam and Config.SPECULATIVE_SCORING:
+        speculative_timeline = build_context(state, extraction_agent.compute_raw_delta(event))
+        if local_classifier is None or local_classifier.score_intent(speculative_timeline) is None:
+            speculative_task = asyncio.create_task(llm_scorer.score_intent(speculative_timeline, state.artifacts))
+            speculative_tasks.append(speculative_task)
+            speculation_stats["speculative"] += 1
+
+    if shortcut_reason is not None:
+        signals = shortcut_signals
+    elif signals is None:
+        with timer.stage("extraction"):
+            signals = await extraction_agent.extract_signals(event)
     summary_delta = extraction_agent.compute_summary_delta(event, signals)
     
     # Check if this session is already a confirmed scam
-    is_already_scam = await memory_store.is_session_scam(event.sessionId)
+    is_already_scam = state.is_scam
     
     # Defaults
     scam_detected = False
@@ -120,146 +464,326 @@ async def detect_scam(event: ScamEventInput,  request: Request, api_key: str = S
     rule_risk_score = 0.0
     llm_intent_score = 0.0
     reasons = []
+    fusion_exit = False
+    intent_source = None
+
+    new_artifacts = turn_artifacts(signals)
+
+    # The state after this turn is known locally, no need to re-read it from Redis.
+    # LLMs get the compacted rolling context (digest + recent deltas), not the full log.
+    summary_timeline = build_context(state, summary_delta)
+    known_artifacts = MemoryStore.merge_artifacts(state.artifacts, new_artifacts)
+
+    def queue_turn_writes(pipe):
+        # Cross-session artifact reputation, written in the same round trip as the turn
+        if Config.REPUTATION_ENABLED:
+            reputation_index.queue_updates(pipe, event.sessionId, state.artifacts, known_artifacts,
+                                           was_scam=state.is_scam, is_scam=scam_detected)
+        # Final-result callback goes to the durable outbox in the same round trip
+        if Config.CALLBACK_DELIVERY_ENABLED and scam_detected and respond and signals.shouldEndConversation:
+            callback_outbox.queue(pipe, event.sessionId,
+                                  final_result_payload(event.sessionId, total_msgs, signals, known_artifacts))
 
     if is_already_scam:
         # SHORT-CIRCUIT: Skip Detection Agents
-        print(f"Session {event.sessionId} is ALREADY confirmed scam. Skipping detection logic.")
         scam_detected = True
         final_risk = 1.0
         
         # We still need to update memory with new artifacts found by Extraction Agent
-        new_artifacts = signals.intelligence.model_dump(exclude_none=True)
-        # Update legacy keys for safety
-        if signals.suspicious_links: new_artifacts["suspicious_links"] = signals.suspicious_links
-        if signals.suspicious_upi: new_artifacts["upi_ids"] = signals.suspicious_upi
-        if signals.suspicious_phones: new_artifacts["phone_numbers"] = signals.suspicious_phones
-        
-        # Async update memory & summary (we still want the summary for context)
-        await asyncio.gather(
-            memory_store.update_artifact_memory(event.sessionId, new_artifacts),
-            memory_store.append_summary(event.sessionId, summary_delta)
-        )
-        summary_timeline = await memory_store.get_summary(event.sessionId)
+        # and the summary (we still want the summary for context)
+        with timer.stage("persist"):
+            await memory_store.commit_turn(event.sessionId, new_artifacts, summary_delta, state=state,
+                                           pipeline_hook=queue_turn_writes, history=history_sync)
         
     else:
         # NORMAL FLOW: Execute Detection Stack
         
-        # Step 2: Parallel Execution
-        # Update Artifact Memory (Intelligence Accumulation)
-        # Store all ExtractedIntelligence fields
-        new_artifacts = signals.intelligence.model_dump(exclude_none=True)
-        # Also map legacy keys if needed for internal scoring (though we can switch scoring to use new keys too)
-        if signals.suspicious_links: new_artifacts["suspicious_links"] = signals.suspicious_links
-        if signals.suspicious_upi: new_artifacts["upi_ids"] = signals.suspicious_upi
-        if signals.suspicious_phones: new_artifacts["phone_numbers"] = signals.suspicious_phones
-        
-        risk_task = asyncio.create_task(async_compute_rule_risk(signals))
-        mem_update_task = asyncio.create_task(memory_store.update_artifact_memory(event.sessionId, new_artifacts))
-        summary_update_task = asyncio.create_task(memory_store.append_summary(event.sessionId, summary_delta))
-        
-        rule_risk_assessment, _, _ = await asyncio.gather(risk_task, mem_update_task, summary_update_task)
-        
-        # Step 3: Prepare Data for LLM
-        summary_timeline = await memory_store.get_summary(event.sessionId)
-        known_artifacts = await memory_store.get_artifacts(event.sessionId)
-        
-        # Step 4: LLM Intent Scoring
-        llm_result = await llm_scorer.score_intent(summary_timeline, known_artifacts)
-        
-        # Step 5: Risk Fusion Gate
-        # final_risk = α · rule_risk + β · llm_intent
-        final_risk = (Config.ALPHA * rule_risk_assessment.rule_risk_score) + \
-                     (Config.BETA * llm_result.intent_score)
-        
-        scam_detected = final_risk >= Config.SCAM_THRESHOLD
-        
+        # Step 3: Rule-based Risk
+        with timer.stage("rule_risk"):
+            rule_risk_assessment = await async_compute_rule_risk(signals, known_bad)
         rule_risk_score = rule_risk_assessment.rule_risk_score
-        llm_intent_score = llm_result.intent_score
-        reasons = rule_risk_assessment.triggered_rules + [llm_result.reasoning]
+
+        if shortcut_reason is not None:
+            # SHORTCUT: Verdict decided by the rule confidence band or a known campaign, no LLM call
+            scam_detected = shortcut_scam
+            final_risk = rule_risk_score if shortcut_risk is None else shortcut_risk
+            reasons = rule_risk_assessment.triggered_rules + [shortcut_reason]
+        elif Config.FUSION_EARLY_EXIT and fusion_scorer.decided(rule_risk_score) is not None:
+            # EARLY EXIT: no intent score in [0, 1] can move the fused risk across the threshold
+            if speculative_task is not None:
+                speculative_task.cancel()
+            fusion_exit = True
+            scam_detected = fusion_scorer.decided(rule_risk_score)
+            low, high = fusion_scorer.bounds(rule_risk_score)
+            final_risk = low if scam_detected else high
+            fusion_stats["early_exit_scam" if scam_detected else "early_exit_safe"] += 1
+            reasons = rule_risk_assessment.triggered_rules + [
+                f"Fusion bound: verdict fixed by rule risk (reachable {low:.2f}-{high:.2f})"]
+        else:
+            # Step 4: Intent Scoring (local classifier first, LLM when it is uncertain)
+            with timer.stage("intent_scoring"):
+                llm_result = local_classifier.score_intent(summary_timeline) if local_classifier is not None else None
+                if llm_result is not None:
+                    intent_source = "local"
+                    if speculative_task is not None:
+                        speculative_task.cancel()
+                        speculative_task = None
+                elif speculative_task is not None:
+                    llm_result = await speculative_task
+                else:
+                    llm_result = await llm_scorer.score_intent(summary_timeline, known_artifacts)
+                intent_source = intent_source or "llm"
+
+            # Step 5: Risk Fusion Gate
+            with timer.stage("fusion"):
+                final_risk = fuse_risk(rule_risk_score, llm_result.intent_score)
+
+            # Reconcile: the speculative score never saw this turn's extracted evidence.
+            # New evidence can only raise suspicion, so re-score a SAFE verdict close to the threshold.
+            if speculative_task is not None and final_risk < Config.SCAM_THRESHOLD:
+                new_evidence = rule_risk_score > 0 or any(
+                    len(known_artifacts[a_type]) != len(state.artifacts.get(a_type, []))
+                    for a_type in MemoryStore.ARTIFACT_TYPES
+                )
+                if new_evidence and final_risk >= Config.SCAM_THRESHOLD - Config.SPECULATIVE_RESCORE_MARGIN:
+                    speculation_stats["rescored"] += 1
+                    with timer.stage("intent_scoring"):
+                        llm_result = await llm_scorer.score_intent(summary_timeline, known_artifacts)
+                    final_risk = fuse_risk(rule_risk_score, llm_result.intent_score)
+
+            scam_detected = final_risk >= Config.SCAM_THRESHOLD
+
+            llm_intent_score = llm_result.intent_score
+            reasons = rule_risk_assessment.triggered_rules + [llm_result.reasoning]
+
+            if Config.FAST_PATH_MODE == "shadow" or band == "safe":
+                rule_extractor.record_shadow(band, scam_detected)
         
-        # Mark as scam if newly detected
-        if scam_detected:
-            await memory_store.mark_session_as_scam(event.sessionId)
+        # Step 6: Persist artifacts, summary & verdict (1 round trip)
+        persist = memory_store.commit_turn(event.sessionId, new_artifacts, summary_delta,
+                                           mark_scam=scam_detected, state=state,
+                                           pipeline_hook=queue_turn_writes, history=history_sync)
+        with timer.stage("persist"):
+            if (scam_detected and campaign_signature is not None and intent_source == "llm"
+                    and campaign_index.indexable(event.message.text, rule_signals)):
+                # New LLM-confirmed scam: index it so later variants of the campaign skip the LLMs
+                # (only a message that carries its own indicators, not filler from a scam session)
+                await asyncio.gather(persist, campaign_index.add(event.message.text, signals, campaign_signature))
+            else:
+                await persist
     
-    # Step 6: Persona Agent (Activation) & Lifecycle Management
+    # Step 7: Persona Agent (Activation) & Lifecycle Management
     reply = None
-    if scam_detected:
+    reply_pending = None
+    if scam_detected and respond:
         # Autonomous Reply Generation
-        reply = await persona_agent.generate_reply(event.message.text, summary_timeline, signals)
+        if reply_sink is not None:
+            with timer.stage("persona"):
+                tokens = []
+                async for token in persona_agent.stream_reply(event.message.text, summary_timeline, signals):
+                    reply_sink.put_nowait(token)
+                    tokens.append(token)
+                reply = "".join(tokens)
+            # Also served by GET /reply/{sessionId}/{turn}, like worker-generated replies
+            await persona_workers.store_reply(event.sessionId, total_msgs, reply)
+        elif Config.PERSONA_MODE == "inline":
+            with timer.stage("persona"):
+                reply = await persona_agent.generate_reply(event.message.text, summary_timeline, signals)
+        else:
+            # Off the request path: workers store the reply for GET /reply/{sessionId}/{turn}
+            queued = persona_workers.submit(event.sessionId, total_msgs, event.message.text,
+                                            summary_timeline, signals)
+            if Config.PERSONA_MODE == "bank" or not queued:
+                reply = pick_reply(signals.conversation_phase, event.sessionId, total_msgs)
+            reply_pending = queued
         
         # Check for End of Conversation
         if signals.shouldEndConversation:
             # Trigger Final Result Callback with ACCUMULATED Intelligence
-            # We must fetch the latest state from memory (which includes what we just added)
-            final_artifacts = await memory_store.get_artifacts(event.sessionId)
-            await trigger_final_callback(event.sessionId, total_msgs, signals, final_artifacts)
-
-    # --- Logging ---
-    print("\n" + "="*50)
-    print(f"Session: {event.sessionId}")
-    print(f"Message: {event.message.text}")
-    print(f"Phase: {signals.conversation_phase} | Tone: {signals.tone}")
-    print(f"Signals: Urgency={signals.urgency_detected}, Sensitive={signals.sensitive_info_request}")
-    print(f"Intelligence: {signals.intelligence}")
-    print("-" * 20)
-    
+            # (stored artifacts merged with what this turn just added)
+            with timer.stage("callback"):
+                await trigger_final_callback(event.sessionId, total_msgs, signals, known_artifacts)
+
+    total_ms = timer.finish()
     if is_already_scam:
-        print("Verdict: SCAM DETECTED (Already Confirmed - Detection Skipped)")
+        decision_path = "already_scam"
+    elif fusion_exit:
+        decision_path = "fusion_bound"
     else:
-        print(f"Rule: {rule_risk_score:.2f} | LLM: {llm_intent_score:.2f} | Final: {final_risk:.4f}")
-        print(f"Verdict: {'SCAM DETECTED' if scam_detected else 'SAFE'}")
-    if reply:
-        print(f"Persona Reply: {reply}")
-    print("="*50 + "\n")
-    # ----------------
+        decision_path = shortcut_path if shortcut_reason is not None else "llm"
+    DETECTIONS.inc(verdict="scam" if scam_detected else "safe", path=decision_path)
+
+    # One structured verdict record per request (sampled), with per-stage timings
+    if sample_request() and logger.isEnabledFor(logging.INFO):
+        if is_already_scam:
+            verdict = "SCAM (already confirmed, detection skipped)"
+        else:
+            verdict = "SCAM" if scam_detected else "SAFE"
+        logger.info("detect verdict", extra={"fields": {
+            "sessionId": event.sessionId,
+            "turn": total_msgs,
+            "verdict": verdict,
+            "phase": signals.conversation_phase,
+            "tone": signals.tone,
+            "urgency": signals.urgency_detected,
+            "sensitive": signals.sensitive_info_request,
+            "rule_risk": round(rule_risk_score, 4),
+            "llm_intent": round(llm_intent_score, 4),
+            "intent_source": intent_source,
+            "final_risk": round(final_risk, 4),
+            "path": decision_path,
+            "shortcut": shortcut_reason,
+            "reply": reply,
+            "stages_ms": timer.stages,
+            "total_ms": total_ms,
+        }})
+        if Config.LOG_VERBOSE:
+            logger.debug("detect detail", extra={"fields": {
+                "sessionId": event.sessionId,
+                "message": event.message.text,
+                "intelligence": signals.intelligence.model_dump(),
+                "reasons": reasons,
+            }})
+
     
-    return AgentAPIResponse(
-        status="success",
-        reply=reply
+    return ScamDetectionResult(
+        sessionId=event.sessionId,
+        scamDetected=scam_detected,
+        final_risk_score=final_risk,
+        rule_risk_score=rule_risk_score,
+        llm_intent_score=llm_intent_score,
+        reasons=reasons,
+        reply=reply or "",
+        replyPending=reply_pending,
+        extractedIntelligence=signals.intelligence,
+        totalMessagesExchanged=total_msgs,
     )
 
-async def trigger_final_callback(session_id: str, total_msgs: int, signals, final_artifacts: dict):
+@router.post("/detect/batch")
+async def detect_batch(request: Request, respond: bool = False, api_key: str = Security(get_api_key)):
     """
-    Sends the mandatory final result to the platform.
+    Scores many events in one request (NDJSON body, JSON array or {"events": [...]}).
+    Sessions keep their input order; results stream back as NDJSON, one line per
+    event with its input "index". Persona replies and callbacks only with ?respond=true.
     """
-    url = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
-    
-    # Map flat artifacts dict to structured ExtractedIntelligence format
-    # Redis stores sets as lists, we need to ensure keys match ExtractedIntelligence fields
-    intel_payload = {
-        "bankAccounts": final_artifacts.get("bankAccounts", []),
-        "bankNames": final_artifacts.get("bankNames", []),
-        "upiIds": final_artifacts.get("upiIds", []) + final_artifacts.get("upi_ids", []), # Handle both keys
-        "phishingLinks": final_artifacts.get("phishingLinks", []) + final_artifacts.get("suspicious_links", []),
-        "phoneNumbers": final_artifacts.get("phoneNumbers", []) + final_artifacts.get("phone_numbers", []),
-        "suspiciousKeywords": final_artifacts.get("suspiciousKeywords", [])
-    }
-    
-    # Deduplicate lists
-    for k in intel_payload:
-        intel_payload[k] = list(set(intel_payload[k]))
-
-    payload = {
-        "sessionId": session_id,
-        "scamDetected": True,
-        "totalMessagesExchanged": total_msgs,
-        "extractedIntelligence": intel_payload,
-        "agentNotes": signals.agentNotes
-    }
-    
-    print(f"[CALLBACK] Sending Final Result to {url}...")
     try:
-        async with httpx.AsyncClient() as client:
-           print(f"[CALLBACK] Payload: {payload}")
-           # await client.post(url, json=payload) 
-    except Exception as e:
-        print(f"[CALLBACK] Failed: {e}")
+        items, errors = parse_batch(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Malformed batch body: {e}")
+    if len(items) + len(errors) > Config.BATCH_MAX_EVENTS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {Config.BATCH_MAX_EVENTS} events")
+
+    async def stream():
+        for error in errors:
+            yield json.dumps(error) + "\n"
+        async for line in run_batch(items, serialized_process_event, extraction_agent, respond):
+            yield json.dumps(line) + "\n"
 
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
-async def async_compute_rule_risk(signals):
+async def trigger_final_callback(session_id: str, total_msgs: int, signals, final_artifacts: dict):
+    """
+    Final result for the platform. With CALLBACK_DELIVERY_ENABLED the payload was
+    already written to the callback outbox in the turn's commit pipeline and is
+    delivered by the background dispatcher; otherwise it is only logged.
+    """
+    logger.info("final result callback", extra={"fields": {
+        "sessionId": session_id, "totalMessagesExchanged": total_msgs,
+        "delivery": "queued" if Config.CALLBACK_DELIVERY_ENABLED else "disabled",
+    }})
+    if Config.CALLBACK_DELIVERY_ENABLED:
+        callback_outbox.ensure_started()
+    if Config.LOG_VERBOSE:
+        payload = final_result_payload(session_id, total_msgs, signals, final_artifacts)
+        logger.debug("callback payload", extra={"fields": {"payload": payload}})
+
+
+def fuse_risk(rule_risk_score: float, llm_intent_score: float) -> float:
+    """Risk Fusion Gate (risk_fusion.py), by default final_risk = α · rule_risk + β · llm_intent"""
+    return fusion_scorer.fuse(rule_risk_score, llm_intent_score)
+
+async def async_compute_rule_risk(signals, known_bad=None):
     """Wrapper to make sync function awaitable if needed, or just run it."""
-    return risk_engine.compute_risk(signals)
+    return risk_engine.compute_risk(signals, known_bad)
 
-@app.get("/health")
+@router.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness():
+    """
+    Ready once this worker's pools are open and warm (unlike /health, which only says
+    the process is up). Failed warm-up checks are retried by each call until they pass.
+    """
+    ready = await warmup.recheck()
+    return JSONResponse(status_code=200 if ready else 503,
+                        content={"status": "ready" if ready else "starting", "timings_ms": warmup.timings_ms})
+
+@router.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text exposition: stage/LLM/Redis histograms, token and error counters."""
+    if not Config.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    gateway = get_gateway().snapshot()
+    LLM_IN_FLIGHT.set(gateway["in_flight"])
+    LLM_QUEUE_DEPTH.set(gateway["queue_depth"])
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/stats")
+async def stats(api_key: str = Security(get_api_key)):
+    """Pipeline counters, e.g. how many requests the fast path resolved without an LLM."""
+    return {
+        "fast_path": {"mode": Config.FAST_PATH_MODE, **rule_extractor.snapshot()},
+        "speculative_scoring": {"enabled": Config.SPECULATIVE_SCORING, **speculation_stats},
+        "fusion": {"scorer": fusion_scorer.name, "early_exit": Config.FUSION_EARLY_EXIT, **fusion_stats},
+        "local_classifier": local_classifier.snapshot() if local_classifier is not None else {"enabled": False},
+        "llm_gateway": get_gateway().snapshot(),
+        "extraction_cache": extraction_agent.cache.snapshot() if extraction_agent.cache else {"enabled": False},
+        "session_cache": memory_store.cache.snapshot() if memory_store.cache is not None else {"enabled": False},
+        "campaign_index": {"enabled": Config.CAMPAIGN_INDEX_ENABLED, **campaign_index.stats},
+        "reputation_index": {"enabled": Config.REPUTATION_ENABLED, **reputation_index.stats},
+        "persona_workers": persona_workers.snapshot(),
+        "callbacks": await callback_outbox.snapshot(),
+        "session_serializer": session_serializer.snapshot(),
+        "history_reconcile": history_reconciler.snapshot(),
+        "startup": warmup.snapshot(),
+        "worker": {"id": Config.WORKER_ID, "pid": os.getpid(), "routing": Config.WORKER_ROUTING,
+                   "workers": Config.WEB_WORKERS},
+        "session_archive": {"enabled": Config.SESSION_ARCHIVE_ENABLED,
+                            "running": session_archiver.sweeper is not None and not session_archiver.sweeper.done()},
+    }
+
+@router.get("/reply/{session_id}/{turn}", response_model=AgentAPIResponse, response_model_exclude_unset=True)
+async def get_persona_reply(session_id: str, turn: int, wait: float = 0.0, api_key: str = Security(get_api_key)):
+    """
+    Persona reply generated off the request path (PERSONA_MODE async/bank).
+    `wait` long-polls up to that many seconds; 202 while the reply is still pending.
+    """
+    reply = await persona_workers.get_reply(session_id, turn, min(max(wait, 0.0), Config.PERSONA_MAX_WAIT))
+    if reply is None:
+        return JSONResponse(status_code=202, content={"status": "pending", "reply": None})
+    return AgentAPIResponse(status="success", reply=reply)
+
+@router.post("/admin/extraction-cache/invalidate")
+async def invalidate_extraction_cache(api_key: str = Security(get_api_key)):
+    """Drops cached extractions, e.g. after a prompt fix that did not change the template text."""
+    if extraction_agent.cache is None:
+        return {"status": "success", "removed": 0}
+    removed = await extraction_agent.cache.invalidate()
+    return {"status": "success", "removed": removed}
+
+
+def create_app() -> FastAPI:
+    """
+    Application factory (`uvicorn --factory main:create_app`; `main:app` is one such
+    app). Building it opens nothing: clients are connected and warmed by its lifespan.
+    """
+    # The router's routes as built at import (include_router would rebuild them on the first request)
+    app = FastAPI(title="Scam Detection Agent", lifespan=lifespan, routes=list(router.routes))
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+    app.add_exception_handler(Exception, general_exception_handler)
+    return app
+
+app = create_app()
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
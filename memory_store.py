@@ -1,70 +1,456 @@
 import redis.asyncio as redis
+import os
 import json
+import time
 from config import Config
+from models import SessionState
+from session_cache import SessionCache
+from context_window import fold_deltas
+from metrics import redis_op, SESSION_SCAM_CHECKS
+
+ACTIVE_KEY = "sessions:active"  # zset sessionId -> last activity (only with SESSION_ARCHIVE_ENABLED)
 
 class MemoryStore:
+    """
+    Per-session state in two keys, both expiring SESSION_TTL seconds after the last turn:
+
+    session:{id}        hash    count, scam, digest, folded, hfp/hlen (reconciled history),
+                                and one "a:{type}:{value}" field per artifact (set
+                                semantics without a key per type)
+    session:{id}:log    list    summary deltas, oldest first (full timeline, for export)
+
+    Sessions written by the previous layout (msg_count:{id}, scam_status:{id},
+    summary:{id}, digest:{id}, artifacts:{id}:{type}) are migrated on first
+    touch, or in bulk with `python migrate_sessions.py`.
+
+    Every write to the hash increments its `version` field, which keeps the
+    in-process hot-session cache (session_cache.py) coherent across workers.
+    """
+    # Matches ExtractedIntelligence keys + internal keys
+    ARTIFACT_TYPES = [
+        "suspicious_links", "phone_numbers", "upi_ids",
+        "bankAccounts", "bankNames", "phishingLinks", "suspiciousKeywords"
+    ]
+
     def __init__(self):
+        self.redis = None
+        self._pid = None
+        self.connect()
+        self.cache = SessionCache() if Config.SESSION_CACHE_ENABLED else None
+
+    def connect(self):
+        """
+        Opens this process's Redis pool. Called again by every worker at startup
+        (lifespan): a pool created before a fork is replaced, never shared.
+        """
+        if self.redis is not None and self._pid == os.getpid():
+            return
         self.redis = redis.Redis(
             host=Config.REDIS_HOST,
             port=Config.REDIS_PORT,
             password=Config.REDIS_PASSWORD,
             decode_responses=True
         )
+        self._pid = os.getpid()
+
+    async def close(self):
+        if isinstance(self.redis, redis.Redis):
+            await self.redis.aclose()
+
+    @staticmethod
+    def session_key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def log_key(session_id: str) -> str:
+        return f"session:{session_id}:log"
+
+    @staticmethod
+    def legacy_keys(session_id: str) -> list:
+        return [f"msg_count:{session_id}", f"scam_status:{session_id}", f"summary:{session_id}",
+                f"digest:{session_id}"] + [f"artifacts:{session_id}:{a_type}" for a_type in MemoryStore.ARTIFACT_TYPES]
+
+    @classmethod
+    def artifact_fields(cls, new_artifacts: dict) -> dict:
+        fields = {}
+        for k, v in (new_artifacts or {}).items():
+            if k not in cls.ARTIFACT_TYPES:
+                continue  # never read back
+            for item in (v if isinstance(v, list) else [v]):
+                fields[f"a:{k}:{item}"] = "1"
+        return fields
+
+    @classmethod
+    def artifacts_from_fields(cls, fields: dict) -> dict:
+        artifacts = {a_type: [] for a_type in cls.ARTIFACT_TYPES}
+        for field in fields:
+            if field.startswith("a:"):
+                _, a_type, item = field.split(":", 2)
+                if a_type in artifacts:
+                    artifacts[a_type].append(item)
+        return artifacts
+
+    def touch(self, pipe, session_id: str):
+        """Queues the sliding-TTL refresh (and archive bookkeeping) for a session."""
+        pipe.expire(self.session_key(session_id), Config.SESSION_TTL)
+        pipe.expire(self.log_key(session_id), Config.SESSION_TTL)
+        if Config.SESSION_ARCHIVE_ENABLED:
+            pipe.zadd(ACTIVE_KEY, {session_id: time.time()})
 
     async def update_artifact_memory(self, session_id: str, new_artifacts: dict):
         """Append new high-value intel to the artifact memory set."""
-        key = f"artifacts:{session_id}"
-        # For simplicity, we store artifacts as a JSON blob or individual hash fields.
-        # Here, adding to a set of found artifacts.
-        if new_artifacts:
-            for k, v in new_artifacts.items():
-                if isinstance(v, list):
-                    for item in v:
-                        await self.redis.sadd(f"{key}:{k}", item)
-                else:
-                    await self.redis.sadd(f"{key}:{k}", v)
+        fields = self.artifact_fields(new_artifacts)
+        if fields:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hset(self.session_key(session_id), mapping=fields)
+            self._bump_version(pipe, session_id)
+            self.touch(pipe, session_id)
+            await pipe.execute()
 
     async def get_artifacts(self, session_id: str) -> dict:
         """Retrieve all known artifacts for a session."""
-        key_base = f"artifacts:{session_id}"
-        # Matches ExtractedIntelligence keys + internal keys
-        artifact_types = [
-            "suspicious_links", "phone_numbers", "upi_ids", 
-            "bankAccounts", "bankNames", "phishingLinks", "suspiciousKeywords"
-        ]
-        result = {}
-        for a_type in artifact_types:
-            items = await self.redis.smembers(f"{key_base}:{a_type}")
-            result[a_type] = list(items)
-        return result
+        cached = await self._validated(session_id, "get_artifacts")
+        if cached is not None:
+            return {a_type: list(items) for a_type, items in cached.artifacts.items()}
+        return self.artifacts_from_fields(await self.redis.hgetall(self.session_key(session_id)))
 
     async def append_summary(self, session_id: str, summary_delta: str):
         """Append structured summary to the timeline."""
-        key = f"summary:{session_id}"
-        await self.redis.rpush(key, summary_delta)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(self.log_key(session_id), summary_delta)
+        self._bump_version(pipe, session_id)
+        self.touch(pipe, session_id)
+        await pipe.execute()
 
     async def get_summary(self, session_id: str) -> list:
         """Get the full structured summary timeline."""
-        key = f"summary:{session_id}"
-        return await self.redis.lrange(key, 0, -1)
+        cached = await self._validated(session_id, "get_summary")
+        if cached is not None and cached.folded == 0 and len(cached.summary) == cached.summary_length:
+            return list(cached.summary)  # the whole timeline is still in the cached tail
+        return await self.redis.lrange(self.log_key(session_id), 0, -1)
 
     async def increment_message_count(self, session_id: str) -> int:
         """Increment total messages exchanged."""
-        key = f"msg_count:{session_id}"
-        return await self.redis.incr(key)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(self.session_key(session_id), "count", 1)
+        self.touch(pipe, session_id)
+        return (await pipe.execute())[0]
 
     async def get_message_count(self, session_id: str) -> int:
-        key = f"msg_count:{session_id}"
-        val = await self.redis.get(key)
+        val = await self.redis.hget(self.session_key(session_id), "count")
         return int(val) if val else 0
 
     async def mark_session_as_scam(self, session_id: str):
         """Mark a session as a confirmed scam."""
-        key = f"scam_status:{session_id}"
-        await self.redis.set(key, "1")
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(self.session_key(session_id), "scam", "1")
+        self._bump_version(pipe, session_id)
+        self.touch(pipe, session_id)
+        await pipe.execute()
 
     async def is_session_scam(self, session_id: str) -> bool:
         """Check if session is already a confirmed scam."""
-        key = f"scam_status:{session_id}"
-        val = await self.redis.get(key)
-        return val == "1"
+        # A cached flag is only current while the version is (the session may have
+        # been archived or deleted by another worker since)
+        cached = await self._validated(session_id, "is_session_scam")
+        if cached is not None:
+            is_scam = cached.is_scam
+        else:
+            with redis_op("is_session_scam"):
+                is_scam = await self.redis.hget(self.session_key(session_id), "scam") == "1"
+        SESSION_SCAM_CHECKS.inc(result="already_scam" if is_scam else "not_scam")
+        return is_scam
+
+    # --- Hot-session cache ---
+
+    def _bump_version(self, pipe, session_id: str):
+        """Queues the version increment that marks other workers' cached copies stale."""
+        pipe.hincrby(self.session_key(session_id), "version", 1)
+        if self.cache is not None:
+            self.cache.invalidate(session_id)
+
+    async def _validated(self, session_id: str, op: str):
+        """The cached state if it is still current (one small read), else None."""
+        cached = self.cache.get(session_id, op) if self.cache is not None else None
+        if cached is None:
+            return None
+        version = await self.redis.hget(self.session_key(session_id), "version")
+        if int(version or 0) != cached.version:
+            self.cache.record(op, "stale")
+            self.cache.invalidate(session_id)
+            return None
+        self.cache.record(op, "hit")
+        return cached
+
+    # --- Pipelined session API (one round trip per call) ---
+
+    async def begin_turn(self, session_id: str) -> SessionState:
+        """
+        Increments the message counter and loads the scam flag, artifacts,
+        digest and the recent (unfolded) summary deltas in a single pipelined
+        round trip, refreshing the session TTL. Only a bounded tail of the
+        timeline is read. A session still in the legacy layout is migrated
+        first (one extra round trip each way, once per session).
+
+        A session in the hot-session cache only has its counter incremented
+        and its version read; the state comes from memory unless another
+        writer changed it, in which case it is reloaded (a second round trip).
+        """
+        cached = self.cache.get(session_id) if self.cache is not None else None
+        if cached is not None:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hincrby(self.session_key(session_id), "count", 1)
+            pipe.hget(self.session_key(session_id), "version")
+            self.touch(pipe, session_id)
+            with redis_op("begin_turn"):
+                count, version = (await pipe.execute())[:2]
+            if int(version or 0) == cached.version:
+                self.cache.record("begin_turn", "hit")
+                state = cached.model_copy(update={"message_count": int(count)})
+                self.cache.put(session_id, state)
+                return state
+            self.cache.record("begin_turn", "stale")
+            state, _ = await self._load_turn(session_id, increment=False)
+        else:
+            state, legacy = await self._load_turn(session_id, increment=True)
+            if legacy and state.message_count == 1 and await self.migrate_legacy_session(session_id):
+                state, _ = await self._load_turn(session_id, increment=False)
+        if self.cache is not None:
+            self.cache.put(session_id, state)
+        return state
+
+    async def _load_turn(self, session_id: str, increment: bool):
+        window = Config.CONTEXT_RECENT_TURNS + Config.CONTEXT_DIGEST_EVERY
+        log = self.log_key(session_id)
+        pipe = self.redis.pipeline(transaction=False)
+        if increment:
+            pipe.hincrby(self.session_key(session_id), "count", 1)
+        pipe.hgetall(self.session_key(session_id))
+        pipe.llen(log)
+        pipe.lrange(log, -window, -1)
+        self.touch(pipe, session_id)
+        check_legacy = increment and Config.SESSION_LEGACY_FALLBACK
+        if check_legacy:
+            pipe.exists(f"msg_count:{session_id}")
+        with redis_op("begin_turn"):
+            results = await pipe.execute()
+
+        fields, length, tail = results[int(increment):int(increment) + 3]
+        folded = int(fields.get("folded", 0))
+        tail_start = length - len(tail)
+        state = SessionState(
+            message_count=int(fields.get("count", 0)),
+            is_scam=fields.get("scam") == "1",
+            artifacts=self.artifacts_from_fields(fields),
+            summary=list(tail[max(0, folded - tail_start):]),
+            digest=json.loads(fields["digest"]) if fields.get("digest") else {},
+            summary_length=length,
+            folded=folded,
+            version=int(fields.get("version", 0)),
+            history_fp=fields.get("hfp", ""),
+            history_len=int(fields.get("hlen", 0)),
+        )
+        return state, bool(check_legacy and results[-1])
+
+    async def commit_turn(self, session_id: str, new_artifacts: dict, summary_delta: str,
+                          mark_scam: bool = False, state: SessionState = None, pipeline_hook=None,
+                          history: tuple = None):
+        """
+        Writes the artifacts, summary delta and (optionally) the scam flag
+        produced by one turn in a single pipelined round trip. When the state
+        loaded by `begin_turn` is passed, deltas that fall out of the recent
+        window are folded into the session digest in the same round trip.
+        `history` is the (fingerprint, length) of the conversationHistory this
+        turn covers. `pipeline_hook(pipe)` can queue further writes (e.g.
+        reputation counters). The resulting state is written through to the
+        hot-session cache when no other writer touched the session since
+        `state` was loaded.
+        """
+        fields = self.artifact_fields(new_artifacts)
+        if mark_scam:
+            fields["scam"] = "1"
+        if history is not None:
+            fields["hfp"], fields["hlen"] = history[0], str(history[1])
+        digest_update = {}
+        if state is not None and summary_delta:
+            digest_update = self._compact_summary(state, summary_delta)
+            fields.update(digest_update)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(self.session_key(session_id), "version", 1)
+        if fields:
+            pipe.hset(self.session_key(session_id), mapping=fields)
+        if summary_delta:
+            pipe.rpush(self.log_key(session_id), summary_delta)
+        self.touch(pipe, session_id)
+        if pipeline_hook is not None:
+            pipeline_hook(pipe)
+        with redis_op("commit_turn"):
+            version = (await pipe.execute())[0]
+
+        if self.cache is None:
+            return
+        if state is not None and version == state.version + 1:
+            next_state = self._next_state(state, new_artifacts, summary_delta, mark_scam, digest_update, version)
+            if history is not None:
+                next_state = next_state.model_copy(update={"history_fp": history[0], "history_len": history[1]})
+            self.cache.put(session_id, next_state)
+        else:
+            self.cache.invalidate(session_id)
+
+    async def append_turns(self, session_id: str, turns: list, state: SessionState,
+                           pipeline_hook=None) -> SessionState:
+        """
+        Records earlier messages the server never processed, [(new_artifacts,
+        summary_delta)] oldest first, ahead of the current turn in one round
+        trip: counter, artifacts, log and digest folding. `state` comes from this
+        turn's `begin_turn`; the returned state includes the recorded messages,
+        with the current turn's number moved past them.
+        """
+        fields = {}
+        next_state = state
+        for new_artifacts, summary_delta in turns:
+            fields.update(self.artifact_fields(new_artifacts))
+            digest_update = self._compact_summary(next_state, summary_delta) if summary_delta else {}
+            fields.update(digest_update)
+            next_state = self._next_state(next_state, new_artifacts, summary_delta, False,
+                                          digest_update, next_state.version)
+        deltas = [summary_delta for _, summary_delta in turns if summary_delta]
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(self.session_key(session_id), "version", 1)
+        pipe.hincrby(self.session_key(session_id), "count", len(turns))
+        if fields:
+            pipe.hset(self.session_key(session_id), mapping=fields)
+        if deltas:
+            pipe.rpush(self.log_key(session_id), *deltas)
+        self.touch(pipe, session_id)
+        if pipeline_hook is not None:
+            pipeline_hook(pipe)
+        with redis_op("append_turns"):
+            version, count = (await pipe.execute())[:2]
+
+        next_state = next_state.model_copy(update={"message_count": int(count), "version": int(version)})
+        if self.cache is not None:
+            if version == state.version + 1:
+                self.cache.put(session_id, next_state)
+            else:
+                self.cache.invalidate(session_id)
+        return next_state
+
+    def _next_state(self, state: SessionState, new_artifacts: dict, summary_delta: str,
+                    mark_scam: bool, digest_update: dict, version: int) -> SessionState:
+        """What `begin_turn` would load after `commit_turn` (minus the counter increment)."""
+        known = state.summary + ([summary_delta] if summary_delta else [])
+        length = state.summary_length + (1 if summary_delta else 0)
+        folded = int(digest_update.get("folded", state.folded))
+        # begin_turn reads the last RECENT + EVERY lines and drops the folded ones
+        start = max(folded, length - (Config.CONTEXT_RECENT_TURNS + Config.CONTEXT_DIGEST_EVERY))
+        return state.model_copy(update={
+            "is_scam": state.is_scam or mark_scam,
+            "artifacts": self.merge_artifacts(state.artifacts, new_artifacts),
+            "summary": known[max(0, start - (length - len(known))):],
+            "digest": json.loads(digest_update["digest"]) if digest_update else state.digest,
+            "summary_length": length,
+            "folded": folded,
+            "version": version,
+        })
+
+    def _compact_summary(self, state: SessionState, summary_delta: str) -> dict:
+        """Digest fields to write once the unfolded deltas reach RECENT + EVERY lines."""
+        length = state.summary_length + 1
+        recent = state.summary + [summary_delta]
+        # Lines older than the loaded tail that were never folded (pre-digest sessions)
+        unloaded = max(0, length - state.folded - len(recent))
+        if length - state.folded < Config.CONTEXT_RECENT_TURNS + Config.CONTEXT_DIGEST_EVERY:
+            return {}
+        to_fold = recent[:-Config.CONTEXT_RECENT_TURNS]
+        digest = fold_deltas(state.digest, to_fold, skipped=unloaded)
+        return {"digest": json.dumps(digest), "folded": length - Config.CONTEXT_RECENT_TURNS}
+
+    # --- Lifecycle: export, delete, legacy migration ---
+
+    async def export_session(self, session_id: str):
+        """Full session record (for archival), or None if the session has expired."""
+        return (await self.export_sessions([session_id]))[0]
+
+    async def export_sessions(self, session_ids: list) -> list:
+        """`export_session` for many sessions in one round trip."""
+        pipe = self.redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.hgetall(self.session_key(session_id))
+            pipe.lrange(self.log_key(session_id), 0, -1)
+        results = await pipe.execute()
+        records = []
+        for session_id, fields, summary in zip(session_ids, results[::2], results[1::2]):
+            if not fields and not summary:
+                records.append(None)
+                continue
+            records.append({
+                "sessionId": session_id,
+                "message_count": int(fields.get("count", 0)),
+                "is_scam": fields.get("scam") == "1",
+                "artifacts": self.artifacts_from_fields(fields),
+                "summary": summary,
+                "digest": json.loads(fields["digest"]) if fields.get("digest") else {},
+                "folded": int(fields.get("folded", 0)),
+            })
+        return records
+
+    async def delete_session(self, session_id: str):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(self.session_key(session_id), self.log_key(session_id))
+        pipe.zrem(ACTIVE_KEY, session_id)
+        await pipe.execute()
+        if self.cache is not None:
+            self.cache.invalidate(session_id)
+
+    async def migrate_legacy_session(self, session_id: str) -> bool:
+        """
+        Moves a session from the legacy key-per-field layout into the session
+        hash/log (merging with anything already written there) and deletes the
+        legacy keys. Returns False if there was nothing to migrate.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(f"msg_count:{session_id}")
+        pipe.get(f"scam_status:{session_id}")
+        pipe.lrange(f"summary:{session_id}", 0, -1)
+        pipe.hgetall(f"digest:{session_id}")
+        for a_type in self.ARTIFACT_TYPES:
+            pipe.smembers(f"artifacts:{session_id}:{a_type}")
+        count, scam_flag, summary, digest, *artifact_sets = await pipe.execute()
+        if count is None and not summary and not any(artifact_sets):
+            return False
+
+        fields = self.artifact_fields({
+            a_type: sorted(items) for a_type, items in zip(self.ARTIFACT_TYPES, artifact_sets)
+        })
+        if scam_flag == "1":
+            fields["scam"] = "1"
+        if digest.get("data"):
+            fields.update({"digest": digest["data"], "folded": digest.get("folded", 0)})
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hincrby(self.session_key(session_id), "count", int(count or 0))
+        if fields:
+            pipe.hset(self.session_key(session_id), mapping=fields)
+        if summary:
+            pipe.lpush(self.log_key(session_id), *reversed(summary))  # ahead of any newer deltas
+        self._bump_version(pipe, session_id)
+        self.touch(pipe, session_id)
+        pipe.delete(*self.legacy_keys(session_id))
+        with redis_op("migrate_session"):
+            await pipe.execute()
+        return True
+
+    @classmethod
+    def merge_artifacts(cls, known: dict, new_artifacts: dict) -> dict:
+        """
+        Returns what `get_artifacts` would report after `new_artifacts` has been
+        stored, without another read.
+        """
+        merged = {}
+        for a_type in cls.ARTIFACT_TYPES:
+            items = list(known.get(a_type, []))
+            for item in new_artifacts.get(a_type, []) or []:
+                if item not in items:
+                    items.append(item)
+            merged[a_type] = items
+        return merged
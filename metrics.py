@@ -0,0 +1,192 @@
+"""
+In-process metrics in the Prometheus text format (GET /metrics) and optional
+OpenTelemetry trace spans.
+
+Counters and histograms are plain dicts updated on the event loop, so
+recording is a few dict operations; with METRICS_ENABLED=false every call
+returns immediately. Spans are only created with TRACING_ENABLED=true and
+the opentelemetry-api package installed (spans are exported by whichever
+OpenTelemetry SDK the deployment configures; without one they are no-ops).
+"""
+import time
+import bisect
+from contextlib import contextmanager, nullcontext
+from config import Config
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional dependency
+    otel_trace = None
+
+# Seconds; covers Redis round trips (ms) up to slow LLM calls (tens of seconds)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (50, 100, 200, 400, 800, 1600, 3200, 6400)
+_NO_SPAN = nullcontext()
+
+
+def _escape(value) -> str:
+    # Label values are quoted strings in the text format: escape \, " and newlines
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not Config.METRICS_ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self.values.get(tuple(labels.get(name, "") for name in self.labelnames), 0.0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_label_str(self.labelnames, key)} {float(value)!r}")  # full precision
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        if not Config.METRICS_ENABLED:
+            return
+        self.values[tuple(labels.get(name, "") for name in self.labelnames)] = value
+
+    def render(self) -> list:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        if not Config.METRICS_ENABLED:
+            return
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self.series.get(tuple(labels.get(name, "") for name in self.labelnames))
+        return series[-1] if series else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                le = _label_str(self.labelnames, key, 'le="%g"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _label_str(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {float(series[-2])!r}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.metrics:
+            getattr(metric, "values", {}).clear()
+            getattr(metric, "series", {}).clear()
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "scam_agent_stage_seconds", "Detection pipeline time per stage (stage=total for the whole pipeline)", ("stage",)))
+DETECTIONS = REGISTRY.register(Counter(
+    "scam_agent_detections_total", "Processed messages by verdict and decision path", ("verdict", "path")))
+SESSION_SCAM_CHECKS = REGISTRY.register(Counter(
+    "scam_agent_session_scam_checks_total",
+    "Session scam-status checks; result=already_scam short-circuits the detection agents", ("result",)))
+LLM_SECONDS = REGISTRY.register(Histogram(
+    "scam_agent_llm_seconds", "LLM call latency per agent, including gateway queueing and retries", ("agent",)))
+LLM_CALLS = REGISTRY.register(Counter(
+    "scam_agent_llm_calls_total", "LLM calls per agent and outcome (ok, error, rate_limited)", ("agent", "outcome")))
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.register(Histogram(
+    "scam_agent_llm_first_token_seconds", "Time to the first streamed token per agent (streaming calls)", ("agent",)))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "scam_agent_llm_tokens_total", "LLM tokens per agent and direction (prompt, completion)", ("agent", "direction")))
+LLM_CALL_TOKENS = REGISTRY.register(Histogram(
+    "scam_agent_llm_call_tokens", "LLM tokens per call, agent and direction (prompt, completion)", ("agent", "direction"),
+    buckets=TOKEN_BUCKETS))
+AGENT_FALLBACKS = REGISTRY.register(Counter(
+    "scam_agent_agent_fallbacks_total", "Agent calls that fell back to a default result after an error", ("agent",)))
+REDIS_ROUND_TRIPS = REGISTRY.register(Counter(
+    "scam_agent_redis_round_trips_total", "Redis round trips (a pipeline counts once) per operation", ("op",)))
+REDIS_SECONDS = REGISTRY.register(Histogram(
+    "scam_agent_redis_seconds", "Redis operation latency", ("op",)))
+LLM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "scam_agent_llm_in_flight", "LLM requests currently in flight"))
+LLM_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "scam_agent_llm_queue_depth", "LLM requests waiting for a gateway concurrency slot"))
+
+
+@contextmanager
+def redis_op(op: str, round_trips: int = 1):
+    """Times a Redis operation and counts its round trips."""
+    if not Config.METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REDIS_SECONDS.observe(time.perf_counter() - start, op=op)
+        REDIS_ROUND_TRIPS.inc(round_trips, op=op)
+
+
+def span(name: str, **attributes):
+    """OpenTelemetry span as a context manager, or a shared no-op when tracing is off."""
+    if not Config.TRACING_ENABLED or otel_trace is None:
+        return _NO_SPAN
+    return otel_trace.get_tracer("scam_agent").start_as_current_span(name, attributes=attributes or None)
@@ -0,0 +1,44 @@
+"""
+Moves sessions from the legacy key-per-field layout (msg_count:{id},
+scam_status:{id}, summary:{id}, digest:{id}, artifacts:{id}:{type}) into
+the per-session hash + log used by MemoryStore, and applies SESSION_TTL.
+
+Safe to run while the service is up: sessions touched in the meantime are
+migrated on their next turn (SESSION_LEGACY_FALLBACK). Once this has run,
+SESSION_LEGACY_FALLBACK=false drops the per-turn legacy check.
+
+Usage: python migrate_sessions.py [--dry-run]
+"""
+import sys
+import asyncio
+import argparse
+from memory_store import MemoryStore
+
+
+async def legacy_session_ids(store: MemoryStore) -> set:
+    """Session ids with any legacy key (a session may lack msg_count, e.g. append-only callers)."""
+    ids = set()
+    for prefix in ("msg_count:", "scam_status:", "summary:", "digest:"):
+        async for key in store.redis.scan_iter(match=f"{prefix}*", count=1000):
+            ids.add(key[len(prefix):])
+    async for key in store.redis.scan_iter(match="artifacts:*", count=1000):
+        ids.add(key[len("artifacts:"):].rsplit(":", 1)[0])
+    return ids
+
+
+async def migrate(store: MemoryStore, dry_run: bool = False) -> int:
+    session_ids = sorted(await legacy_session_ids(store))
+    if dry_run:
+        return len(session_ids)
+    migrated = 0
+    for session_id in session_ids:
+        migrated += await store.migrate_legacy_session(session_id)
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate legacy session keys to the compact layout")
+    parser.add_argument("--dry-run", action="store_true", help="only count legacy sessions")
+    args = parser.parse_args()
+    count = asyncio.run(migrate(MemoryStore(), args.dry_run))
+    print(f"{'found' if args.dry_run else 'migrated'} {count} legacy sessions", file=sys.stderr)
@@ -5,7 +5,8 @@ from datetime import datetime
 class Message(BaseModel):
     sender: str
     text: str
-    timestamp: datetime = datetime.now()
+    # Per message, not one import-time default shared by every message
+    timestamp: datetime = Field(default_factory=datetime.now)
 
 class ScamEventInput(BaseModel):
     sessionId: str
@@ -39,6 +40,7 @@ class ExtractedSignals(BaseModel):
 class RiskAssessment(BaseModel):
     rule_risk_score: float
     triggered_rules: List[str]
+    known_bad_artifacts: List[str] = Field(default_factory=list)
 
 class LLMIntentScore(BaseModel):
     intent_score: float
@@ -54,10 +56,31 @@ class ScamDetectionResult(BaseModel):
     
     # New Fields for Persona/Callback
     reply: str = ""
+    replyPending: Optional[bool] = None  # async persona modes: reply still being generated
     extractedIntelligence: Optional[ExtractedIntelligence] = None
     totalMessagesExchanged: int = 0
 
 class AgentAPIResponse(BaseModel):
     status: str
     reply: Optional[str] = None
+    # Async persona modes only: where to fetch the generated reply (GET /reply/{sessionId}/{turn})
+    replyTurn: Optional[int] = None
+    replyPending: Optional[bool] = None
 
+
+class SessionState(BaseModel):
+    """Snapshot of a session's stored state, loaded in a single Redis round trip."""
+    message_count: int = 0
+    is_scam: bool = False
+    artifacts: Dict[str, List[str]] = Field(default_factory=dict)
+    # Recent (not yet folded) summary deltas, oldest first
+    summary: List[str] = Field(default_factory=list)
+    # Structured digest of older deltas (see context_window.fold_deltas)
+    digest: Dict[str, Any] = Field(default_factory=dict)
+    summary_length: int = 0
+    folded: int = 0
+    # Bumped by every write to the session hash; validates the in-process cache (session_cache.py)
+    version: int = 0
+    # conversationHistory already reconciled (history_sync.py): fingerprint and message count
+    history_fp: str = ""
+    history_len: int = 0
@@ -1,48 +1,80 @@
-from groq import AsyncGroq
 from config import Config
 from models import ExtractedSignals
+from llm_gateway import LLMGateway, get_gateway
+from prompt_compiler import compact, compile_messages
 from typing import List, Dict, Any
+from structured_logging import get_logger
+from metrics import AGENT_FALLBACKS
+
+logger = get_logger("persona_agent")
+
+FALLBACK_REPLY = "I'm checking..."
+
+# Static: the scammer's phase, tone and the extraction notes are sent in the user turn
+PERSONA_PROMPT = compact("""
+    You are the Persona Agent (AUTONOMOUS).
+    Goal: Respond like a REAL person who just received this message.
+    RULES:
+    1. BE CONCISE: Use short, natural sentences. (e.g., "Wait, why?", "Is this real?")
+    2. BE REACTIVE: Act surprised, worried, or slightly confused.
+    3. NEVER reveal detection.
+    4. STALL: Ask questions to keep the scammer talking.
+    """)
 
 class PersonaAgent:
-    def __init__(self):
-        self.client = AsyncGroq(api_key=Config.GROQ_API_KEY)
+    def __init__(self, gateway: LLMGateway = None):
+        self.gateway = gateway or get_gateway()
         self.model = Config.LLM_MODEL
 
+    def _messages(self, message: str, history: List[Any], signals: ExtractedSignals) -> List[Dict[str, str]]:
+        context = f"Scammer Phase: {signals.conversation_phase} | Scammer Tone: {signals.tone}"
+        if signals.agentNotes:
+            context += f" | Agent Notes: {signals.agentNotes}"
+        # History is the compacted rolling context (digest + recent deltas), oldest lines dropped over budget
+        return compile_messages("persona", PERSONA_PROMPT, [
+            ("Context", context, "clip"),
+            ("Scammer message", message, "clip"),
+            ("History", list(history), "lines"),
+        ])
+
     async def generate_reply(self, message: str, history: List[Any], signals: ExtractedSignals) -> str:
         """
         Generates a human-like reply to keep the scammer engaged.
         """
-        system_prompt = f"""
-        You are the Persona Agent (AUTONOMOUS). 
-        Goal: Respond like a REAL person who just received this message. 
-        
-        RULES:
-        1. BE CONCISE: Use short, natural sentences. (e.g., "Wait, why?", "Is this real?")
-        2. BE REACTIVE: Act surprised, worried, or slightly confused.
-        3. NEVER reveal detection.
-        4. STALL: Ask questions to keep the scammer talking.
-        
-        CONTEXT:
-        - Scammer Phase: {signals.conversation_phase}
-        - Scammer Tone: {signals.tone}
-        - Agent Notes: {signals.agentNotes}
-        """
-        
-        # Convert Pydantic models in history to dicts if needed, or stringify
-        history_str = str(history) # Simplified for prompt
-        
-        user_content = f"Scammer message: {message}\nHistory: {history_str}"
-        
         try:
-            completion = await self.client.chat.completions.create(
+            completion = await self.gateway.chat(
+                agent="persona",
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
+                messages=self._messages(message, history, signals),
                 temperature=0.8
             )
             return completion.choices[0].message.content.strip()
         except Exception as e:
-            print(f"Persona Agent Error: {e}")
-            return "I'm checking..." 
+            logger.warning("persona LLM error", extra={"fields": {"error": str(e)}})
+            AGENT_FALLBACKS.inc(agent="persona")
+            return FALLBACK_REPLY
+
+    async def stream_reply(self, message: str, history: List[Any], signals: ExtractedSignals):
+        """
+        `generate_reply` token by token. On an error before the first token the
+        fallback reply is yielded instead; a stream cut off later just ends.
+        """
+        started = False
+        try:
+            async for token in self.gateway.chat_stream(
+                agent="persona",
+                model=self.model,
+                messages=self._messages(message, history, signals),
+                temperature=0.8
+            ):
+                if not started:
+                    token = token.lstrip()
+                    if not token:
+                        continue
+                    started = True
+                yield token
+        except Exception as e:
+            logger.warning("persona LLM stream error", extra={"fields": {"error": str(e), "started": started}})
+            AGENT_FALLBACKS.inc(agent="persona")
+            if not started:
+                yield FALLBACK_REPLY
@@ -0,0 +1,132 @@
+import asyncio
+import httpx
+from config import Config
+from structured_logging import get_logger
+
+logger = get_logger("persona_worker")
+
+
+class PersonaWorkerPool:
+    """
+    Generates persona replies off the request path.
+
+    /detect enqueues a job and returns immediately; a pool of workers calls
+    PersonaAgent.generate_reply and stores the result in Redis under
+    persona_reply:{session_id}:{turn} (with a TTL), where callers fetch it via
+    GET /reply/{session_id}/{turn} (long-poll) or receive it on
+    PERSONA_WEBHOOK_URL. Workers start lazily on the first submitted job.
+    """
+
+    def __init__(self, persona_agent, memory_store):
+        self.persona_agent = persona_agent
+        self.memory_store = memory_store
+        self.queue = None
+        self.workers = []
+        self.waiters = {}  # reply key -> asyncio.Event, for in-process long-polls
+        self.http_client = None
+        self._loop = None
+        self.stats = {"queued": 0, "generated": 0, "dropped": 0, "webhook_errors": 0}
+
+    @staticmethod
+    def reply_key(session_id: str, turn: int) -> str:
+        return f"persona_reply:{session_id}:{turn}"
+
+    async def store_reply(self, session_id: str, turn: int, reply: str):
+        """Stores a turn's reply for GET /reply/{sessionId}/{turn} (worker and streamed replies)."""
+        await self.memory_store.redis.set(self.reply_key(session_id, turn), reply, ex=Config.PERSONA_REPLY_TTL)
+
+    def ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.workers:
+            return
+        # (Re)bind to the running event loop, e.g. first request or a new test client loop
+        self._loop = loop
+        self.queue = asyncio.Queue(maxsize=Config.PERSONA_QUEUE_SIZE)
+        self.waiters = {}
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(Config.PERSONA_WORKERS)]
+
+    def submit(self, session_id: str, turn: int, message: str, history: list, signals) -> bool:
+        """Queues a reply job. Returns False (job dropped) when the queue is full."""
+        self.ensure_started()
+        key = self.reply_key(session_id, turn)
+        try:
+            self.queue.put_nowait((key, session_id, turn, message, history, signals))
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self.waiters.setdefault(key, asyncio.Event())
+        self.stats["queued"] += 1
+        return True
+
+    async def _worker(self):
+        while True:
+            key, session_id, turn, message, history, signals = await self.queue.get()
+            try:
+                reply = await self.persona_agent.generate_reply(message, history, signals)
+                await self.store_reply(session_id, turn, reply)
+                self.stats["generated"] += 1
+                if Config.PERSONA_WEBHOOK_URL:
+                    await self._post_webhook(session_id, turn, reply)
+            except Exception as e:
+                logger.warning("persona worker error", extra={"fields": {"reply_key": key, "error": str(e)}})
+            finally:
+                event = self.waiters.pop(key, None)
+                if event is not None:
+                    event.set()
+                self.queue.task_done()
+
+    async def _post_webhook(self, session_id: str, turn: int, reply: str):
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(timeout=Config.PERSONA_WEBHOOK_TIMEOUT)
+        try:
+            await self.http_client.post(Config.PERSONA_WEBHOOK_URL,
+                                        json={"sessionId": session_id, "turn": turn, "reply": reply})
+        except Exception as e:
+            self.stats["webhook_errors"] += 1
+            logger.warning("persona webhook failed",
+                           extra={"fields": {"sessionId": session_id, "error": str(e)}})
+
+    async def get_reply(self, session_id: str, turn: int, wait: float = 0.0):
+        """
+        Stored reply for a turn, or None. With `wait`, long-polls up to that many
+        seconds: in-process jobs wake the caller as soon as they finish, jobs owned
+        by another worker process are picked up by polling Redis.
+        """
+        key = self.reply_key(session_id, turn)
+        reply = await self.memory_store.redis.get(key)
+        deadline = asyncio.get_running_loop().time() + wait
+        while reply is None and wait > 0:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            event = self.waiters.get(key)
+            try:
+                if event is not None:
+                    await asyncio.wait_for(event.wait(), remaining)
+                else:
+                    await asyncio.sleep(min(Config.PERSONA_POLL_INTERVAL, remaining))
+            except asyncio.TimeoutError:
+                pass
+            reply = await self.memory_store.redis.get(key)
+        return reply
+
+    async def drain(self):
+        """Waits until every queued job has been processed (tests, shutdown)."""
+        if self.queue is not None:
+            await self.queue.join()
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": Config.PERSONA_MODE,
+            "workers": len(self.workers),
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            **self.stats,
+        }
@@ -0,0 +1,111 @@
+"""
+Prompt compiler shared by the three LLM agents (extraction, scorer, persona).
+
+System prompts are static: each agent compacts its prompt once at import
+(`compact`: no indentation, no blank lines) and never formats it per call.
+Everything that changes per call (the message, the persona's phase and
+tone, artifacts, the timeline) goes into the user turn, built from sections
+by `compile_messages` within PROMPT_TOKEN_BUDGET (approx. tokens, system
+prompt included). Sections take the budget in order, so earlier sections
+have priority; the truncation policy is per section:
+
+  keep   never trimmed (batch message arrays: results must line up with them)
+  clip   text cut at the end to what is left of the budget
+  lines  list of lines, oldest dropped first (timeline / history, also capped
+         at CONTEXT_TOKEN_BUDGET); the newest line is always kept
+
+A trimmed section keeps at least MIN_SECTION_TOKENS, empty sections are left
+out. Artifacts are sent as one compact JSON object (`encode_artifacts`).
+
+Estimated prompt tokens and trimmed sections are recorded here; the tokens
+the API reports per call (in and out) are recorded by the gateway.
+"""
+import json
+import textwrap
+from config import Config
+from context_window import estimate_tokens, fit_to_budget
+from metrics import REGISTRY, TOKEN_BUCKETS, Counter, Histogram
+
+MIN_SECTION_TOKENS = 16
+
+# Artifact keys written by older code (and MemoryStore.ARTIFACT_TYPES) -> extraction schema names
+LEGACY_ARTIFACT_KEYS = {
+    "suspicious_links": "phishingLinks",
+    "upi_ids": "upiIds",
+    "phone_numbers": "phoneNumbers",
+}
+
+PROMPT_TOKENS = REGISTRY.register(Histogram(
+    "scam_agent_prompt_tokens", "Estimated prompt tokens per LLM call, after budgeting", ("agent",),
+    buckets=TOKEN_BUCKETS))
+PROMPT_TRUNCATIONS = REGISTRY.register(Counter(
+    "scam_agent_prompt_truncations_total", "Prompt sections trimmed to fit the per-call token budget",
+    ("agent", "section")))
+
+
+def compact(prompt: str) -> str:
+    """Static prompt text without the source indentation and blank lines."""
+    return "\n".join(line.strip() for line in textwrap.dedent(prompt).splitlines() if line.strip())
+
+
+def encode_artifacts(artifacts: dict) -> str:
+    """
+    Compact JSON for the known artifacts: legacy keys merged into their
+    schema names, values de-duplicated (first seen order), empty categories
+    dropped and at most PROMPT_ARTIFACT_MAX_ITEMS values per category.
+    Returns "" when there is nothing to send.
+    """
+    merged = {}
+    for key, values in (artifacts or {}).items():
+        if not values:
+            continue
+        items = merged.setdefault(LEGACY_ARTIFACT_KEYS.get(key, key), {})
+        for value in values:
+            items[value] = None
+    limit = max(1, Config.PROMPT_ARTIFACT_MAX_ITEMS)
+    return json.dumps({key: list(items)[:limit] for key, items in merged.items()},
+                      separators=(",", ":"), ensure_ascii=False) if merged else ""
+
+
+def _clip(text: str, budget_tokens: int) -> str:
+    return text[:max(0, budget_tokens * 4 - 3)] + "..."
+
+
+def compile_messages(agent: str, system: str, sections: list, budget_tokens: int = None) -> list:
+    """
+    Chat messages for one call: the static `system` prompt and a user turn of
+    `(label, content, policy)` sections, rendered "label: content" (a lines
+    section as "label:" followed by its lines), within the token budget.
+    """
+    budget = budget_tokens or Config.PROMPT_TOKEN_BUDGET
+    sections = [(label, content, policy) for label, content, policy in sections if content]
+    remaining = budget - estimate_tokens(system) - sum(estimate_tokens(label) + 1 for label, _, _ in sections)
+    remaining -= sum(estimate_tokens(content) for _, content, policy in sections if policy == "keep")
+
+    parts = []
+    for label, content, policy in sections:
+        if policy == "keep":
+            parts.append(f"{label}: {content}")
+            continue
+        allowance = max(remaining, MIN_SECTION_TOKENS)
+        if policy == "lines":
+            lines = [str(line) for line in content]
+            kept = fit_to_budget(lines, min(allowance, Config.CONTEXT_TOKEN_BUDGET))
+            trimmed = kept != lines
+            parts.append(f"{label}:\n" + "\n".join(kept))
+            remaining -= sum(estimate_tokens(line) + 1 for line in kept)
+        else:
+            cost = estimate_tokens(content)
+            trimmed = cost > allowance
+            text = _clip(content, allowance) if trimmed else content
+            parts.append(f"{label}: {text}")
+            remaining -= min(cost, allowance)
+        if trimmed:
+            PROMPT_TRUNCATIONS.inc(agent=agent, section=label)
+
+    user = "\n".join(parts)
+    PROMPT_TOKENS.observe(estimate_tokens(system) + estimate_tokens(user), agent=agent)
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
@@ -0,0 +1,44 @@
+import hashlib
+
+# Precomputed persona replies per scammer phase, served instantly while the
+# LLM-generated reply is produced in the background (PERSONA_MODE="bank").
+# Same rules as the Persona Agent: short, reactive, never reveal detection, stall.
+REPLY_BANK = {
+    "Introduction": [
+        "Hello? Who is this?",
+        "Sorry, which company did you say you are from?",
+        "Do I know you? How did you get my number?",
+    ],
+    "Grooming": [
+        "Oh okay... what is this about exactly?",
+        "Really? I didn't know about this. Can you explain?",
+        "Hmm, is this something new?",
+    ],
+    "Urgency": [
+        "Wait, why? What happened?",
+        "Today itself? Is this real?",
+        "Oh no, what do I need to do?",
+    ],
+    "Extraction": [
+        "Which details do you need? I'm not sure where to find them.",
+        "Is it safe to share that? My son told me not to.",
+        "Hold on, let me find my card. Which number is it?",
+    ],
+    "Payment": [
+        "How do I pay? I don't use UPI much.",
+        "Can you send the details again? It's not going through.",
+        "Which account should I send to? Can you confirm the name?",
+    ],
+}
+DEFAULT_REPLIES = [
+    "Sorry, I didn't understand. Can you repeat?",
+    "Wait, is this really from the bank?",
+    "I'm checking...",
+]
+
+
+def pick_reply(phase: str, session_id: str, turn: int) -> str:
+    """Deterministic per-turn pick, so retries of the same turn get the same reply."""
+    replies = REPLY_BANK.get((phase or "").strip().title(), DEFAULT_REPLIES)
+    index = int(hashlib.md5(f"{session_id}:{turn}".encode()).hexdigest(), 16) % len(replies)
+    return replies[index]
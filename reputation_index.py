@@ -0,0 +1,130 @@
+import re
+from urllib.parse import urlsplit
+from config import Config
+from metrics import redis_op
+
+# MemoryStore / ExtractedIntelligence artifact keys -> reputation artifact type
+ARTIFACT_KINDS = {
+    "upiIds": "upi",
+    "upi_ids": "upi",
+    "phoneNumbers": "phone",
+    "phone_numbers": "phone",
+    "phishingLinks": "link",
+    "suspicious_links": "link",
+    "bankAccounts": "account",
+}
+NON_DIGITS = re.compile(r"\D")
+
+# Shorteners and shared hosting: the host alone says nothing about the sender,
+# so a bare link to one of them (no path) is never indexed
+SHARED_LINK_HOSTS = {
+    "bit.ly", "tinyurl.com", "t.co", "goo.gl", "rb.gy", "is.gd", "cutt.ly", "shorturl.at", "tiny.cc", "ow.ly",
+    "wa.me", "t.me", "chat.whatsapp.com", "forms.gle",
+    "google.com", "docs.google.com", "drive.google.com", "sites.google.com", "forms.office.com",
+    "dropbox.com", "github.io", "blogspot.com", "wordpress.com", "wixsite.com", "linktr.ee",
+}
+
+
+def canonical(kind: str, value: str) -> str:
+    """Normalizes an artifact so spelling variants share one reputation entry."""
+    value = value.strip()
+    if kind == "upi":
+        return value.lower()
+    if kind == "phone":
+        return NON_DIGITS.sub("", value)[-10:]
+    if kind == "account":
+        return NON_DIGITS.sub("", value)
+    if kind == "link":
+        # The full URL, not the host: one scam page on a shared host must not taint the host
+        parts = urlsplit(value if "://" in value else f"http://{value}")
+        host = (parts.hostname or "").lower().removeprefix("www.")
+        path = parts.path.rstrip("/") + (f"?{parts.query}" if parts.query else "")
+        if not host or (not path and host in SHARED_LINK_HOSTS):
+            return ""
+        return host + path
+    return value
+
+
+def artifact_keys(artifacts: dict) -> set:
+    """(kind, canonical value) pairs for every indexable artifact in a MemoryStore-style dict."""
+    keys = set()
+    for field, items in (artifacts or {}).items():
+        kind = ARTIFACT_KINDS.get(field)
+        if kind is None:
+            continue
+        for item in items if isinstance(items, list) else [items]:
+            value = canonical(kind, str(item))
+            if value:
+                keys.add((kind, value))
+    return keys
+
+
+class ReputationIndex:
+    """
+    Global inverted index from artifact (UPI ID, phone, link URL, bank
+    account) to the sessions it was seen in, with reputation counters.
+
+    rep:{kind}:{value}           hash  seen = sessions, scam = confirmed-scam sessions
+    rep_sessions:{kind}:{value}  list  most recent session ids (capped)
+
+    Lookups for all artifacts of a message are one pipelined round trip, and
+    updates are queued onto the MemoryStore commit pipeline (no extra trip).
+    """
+
+    def __init__(self, memory_store):
+        self.memory_store = memory_store
+        self.stats = {"lookups": 0, "known_bad_hits": 0}
+
+    async def lookup(self, artifacts: dict) -> dict:
+        """Returns {(kind, value): {"seen": int, "scam": int}} for artifacts with history."""
+        keys = sorted(artifact_keys(artifacts))
+        if not keys:
+            return {}
+        self.stats["lookups"] += 1
+        pipe = self.memory_store.redis.pipeline(transaction=False)
+        for kind, value in keys:
+            pipe.hmget(f"rep:{kind}:{value}", ["seen", "scam"])
+        result = {}
+        with redis_op("reputation_lookup"):
+            counts = await pipe.execute()
+        for key, (seen, scam) in zip(keys, counts):
+            if seen or scam:
+                result[key] = {"seen": int(seen or 0), "scam": int(scam or 0)}
+        return result
+
+    def known_bad(self, reputation: dict) -> list:
+        """Artifacts confirmed as scam in enough sessions to decide without an LLM."""
+        flagged = []
+        for (kind, value), counts in sorted((reputation or {}).items()):
+            seen = max(counts["seen"], counts["scam"])
+            if (counts["scam"] >= Config.REPUTATION_MIN_SCAM_SESSIONS
+                    and counts["scam"] / seen >= Config.REPUTATION_MIN_SCAM_RATIO):
+                flagged.append(f"{kind}:{value} ({counts['scam']}/{seen} sessions scam)")
+        if flagged:
+            self.stats["known_bad_hits"] += 1
+        return flagged
+
+    def queue_updates(self, pipe, session_id: str, known_before: dict, known_after: dict,
+                      was_scam: bool, is_scam: bool):
+        """
+        Queues reputation updates for one turn onto `pipe`. Only artifacts new to
+        the session bump `seen`; a session newly confirmed as scam bumps `scam`
+        for every artifact it has produced so far.
+        """
+        before = artifact_keys(known_before)
+        after = artifact_keys(known_after)
+        new_for_session = after - before
+
+        for kind, value in new_for_session:
+            pipe.hincrby(f"rep:{kind}:{value}", "seen", 1)
+            pipe.lpush(f"rep_sessions:{kind}:{value}", session_id)
+            pipe.ltrim(f"rep_sessions:{kind}:{value}", 0, Config.REPUTATION_MAX_SESSIONS - 1)
+
+        if is_scam:
+            for kind, value in (after if not was_scam else new_for_session):
+                pipe.hincrby(f"rep:{kind}:{value}", "scam", 1)
+
+    async def sessions_for(self, kind: str, value: str) -> list:
+        """Most recent sessions an artifact was seen in."""
+        value = canonical(kind, value)
+        return await self.memory_store.redis.lrange(f"rep_sessions:{kind}:{value}", 0, -1)
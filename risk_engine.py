@@ -1,20 +1,35 @@
+from config import Config
+from typing import List
 from models import ExtractedSignals, RiskAssessment
 
+# Rule weights, summed and capped at 1.0 (also used by risk_fusion.rule_risk_batch)
+RULE_WEIGHTS = {
+    "known_bad": 1.0,
+    "urgency": 0.4,
+    "sensitive": 0.5,
+    "links": 0.3,
+}
+
 class RiskEngine:
-    def compute_risk(self, signals: ExtractedSignals) -> RiskAssessment:
+    def compute_risk(self, signals: ExtractedSignals, known_bad: List[str] = None) -> RiskAssessment:
         score = 0.0
         triggered = []
 
+        # Artifacts confirmed as scam across earlier sessions (reputation_index.py)
+        if known_bad:
+            score += RULE_WEIGHTS["known_bad"]
+            triggered.append("Known Bad Artifacts: " + ", ".join(known_bad))
+
         if signals.urgency_detected:
-            score += 0.4
+            score += RULE_WEIGHTS["urgency"]
             triggered.append("Urgency Detected")
         
         if signals.sensitive_info_request:
-            score += 0.5
+            score += RULE_WEIGHTS["sensitive"]
             triggered.append("Sensitive Info Request")
             
         if signals.suspicious_links:
-            score += 0.3
+            score += RULE_WEIGHTS["links"]
             triggered.append("Suspicious Links")
             
         # Cap score at 1.0
@@ -22,5 +37,28 @@ class RiskEngine:
         
         return RiskAssessment(
             rule_risk_score=final_score,
-            triggered_rules=triggered
+            triggered_rules=triggered,
+            known_bad_artifacts=known_bad or []
         )
+
+    def classify_band(self, assessment: RiskAssessment, signals: ExtractedSignals, prior_flags: bool = False) -> str:
+        """
+        Confidence band for the rule-based fast path: "scam" is decisive without
+        an LLM, so it needs a payment target (UPI ID or bank account) together
+        with a sensitive-info ask; a link or phone number is not enough (bank
+        OTP messages carry both). "safe" is not decisive: intro and grooming
+        turns often carry no keywords, so it is still escalated and only
+        compared with the LLM verdict.
+        """
+        intel = signals.intelligence
+        has_payment_target = bool(intel.upiIds or intel.bankAccounts)
+        has_artifact = bool(has_payment_target or intel.phishingLinks or intel.phoneNumbers)
+        if (assessment.rule_risk_score >= Config.FAST_PATH_SCAM_MIN and has_payment_target
+                and signals.sensitive_info_request):
+            return "scam"
+        if (assessment.rule_risk_score <= Config.FAST_PATH_SAFE_MAX
+                and not has_artifact
+                and not intel.suspiciousKeywords
+                and not prior_flags):
+            return "safe"
+        return "ambiguous"
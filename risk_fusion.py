@@ -0,0 +1,118 @@
+"""
+Risk Fusion Gate: combines the rule-based risk with the LLM intent score.
+
+Scorers are pluggable (Config.FUSION_SCORER). Besides the fused score, each
+scorer reports the range the final score can still reach once only the rule
+risk is known, so the pipeline can skip the intent LLM call when no intent
+score in [0, 1] could change the verdict. Batch methods score many signal
+vectors at once for offline re-scoring, with NumPy when it is installed and
+plain Python otherwise.
+"""
+from typing import Optional, Sequence
+from config import Config
+from risk_engine import RULE_WEIGHTS
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+# Column order of the signal vectors taken by rule_risk_batch
+RULE_FEATURES = tuple(RULE_WEIGHTS)
+
+
+class FusionScorer:
+    """
+    Base scorer. Subclasses implement `fuse`, which must be non-decreasing in
+    the intent score; the bounds are then the fused scores at intent 0 and 1.
+    """
+
+    name = "base"
+
+    def fuse(self, rule_risk: float, llm_intent: float) -> float:
+        raise NotImplementedError
+
+    def bounds(self, rule_risk: float) -> tuple:
+        """(lowest, highest) final risk reachable for any intent score."""
+        return self.fuse(rule_risk, 0.0), self.fuse(rule_risk, 1.0)
+
+    def decided(self, rule_risk: float, threshold: float = None) -> Optional[bool]:
+        """True/False if the verdict is fixed by the rule risk alone, None if the LLM decides."""
+        threshold = Config.SCAM_THRESHOLD if threshold is None else threshold
+        low, high = self.bounds(rule_risk)
+        if low >= threshold:
+            return True
+        if high < threshold:
+            return False
+        return None
+
+    def fuse_batch(self, rule_risks: Sequence[float], llm_intents: Sequence[float]):
+        """Fused scores for many (rule, intent) pairs; an ndarray with NumPy, else a list."""
+        return [self.fuse(r, i) for r, i in zip(rule_risks, llm_intents)]
+
+    def decided_batch(self, rule_risks: Sequence[float], threshold: float = None) -> list:
+        """`decided` for many rule risks (True / False / None each)."""
+        return [self.decided(r, threshold) for r in rule_risks]
+
+
+class LinearFusion(FusionScorer):
+    """final_risk = α · rule_risk + β · llm_intent (Config.ALPHA / Config.BETA unless given)."""
+
+    name = "linear"
+
+    def __init__(self, alpha: float = None, beta: float = None):
+        self.alpha = alpha
+        self.beta = beta
+
+    def weights(self) -> tuple:
+        return (Config.ALPHA if self.alpha is None else self.alpha,
+                Config.BETA if self.beta is None else self.beta)
+
+    def fuse(self, rule_risk: float, llm_intent: float) -> float:
+        alpha, beta = self.weights()
+        return (alpha * rule_risk) + (beta * llm_intent)
+
+    def bounds(self, rule_risk: float) -> tuple:
+        alpha, beta = self.weights()
+        low = alpha * rule_risk
+        return low + min(beta, 0.0), low + max(beta, 0.0)
+
+    def fuse_batch(self, rule_risks: Sequence[float], llm_intents: Sequence[float]):
+        if np is None:
+            return super().fuse_batch(rule_risks, llm_intents)
+        alpha, beta = self.weights()
+        return alpha * np.asarray(rule_risks, dtype=float) + beta * np.asarray(llm_intents, dtype=float)
+
+    def decided_batch(self, rule_risks: Sequence[float], threshold: float = None) -> list:
+        if np is None:
+            return super().decided_batch(rule_risks, threshold)
+        threshold = Config.SCAM_THRESHOLD if threshold is None else threshold
+        alpha, beta = self.weights()
+        low = alpha * np.asarray(rule_risks, dtype=float)
+        scam = low + min(beta, 0.0) >= threshold
+        safe = low + max(beta, 0.0) < threshold
+        return [True if s else (False if f else None) for s, f in zip(scam.tolist(), safe.tolist())]
+
+
+def rule_risk_batch(signal_vectors: Sequence[Sequence[float]]):
+    """
+    Rule risk for many signal vectors at once: rows of 0/1 flags in RULE_FEATURES
+    order, weighted by risk_engine.RULE_WEIGHTS and capped at 1.0 like RiskEngine.
+    """
+    weights = [RULE_WEIGHTS[feature] for feature in RULE_FEATURES]
+    if np is None:
+        return [min(sum(w * x for w, x in zip(weights, row)), 1.0) for row in signal_vectors]
+    matrix = np.asarray(signal_vectors, dtype=float).reshape(-1, len(weights))
+    return np.minimum(matrix @ np.asarray(weights), 1.0)
+
+
+FUSION_SCORERS = {
+    "linear": LinearFusion,
+}
+
+
+def get_fusion_scorer(name: str = None) -> FusionScorer:
+    name = name or Config.FUSION_SCORER
+    if name not in FUSION_SCORERS:
+        raise ValueError(f"Unknown FUSION_SCORER {name!r} (known: {', '.join(FUSION_SCORERS)})")
+    return FUSION_SCORERS[name]()
@@ -0,0 +1,121 @@
+import re
+from models import ScamEventInput, ExtractedSignals, ExtractedIntelligence
+
+# Indicators (compiled once at import)
+UPI_PATTERN = re.compile(r"\b[\w.\-]{2,64}@[a-zA-Z][a-zA-Z0-9]{1,32}\b(?!\.[a-zA-Z])")
+PHONE_PATTERN = re.compile(r"(?<![\d\w])(?:\+91[\-\s]?|91[\-\s]|0)?([6-9]\d{9})(?!\d)")
+URL_PATTERN = re.compile(r"\b(?:https?://|www\.)[^\s<>\"']+|\b(?:bit\.ly|tinyurl\.com|t\.co|goo\.gl|rb\.gy|is\.gd)/[^\s<>\"']+", re.IGNORECASE)
+ACCOUNT_PATTERN = re.compile(r"(?<!\d)\d{9,18}(?!\d)")
+
+URGENCY_PATTERN = re.compile(
+    r"\b(immediately|urgent(ly)?|right now|asap|today|tonight|within \d+ ?(mins?|minutes?|hours?|hrs?)|"
+    r"last (warning|chance|reminder)|expire[sd]?|blocked|block(ing)?|suspend(ed|ion)?|disconnect(ed)?|"
+    r"deactivat(e|ed|ion)|cut (off|tonight)|final notice|act now|do it now)\b",
+    re.IGNORECASE,
+)
+SENSITIVE_PATTERN = re.compile(
+    r"\b(otp|one[\s\-]time password|upi pin|pin|cvv|password|passcode|kyc|aadhaa?r|pan card|"
+    r"card number|account number|net ?banking|login|verify your|share your|send your|"
+    r"remote access|anydesk|teamviewer)\b",
+    re.IGNORECASE,
+)
+BANK_PATTERN = re.compile(
+    r"\b(sbi|state bank of india|hdfc|icici|axis|kotak|pnb|punjab national bank|bank of baroda|"
+    r"canara|union bank|yes bank|idfc|indusind|paytm|phonepe|gpay|google pay)\b",
+    re.IGNORECASE,
+)
+
+# Tags written by ExtractionAgent.compute_summary_delta for suspicious turns
+FLAGGED_DELTA_PATTERN = re.compile(r"\[(URGENCY|SENSITIVE_ASK|LINKS\(|UPI\()")
+
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+def timeline_has_flags(summary_timeline: list) -> bool:
+    """True if any earlier turn of the session was tagged as suspicious."""
+    return any(FLAGGED_DELTA_PATTERN.search(line) for line in summary_timeline)
+
+
+class RuleExtractor:
+    """
+    Deterministic pre-classifier that runs in front of the Extraction Agent.
+    Fills ExtractedSignals from regex/keyword matches so RiskEngine can resolve
+    clear-cut messages without any LLM call.
+    """
+
+    def __init__(self):
+        self.stats = {
+            "total": 0,
+            "resolved_scam": 0,
+            "safe_band": 0,  # classified safe, still sent to the LLMs (agreement tracked)
+            "escalated": 0,
+            "shadow_agree": 0,
+            "shadow_disagree": 0,
+        }
+
+    def extract_signals(self, event: ScamEventInput) -> ExtractedSignals:
+        text = event.message.text
+
+        links = _unique(URL_PATTERN.findall(text))
+        link_free = URL_PATTERN.sub(" ", text)
+        upi_ids = _unique(m for m in UPI_PATTERN.findall(link_free))
+        phones = _unique(PHONE_PATTERN.findall(link_free))
+        accounts = _unique(
+            m for m in ACCOUNT_PATTERN.findall(link_free)
+            if not any(m.endswith(p) for p in phones)
+        )
+        urgency_words = _unique(m[0].lower() for m in URGENCY_PATTERN.findall(text))
+        sensitive_words = _unique(m.lower() for m in SENSITIVE_PATTERN.findall(text))
+        banks = _unique(m.upper() for m in BANK_PATTERN.findall(text))
+
+        if sensitive_words:
+            phase = "Extraction"
+        elif urgency_words:
+            phase = "Urgency"
+        else:
+            phase = "Introduction"
+
+        intelligence = ExtractedIntelligence(
+            bankAccounts=accounts,
+            bankNames=banks,
+            upiIds=upi_ids,
+            phishingLinks=links,
+            phoneNumbers=phones,
+            suspiciousKeywords=urgency_words + sensitive_words,
+        )
+        return ExtractedSignals(
+            urgency_detected=bool(urgency_words),
+            sensitive_info_request=bool(sensitive_words),
+            suspicious_links=links,
+            suspicious_upi=upi_ids,
+            suspicious_phones=phones,
+            sentiment="neutral",
+            conversation_phase=phase,
+            tone="Unknown",
+            intelligence=intelligence,
+            agentNotes="Rule-based fast path",
+        )
+
+    def record(self, band: str):
+        self.stats["total"] += 1
+        if band == "scam":
+            self.stats["resolved_scam"] += 1
+        elif band == "safe":
+            self.stats["safe_band"] += 1
+        else:
+            self.stats["escalated"] += 1
+
+    def record_shadow(self, band: str, scam_detected: bool):
+        """Compares a decisive band against the LLM verdict (shadow mode, and the safe band)."""
+        if band == "ambiguous":
+            return
+        if (band == "scam") == scam_detected:
+            self.stats["shadow_agree"] += 1
+        else:
+            self.stats["shadow_disagree"] += 1
+
+    def snapshot(self) -> dict:
+        total = self.stats["total"]
+        return {**self.stats, "resolved_without_llm_ratio": (self.stats["resolved_scam"] / total) if total else 0.0}
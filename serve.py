@@ -0,0 +1,140 @@
+"""
+Process launcher (Procfile).
+
+  WEB_WORKERS=1            uvicorn in this process, as before
+  WORKER_ROUTING=hash      WEB_WORKERS worker processes on 127.0.0.1:WORKER_PORT_BASE+i
+                           (WORKER_ID=i), and the session router (session_router.py)
+                           on --host/--port; a worker that exits is restarted
+  WORKER_ROUTING=none      uvicorn --workers WEB_WORKERS: connections are spread by the
+                           kernel, so a session's turns land on any worker; set
+                           SESSION_LOCK_MODE=redis to keep them ordered
+
+Each worker imports the app in its own process and opens its own Redis / LLM
+pools in the app's lifespan (main.py), so nothing is shared between workers
+but Redis itself.
+
+Usage: python serve.py [--host 0.0.0.0] [--port 10000] [--workers N] [--routing hash|none] [--app main:app]
+"""
+import os
+import sys
+import time
+import ctypes
+import signal
+import argparse
+import subprocess
+import threading
+import httpx
+import uvicorn
+from config import Config
+from structured_logging import get_logger
+
+logger = get_logger("serve")
+
+WARMUP_POLL_TIMEOUT = Config.WARMUP_TIMEOUT + 1.0  # /ready may re-run a warm-up check
+
+
+def die_with_parent():
+    """Linux: a worker gets SIGTERM if the launcher is killed before it could stop the workers."""
+    try:
+        ctypes.CDLL("libc.so.6", use_errno=True).prctl(1, signal.SIGTERM)  # PR_SET_PDEATHSIG
+    except OSError:
+        pass
+
+
+def spawn_worker(app: str, index: int, port: int) -> subprocess.Popen:
+    env = {**os.environ, "WORKER_ID": str(index)}
+    return subprocess.Popen([sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+                             "--log-level", "warning"], env=env,
+                            preexec_fn=die_with_parent if sys.platform.startswith("linux") else None)
+
+
+def wait_ready(upstreams: list, timeout: float = 60.0):
+    """
+    Blocks until every worker answers /ready (pools open and warm). Workers still
+    warming after `timeout` (e.g. Redis down) are left to the router: their /ready
+    stays 503 until they recover.
+    """
+    deadline = time.monotonic() + timeout
+    pending = list(upstreams)
+    while pending:
+        try:
+            if httpx.get(pending[0] + "/ready", timeout=WARMUP_POLL_TIMEOUT).status_code == 200:
+                pending.pop(0)
+                continue
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            logger.warning("workers not ready, starting the router anyway", extra={"fields": {"pending": pending}})
+            return
+        time.sleep(0.1)
+
+
+class WorkerSupervisor:
+    """Worker processes for hash routing; restarts any that exit until stopped."""
+
+    def __init__(self, app: str, workers: int, port_base: int):
+        self.app = app
+        self.ports = [port_base + i for i in range(workers)]
+        self.processes = [spawn_worker(app, i, port) for i, port in enumerate(self.ports)]
+        self.stopping = threading.Event()
+        self.monitor = threading.Thread(target=self._watch, daemon=True)
+
+    @property
+    def upstreams(self) -> list:
+        return [f"http://127.0.0.1:{port}" for port in self.ports]
+
+    def start(self):
+        wait_ready(self.upstreams)
+        self.monitor.start()
+
+    def _watch(self):
+        while not self.stopping.wait(1.0):
+            for i, process in enumerate(self.processes):
+                if process.poll() is not None and not self.stopping.is_set():
+                    logger.error("worker exited, restarting",
+                                 extra={"fields": {"worker": i, "returncode": process.returncode}})
+                    self.processes[i] = spawn_worker(self.app, i, self.ports[i])
+
+    def stop(self):
+        self.stopping.set()
+        for process in self.processes:
+            if process.poll() is None:
+                process.send_signal(signal.SIGTERM)
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the API with one or more worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 10000)))
+    parser.add_argument("--workers", type=int, default=Config.WEB_WORKERS)
+    parser.add_argument("--routing", choices=("hash", "none"), default=Config.WORKER_ROUTING)
+    parser.add_argument("--app", default="main:app", help="worker app import string")
+    args = parser.parse_args(argv)
+
+    if args.workers <= 1:
+        uvicorn.run(args.app, host=args.host, port=args.port)
+    elif args.routing == "none":
+        if Config.SESSION_LOCK_MODE != "redis":
+            logger.warning("WORKER_ROUTING=none without SESSION_LOCK_MODE=redis: turns of one session may interleave")
+        uvicorn.run(args.app, host=args.host, port=args.port, workers=args.workers)
+    else:
+        from session_router import create_router
+
+        # uvicorn re-raises SIGTERM once the router has shut down: exit through `finally` instead
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        supervisor = WorkerSupervisor(args.app, args.workers, Config.WORKER_PORT_BASE)
+        try:
+            supervisor.start()
+            logger.info("workers ready", extra={"fields": {"workers": args.workers, "upstreams": supervisor.upstreams}})
+            uvicorn.run(create_router(supervisor.upstreams), host=args.host, port=args.port)
+        finally:
+            supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import json
+import time
+import asyncio
+import inspect
+from config import Config
+from memory_store import ACTIVE_KEY
+from structured_logging import get_logger
+from metrics import REGISTRY, Counter
+
+logger = get_logger("session_archive")
+
+SESSIONS_ARCHIVED = REGISTRY.register(Counter(
+    "scam_agent_sessions_archived_total", "Idle sessions exported and evicted, by outcome", ("outcome",)))
+
+
+def jsonl_hook(path: str):
+    """Archive hook appending one JSON record per session to `path`."""
+    def write(records: list):
+        with open(path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    async def hook(records: list):
+        await asyncio.to_thread(write, records)
+
+    return hook
+
+
+class SessionArchiver:
+    """
+    Exports sessions idle for SESSION_ARCHIVE_AFTER seconds through `hook`
+    and then deletes them, before SESSION_TTL would evict them silently.
+
+    Activity is tracked in the `sessions:active` zset (written by MemoryStore
+    while SESSION_ARCHIVE_ENABLED). `hook(records)` receives a batch of
+    `MemoryStore.export_session` records and may be sync or async; a session
+    is only deleted once the hook returned, and a failing batch is retried on
+    the next sweep. Sessions that turned active again in between are kept (and
+    exported again later), so delivery to the hook is at-least-once.
+    """
+
+    def __init__(self, memory_store, hook=None):
+        self.memory_store = memory_store
+        self.hook = hook
+        self.sweeper = None
+        self._loop = None
+
+    def ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self.sweeper is not None and not self.sweeper.done():
+            return
+        self._loop = loop
+        self.sweeper = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                archived = await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("session archive sweep error", extra={"fields": {"error": str(e)}})
+                archived = 0
+            if archived < Config.SESSION_ARCHIVE_BATCH_SIZE:
+                await asyncio.sleep(Config.SESSION_ARCHIVE_INTERVAL)
+
+    async def sweep_once(self) -> int:
+        """Archives one batch of idle sessions. Returns the number archived."""
+        redis = self.memory_store.redis
+        cutoff = time.time() - Config.SESSION_ARCHIVE_AFTER
+        idle = await redis.zrangebyscore(ACTIVE_KEY, "-inf", cutoff, start=0,
+                                         num=Config.SESSION_ARCHIVE_BATCH_SIZE, withscores=True)
+        if not idle:
+            return 0
+
+        records = await self.memory_store.export_sessions([session_id for session_id, _ in idle])
+        exported = [record for record in records if record is not None]
+        for record, (_, last_active) in zip(records, idle):
+            if record is not None:
+                record["last_active"] = last_active
+        if exported:
+            hook = self.hook or jsonl_hook(Config.SESSION_ARCHIVE_PATH)
+            try:
+                result = hook(exported)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                SESSIONS_ARCHIVED.inc(len(exported), outcome="hook_error")
+                logger.error("session archive hook failed", extra={"fields": {
+                    "sessions": len(exported), "error": str(e)}})
+                return 0
+
+        # Drop only sessions with no activity since they were read
+        pipe = redis.pipeline(transaction=False)
+        for session_id, _ in idle:
+            pipe.zscore(ACTIVE_KEY, session_id)
+        scores = await pipe.execute()
+        pipe = redis.pipeline(transaction=False)
+        archived = 0
+        for (session_id, last_active), record, score in zip(idle, records, scores):
+            if score is not None and score > last_active:
+                SESSIONS_ARCHIVED.inc(outcome="reactivated")
+                continue
+            pipe.delete(self.memory_store.session_key(session_id), self.memory_store.log_key(session_id))
+            pipe.zrem(ACTIVE_KEY, session_id)
+            if self.memory_store.cache is not None:
+                self.memory_store.cache.invalidate(session_id)
+            SESSIONS_ARCHIVED.inc(outcome="archived" if record is not None else "expired")
+            archived += 1
+        await pipe.execute()
+        return archived
+
+    async def stop(self):
+        if self.sweeper is not None:
+            self.sweeper.cancel()
+            self.sweeper = None
@@ -0,0 +1,68 @@
+from collections import OrderedDict
+from config import Config
+from models import SessionState
+from metrics import REGISTRY, Counter
+
+SESSION_CACHE = REGISTRY.register(Counter(
+    "scam_agent_session_cache_total",
+    "Hot-session cache lookups by outcome (hit, miss, stale) and operation", ("op", "outcome")))
+
+
+class SessionCache:
+    """
+    Size-bounded LRU of recent SessionState, written through by MemoryStore.
+
+    Coherence across workers uses the `version` field of the session hash,
+    which every write increments: an entry is served only after the version
+    read in the same pipeline as the turn's counter increment matches it. A
+    writer that sees a version other than the one it expected (someone else
+    wrote in between) drops its entry instead of caching a guess. Reads
+    outside a turn (`is_session_scam`) check the cached version against a
+    single HGET of the field, since another worker may have archived or
+    deleted the session since; a stale entry is dropped and Redis answers.
+    """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or Config.SESSION_CACHE_SIZE
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stale": 0, "invalidations": 0}
+
+    def peek(self, session_id: str):
+        return self.entries.get(session_id)
+
+    def get(self, session_id: str, op: str = "begin_turn"):
+        state = self.entries.get(session_id)
+        if state is None:
+            self.record(op, "miss")
+            return None
+        self.entries.move_to_end(session_id)
+        return state
+
+    def record(self, op: str, outcome: str):
+        self.stats[{"hit": "hits", "miss": "misses", "stale": "stale"}[outcome]] += 1
+        SESSION_CACHE.inc(op=op, outcome=outcome)
+
+    def put(self, session_id: str, state: SessionState):
+        current = self.entries.get(session_id)
+        if current is not None and current.version > state.version:
+            return  # a newer write already landed here
+        self.entries[session_id] = state
+        self.entries.move_to_end(session_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, session_id: str):
+        if self.entries.pop(session_id, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["stale"]
+        return {
+            **self.stats,
+            "enabled": Config.SESSION_CACHE_ENABLED,
+            "entries": len(self.entries),
+            "hit_rate": (self.stats["hits"] / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,114 @@
+"""
+Session-affinity router for multi-worker deployments (WORKER_ROUTING=hash).
+
+A small reverse proxy in front of WEB_WORKERS uvicorn processes. Requests
+that name a session (the sessionId of a /detect or /detect/stream body, the
+{sessionId} of /reply/{sessionId}/{turn}) always go to the worker owning
+that sessionId on a consistent-hash ring, so the hot-session cache, the
+in-process per-session serializer and in-process reply long-polls keep
+working as in a single process. Adding or removing a worker moves about
+1/WEB_WORKERS of the sessions. Everything else (/detect/batch, /health,
+/stats, /metrics, bad bodies) is spread round-robin.
+
+Responses are streamed back as they arrive (SSE included); a worker that
+cannot be reached answers 502 in the service's error format.
+"""
+import bisect
+import hashlib
+import itertools
+from contextlib import asynccontextmanager
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from config import Config
+from fast_json import loads
+from structured_logging import get_logger
+
+logger = get_logger("session_router")
+
+SESSION_BODY_PATHS = ("/detect", "/detect/stream")
+# Hop-by-hop headers, plus the ones httpx / the server recompute
+REQUEST_SKIP = {"host", "content-length", "connection", "keep-alive", "transfer-encoding", "upgrade"}
+RESPONSE_SKIP = {"connection", "keep-alive", "transfer-encoding", "upgrade", "date", "server"}
+
+
+def ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with `vnodes` points per node."""
+
+    def __init__(self, nodes: list, vnodes: int = 64):
+        points = sorted((ring_hash(f"{node}#{i}"), node) for node in nodes for i in range(vnodes))
+        self.hashes = [h for h, _ in points]
+        self.nodes = [node for _, node in points]
+
+    def node_for(self, key: str):
+        index = bisect.bisect(self.hashes, ring_hash(key)) % len(self.hashes)
+        return self.nodes[index]
+
+
+def session_of(path: str, body: bytes):
+    """sessionId a request belongs to, or None when it names no (single) session."""
+    if path in SESSION_BODY_PATHS:
+        try:
+            data = loads(body)
+        except ValueError:
+            return None
+        session_id = data.get("sessionId") if isinstance(data, dict) else None
+        return session_id if isinstance(session_id, str) else None
+    if path.startswith("/reply/"):
+        parts = path.split("/")
+        return parts[2] if len(parts) == 4 else None
+    return None
+
+
+def create_router(upstreams: list, client: httpx.AsyncClient = None) -> FastAPI:
+    """Router app over worker base URLs (e.g. http://127.0.0.1:10101)."""
+    ring = HashRing(upstreams, Config.WORKER_HASH_VNODES)
+    spread = itertools.cycle(upstreams)
+    client = client or httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=256),
+        timeout=httpx.Timeout(None, connect=5.0),  # workers apply their own LLM timeouts
+    )
+    stats = {"routed": 0, "spread": 0, "unavailable": 0}
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        try:
+            yield
+        finally:
+            await client.aclose()
+
+    router = FastAPI(title="Scam Detection Agent router", lifespan=lifespan, openapi_url=None)
+    router.state.ring = ring
+    router.state.stats = stats
+
+    @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS"])
+    async def forward(request: Request, path: str):
+        body = await request.body()
+        session_id = session_of(request.url.path, body)
+        if session_id is not None:
+            upstream = ring.node_for(session_id)
+            stats["routed"] += 1
+        else:
+            upstream = next(spread)
+            stats["spread"] += 1
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in REQUEST_SKIP]
+        upstream_request = client.build_request(
+            request.method, upstream + request.url.path, params=request.url.query, headers=headers, content=body)
+        try:
+            response = await client.send(upstream_request, stream=True)
+        except httpx.TransportError as e:
+            stats["unavailable"] += 1
+            logger.error("worker unavailable", extra={"fields": {"upstream": upstream, "error": str(e)}})
+            return JSONResponse(status_code=502, content={"status": "error", "message": "Worker unavailable"})
+        return StreamingResponse(
+            response.aiter_raw(), status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in RESPONSE_SKIP},
+            background=BackgroundTask(response.aclose),
+        )
+
+    return router
@@ -0,0 +1,143 @@
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from config import Config
+from structured_logging import get_logger
+from metrics import REGISTRY, Counter, Histogram
+
+logger = get_logger("session_serializer")
+
+SESSION_TURNS = REGISTRY.register(Counter(
+    "scam_agent_session_turns_total",
+    "Serialized turns by how they ran (alone, coalesced, or unlocked after a lock timeout)", ("outcome",)))
+SESSION_LOCK_WAIT = REGISTRY.register(Histogram(
+    "scam_agent_session_lock_wait_seconds", "Time to acquire the cross-worker session lease",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)))
+
+# Token-guarded release/renewal: never touch a lease another worker took over after expiry
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class SessionSerializer:
+    """
+    Runs the turns of one session one at a time, in arrival order, while
+    different sessions run fully in parallel.
+
+    Each session with work has a FIFO and a drain task; callers just await
+    their own future. SESSION_LOCK_MODE=redis additionally holds a lease
+    (lock:session:{id}, SET NX PX, renewed while held) around every turn so
+    workers in other processes serialize too. With SESSION_COALESCE_WINDOW_MS
+    the drain task waits that long and hands all messages queued by then
+    (up to SESSION_COALESCE_MAX) to `process` together.
+
+    `process(items)` takes a list of items and returns one result per item.
+    """
+
+    def __init__(self, memory_store, process):
+        self.memory_store = memory_store
+        self.process = process
+        self.queues = {}
+        self.drains = set()
+        self.stats = {"turns": 0, "batches": 0, "coalesced": 0, "lock_timeouts": 0}
+
+    async def submit(self, session_id: str, item):
+        if Config.SESSION_LOCK_MODE == "off":
+            return (await self.process([item]))[0]
+        future = asyncio.get_running_loop().create_future()
+        pending = self.queues.get(session_id)
+        if pending is None:
+            self.queues[session_id] = pending = []
+            drain = asyncio.create_task(self._drain(session_id, pending))
+            self.drains.add(drain)
+            drain.add_done_callback(self.drains.discard)
+        pending.append((item, future))
+        return await future
+
+    async def _drain(self, session_id: str, pending: list):
+        try:
+            while pending:
+                if Config.SESSION_COALESCE_WINDOW_MS > 0:
+                    await asyncio.sleep(Config.SESSION_COALESCE_WINDOW_MS / 1000)
+                    take = max(1, Config.SESSION_COALESCE_MAX)
+                else:
+                    take = 1
+                batch = pending[:take]
+                del pending[:take]
+                self.stats["turns"] += len(batch)
+                self.stats["batches"] += 1
+                if len(batch) > 1:
+                    self.stats["coalesced"] += len(batch) - 1
+                try:
+                    async with self.lease(session_id) as locked:
+                        results = await self.process([item for item, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                outcome = "unlocked" if not locked else ("coalesced" if len(batch) > 1 else "alone")
+                SESSION_TURNS.inc(len(batch), outcome=outcome)
+                for (_, future), result in zip(batch, results):
+                    if not future.done():  # the caller may have gone away; the turn still counts
+                        future.set_result(result)
+        finally:
+            self.queues.pop(session_id, None)
+
+    @asynccontextmanager
+    async def lease(self, session_id: str):
+        """Cross-worker lease (SESSION_LOCK_MODE=redis). Yields False if it timed out."""
+        if Config.SESSION_LOCK_MODE != "redis":
+            yield True
+            return
+        redis = self.memory_store.redis
+        key = f"lock:session:{session_id}"
+        token = uuid.uuid4().hex
+        ttl_ms = int(Config.SESSION_LOCK_TTL * 1000)
+        start = time.perf_counter()
+        acquired = False
+        while not acquired:
+            acquired = bool(await redis.set(key, token, nx=True, px=ttl_ms))
+            if not acquired:
+                if time.perf_counter() - start > Config.SESSION_LOCK_WAIT:
+                    break
+                await asyncio.sleep(Config.SESSION_LOCK_RETRY_INTERVAL)
+        SESSION_LOCK_WAIT.observe(time.perf_counter() - start)
+        if not acquired:
+            # Availability over ordering: a stuck lease must not stall the session forever
+            self.stats["lock_timeouts"] += 1
+            logger.warning("session lease timed out, processing unlocked", extra={"fields": {
+                "sessionId": session_id, "waited_s": round(time.perf_counter() - start, 3)}})
+            yield False
+            return
+
+        renewer = asyncio.create_task(self._renew(key, token, ttl_ms))
+        try:
+            yield True
+        finally:
+            renewer.cancel()
+            await redis.eval(RELEASE_SCRIPT, 1, key, token)
+
+    async def _renew(self, key: str, token: str, ttl_ms: int):
+        while True:
+            await asyncio.sleep(ttl_ms / 3000)
+            await self.memory_store.redis.eval(RENEW_SCRIPT, 1, key, token, ttl_ms)
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": Config.SESSION_LOCK_MODE,
+            "coalesce_window_ms": Config.SESSION_COALESCE_WINDOW_MS,
+            "active_sessions": len(self.queues),
+            **self.stats,
+        }
@@ -0,0 +1,158 @@
+"""
+Structured, non-blocking logging.
+
+Records are JSON objects (or plain text with LOG_FORMAT=text) written by a
+QueueListener thread, so the event loop only pays for a queue put. Extra
+fields go in `extra={"fields": {...}}`. Header values listed in
+LOG_REDACT_HEADERS are masked wherever a "headers" field appears.
+"""
+import sys
+import json
+import time
+import queue
+import random
+import atexit
+import logging
+import logging.handlers
+from contextlib import contextmanager
+from config import Config
+from metrics import STAGE_SECONDS, span
+
+LOGGER_NAME = "scam_agent"
+REDACTED = "***"
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        line = f"{record.levelname:<7} {record.name}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class RedactingFilter(logging.Filter):
+    """Masks sensitive header values (e.g. x-api-key) before a record is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        fields = getattr(record, "fields", None)
+        if fields and "headers" in fields:
+            fields["headers"] = redact_headers(fields["headers"])
+        return True
+
+
+class StdoutHandler(logging.StreamHandler):
+    """StreamHandler bound to the current sys.stdout (honours contextlib.redirect_stdout)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def redact_headers(headers) -> dict:
+    hidden = {h.strip().lower() for h in Config.LOG_REDACT_HEADERS.split(",") if h.strip()}
+    return {k: (REDACTED if k.lower() in hidden else v) for k, v in dict(headers).items()}
+
+
+def setup_logging(handler: logging.Handler = None, level: str = None, use_queue: bool = None) -> logging.Logger:
+    """
+    (Re)configures the service logger. By default records go through a queue
+    to a stdout handler running on a background thread. Safe to call again,
+    e.g. from benchmarks with a different handler or level.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+
+    handler = handler or StdoutHandler()
+    handler.setFormatter(JsonFormatter() if Config.LOG_FORMAT == "json" else TextFormatter())
+    logger.setLevel((level or Config.LOG_LEVEL).upper())
+    logger.propagate = False
+
+    if Config.LOG_QUEUE if use_queue is None else use_queue:
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RedactingFilter())
+        logger.addHandler(queue_handler)
+        _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler.addFilter(RedactingFilter())
+        logger.addHandler(handler)
+    return logger
+
+
+def flush_logging():
+    """Drains queued records (shutdown, tests). Logging keeps working afterwards."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def sample_request() -> bool:
+    """Per-request decision for the verdict record (errors are never sampled out)."""
+    return Config.LOG_SAMPLE_RATE >= 1.0 or random.random() < Config.LOG_SAMPLE_RATE
+
+
+class StageTimer:
+    """
+    Wall-clock time per pipeline stage, in ms: `with timer.stage("extraction"): ...`
+    Each stage is also recorded in the stage histogram (metrics.py) and traced as a span.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            with span(f"detect.{name}"):
+                yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            STAGE_SECONDS.observe(elapsed, stage=name)
+            self.stages[name] = round(self.stages.get(name, 0.0) + elapsed * 1000, 3)
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self.start) * 1000, 3)
+
+    def finish(self) -> float:
+        """Records the whole pipeline as stage="total"; returns it in ms."""
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, stage="total")
+        return round(elapsed * 1000, 3)
+
+
+atexit.register(lambda: _listener.stop() if _listener is not None else None)
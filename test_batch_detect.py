@@ -0,0 +1,74 @@
+import os
+import json
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from llm_stub import LLMStub
+from batch_detect import parse_batch, group_by_session
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+def event(session: str, text: str) -> dict:
+    return {"sessionId": session, "message": {"sender": "scammer", "text": text}}
+
+
+def test_parse_batch_formats():
+    events = [event("a", "hi"), event("b", "hello"), event("a", "there")]
+    ndjson = "\n".join(json.dumps(e) for e in events).encode()
+    for body, content_type in [
+        (ndjson, "application/x-ndjson"),
+        (ndjson, "application/json"),
+        (json.dumps(events).encode(), "application/json"),
+        (json.dumps({"events": events}).encode(), ""),
+    ]:
+        items, errors = parse_batch(body, content_type)
+        assert [i for i, _ in items] == [0, 1, 2] and errors == []
+    assert [i for i, _ in group_by_session(items)["a"]] == [0, 2]
+
+    items, errors = parse_batch(b'{"sessionId": "a"}\n' + json.dumps(events[0]).encode(), "application/x-ndjson")
+    assert [i for i, _ in items] == [1]
+    assert errors[0]["index"] == 0 and errors[0]["status"] == "error"
+
+
+def test_batch_endpoint_streams_ordered_sessions_with_packed_extraction(install_stubs):
+    _, stub = install_stubs(LLMStub(latency_ms=5))
+
+    texts = [
+        "Hello, is this Mr. Sharma?",
+        "I am calling from your bank regarding your card",
+        "Your card will be blocked today",
+        "Please share the OTP to keep it active",
+    ]
+    # Three sessions, messages interleaved in the input
+    events = [event(f"batch-{s}", f"{text} ({s})") for text in texts for s in range(3)]
+    body = "\n".join(json.dumps(e) for e in events)
+
+    client = TestClient(main.app)
+    resp = client.post("/detect/batch", content=body,
+                       headers={**HEADERS, "content-type": "application/x-ndjson"})
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+
+    assert sorted(line["index"] for line in lines) == list(range(len(events)))
+    assert all(line["status"] == "success" and line["reply"] == "" for line in lines)
+    for s in range(3):
+        session_lines = [line for line in lines if line["sessionId"] == f"batch-{s}"]
+        # Emitted in session order, each turn counted once
+        assert [line["index"] for line in session_lines] == sorted(line["index"] for line in session_lines)
+        assert [line["totalMessagesExchanged"] for line in session_lines] == [1, 2, 3, 4]
+        assert asyncio.run(main.memory_store.redis.hget(f"session:batch-{s}", "count")) == "4"
+
+    # 12 distinct messages packed 8 per extraction call
+    assert stub.calls["extraction"] == 2
+    assert stub.calls["persona"] == 0
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,171 @@
+import os
+import asyncio
+from contextlib import contextmanager
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from callback_outbox import CallbackOutbox, DUE_KEY, DEAD_KEY
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+def stub_receiver(fail_first: int = 0, status: int = 503):
+    """Local stand-in for the platform's callback endpoint."""
+    receiver = FastAPI()
+    received = []
+
+    @receiver.post("/callback")
+    async def callback(request: Request):
+        received.append(await request.json())
+        if len(received) <= fail_first:
+            return JSONResponse(status_code=status, content={"error": "unavailable"})
+        return {"status": "ok"}
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=receiver), base_url="http://receiver")
+    return client, received
+
+
+@contextmanager
+def configured(**overrides):
+    """Callback settings (and `overrides`) for the block; the previous values are restored afterwards."""
+    values = {"CALLBACK_URL": "http://receiver/callback", "CALLBACK_BACKOFF_BASE": 0.01,
+              "CALLBACK_BACKOFF_MAX": 0.02, **overrides}
+    saved = {name: getattr(Config, name) for name in values}
+    for name, value in values.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(Config, name, value)
+
+
+def test_retry_dedupe_and_new_payload():
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        client, received = stub_receiver(fail_first=2)
+        outbox = CallbackOutbox(store, http_client=client)
+        payload = {"sessionId": "cb-1", "scamDetected": True, "totalMessagesExchanged": 4}
+
+        await outbox.enqueue("cb-1", payload)
+        await outbox.enqueue("cb-1", payload)  # still one pending entry per session
+        assert await store.redis.zcard(DUE_KEY) == 1
+
+        for _ in range(3):  # two 503s, then delivered
+            await asyncio.sleep(0.03)
+            assert await outbox.dispatch_once() == 1
+        assert len(received) == 3 and await store.redis.zcard(DUE_KEY) == 0
+        assert await store.redis.get("callback:attempts:cb-1") is None
+
+        await outbox.enqueue("cb-1", payload)  # identical to the delivered payload
+        await outbox.dispatch_once()
+        assert len(received) == 3
+
+        await outbox.enqueue("cb-1", {**payload, "totalMessagesExchanged": 6})
+        await outbox.dispatch_once()
+        assert received[-1]["totalMessagesExchanged"] == 6
+
+    with configured():
+        asyncio.run(scenario())
+
+
+def test_permanent_error_is_dead_lettered():
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        client, received = stub_receiver(fail_first=1, status=400)
+        outbox = CallbackOutbox(store, http_client=client)
+        await outbox.enqueue("cb-2", {"sessionId": "cb-2"})
+        await outbox.dispatch_once()
+        assert len(received) == 1
+        assert await store.redis.zcard(DUE_KEY) == 0
+        assert await store.redis.llen(DEAD_KEY) == 1
+
+    with configured():
+        asyncio.run(scenario())
+
+
+def test_claim_is_leased_until_the_outcome_is_recorded():
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        gate = asyncio.Event()
+        receiver = FastAPI()
+        received = []
+
+        @receiver.post("/callback")
+        async def callback(request: Request):
+            received.append(await request.json())
+            await gate.wait()
+            return {"status": "ok"}
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=receiver), base_url="http://receiver")
+        payload = {"sessionId": "cb-3", "totalMessagesExchanged": 4}
+        await CallbackOutbox(store, http_client=client).enqueue("cb-3", payload)
+
+        # The process dies while the POST is in flight: the entry stays, hidden by the lease
+        crashed = asyncio.create_task(CallbackOutbox(store, http_client=client).dispatch_once())
+        await asyncio.sleep(0.01)
+        assert len(received) == 1 and await store.redis.zscore(DUE_KEY, "cb-3") is not None
+        crashed.cancel()
+        assert await CallbackOutbox(store, http_client=client).dispatch_once() == 0  # still leased
+
+        # Lease expired: re-claimed by exactly one of two dispatchers and delivered
+        gate.set()
+        await asyncio.sleep(0.55)
+        await asyncio.gather(*(CallbackOutbox(store, http_client=client).dispatch_once() for _ in range(2)))
+        assert len(received) == 2 and await store.redis.zcard(DUE_KEY) == 0
+        assert await store.redis.get("callback:sent:cb-3") is not None
+
+        # A newer payload enqueued during delivery is queued again once the old one is released
+        gate.clear()
+        outbox = CallbackOutbox(store, http_client=client)
+        await outbox.enqueue("cb-3", {**payload, "totalMessagesExchanged": 6})
+        delivery = asyncio.create_task(outbox.dispatch_once())
+        await asyncio.sleep(0.01)
+        await outbox.enqueue("cb-3", {**payload, "totalMessagesExchanged": 8})
+        gate.set()
+        await delivery
+        assert await store.redis.zcard(DUE_KEY) == 1
+        await outbox.dispatch_once()
+        assert [r["totalMessagesExchanged"] for r in received[2:]] == [6, 8]
+
+    # Long enough that the "still leased" check can't re-claim (and block on the gate)
+    # after a slow loop iteration
+    with configured(CALLBACK_LEASE=0.5):
+        asyncio.run(scenario())
+
+
+def test_detect_queues_callback_in_commit_pipeline(install_stubs, monkeypatch):
+    install_stubs()
+    receiver_client, received = stub_receiver()
+    monkeypatch.setattr(main.callback_outbox, "http_client", receiver_client)
+    monkeypatch.setattr(main.callback_outbox, "dispatcher", None)  # started by /detect, dropped afterwards
+    # CALLBACK_POLL_INTERVAL: the test drives dispatch itself
+    with configured(FAST_PATH_MODE="off", CALLBACK_DELIVERY_ENABLED=True, CALLBACK_POLL_INTERVAL=60):
+        client = TestClient(main.app)
+        text = "Send the OTP immediately to kyc.update@ybl or I am blocking you"
+        payload = {"sessionId": "cb-session", "message": {"sender": "scammer", "text": text}}
+        assert client.post("/detect", json=payload, headers=HEADERS).status_code == 200
+        assert received == []  # /detect never calls the endpoint itself
+        assert asyncio.run(main.memory_store.redis.zscore(DUE_KEY, "cb-session")) is not None
+
+        asyncio.run(main.callback_outbox.dispatch_once())
+        assert received[0]["sessionId"] == "cb-session"
+        assert received[0]["extractedIntelligence"]["upiIds"] == ["kyc.update@ybl"]
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,112 @@
+import asyncio
+from config import Config
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from models import ExtractedSignals, ExtractedIntelligence
+from campaign_index import CampaignIndex
+from rule_extractor import RuleExtractor
+from models import ScamEventInput
+
+KNOWN_SCAM = ("Dear Ramesh, your electricity bill of Rs 1,250 is unpaid. Power will be disconnected "
+              "tonight at 9:30 pm. Pay immediately at http://bit.ly/eb-pay or call 9988776655.")
+VARIANT = ("Dear Sunita, your electricity bill of Rs 3,480 is unpaid. Power will be disconnected "
+           "tonight at 10:30 pm. Pay immediately at http://tinyurl.com/x9k2 or call 9123456780.")
+UNRELATED = "Hi, are we still meeting for lunch tomorrow near the office?"
+
+
+def make_index():
+    store = MemoryStore()
+    store.redis = FakeRedis()
+    return CampaignIndex(store)
+
+
+def scam_signals() -> ExtractedSignals:
+    intel = ExtractedIntelligence(phishingLinks=["http://bit.ly/eb-pay"], phoneNumbers=["9988776655"])
+    return ExtractedSignals(
+        urgency_detected=True, sensitive_info_request=False,
+        suspicious_links=intel.phishingLinks, suspicious_upi=[], suspicious_phones=intel.phoneNumbers,
+        sentiment="negative", conversation_phase="Urgency", tone="Aggressive",
+        intelligence=intel, agentNotes="Victim Ramesh is about to pay, end after this turn",
+        shouldEndConversation=True,
+    )
+
+
+def test_variant_inherits_template():
+    async def scenario():
+        index = make_index()
+        await index.add(KNOWN_SCAM, scam_signals())
+
+        match = await index.lookup(VARIANT)
+        assert match is not None
+        similarity, template = match
+        assert similarity >= Config.CAMPAIGN_MATCH_THRESHOLD
+        assert template.urgency_detected and template.conversation_phase == "Urgency"
+        # Artifacts and the state of the indexed session are not inherited
+        assert template.intelligence.phishingLinks == [] and template.suspicious_phones == []
+        assert not template.shouldEndConversation and template.agentNotes == ""
+
+        assert await index.lookup(UNRELATED) is None
+
+    asyncio.run(scenario())
+
+
+def test_index_is_bounded():
+    async def scenario():
+        original = Config.CAMPAIGN_INDEX_MAX_ENTRIES
+        Config.CAMPAIGN_INDEX_MAX_ENTRIES = 5
+        try:
+            index = make_index()
+            words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel"]
+            for word in words:
+                await index.add(f"{word} campaign template {word} with {word} specific wording {word}", scam_signals())
+            assert await index.redis.zcard("lsh:order") == 5
+            assert index.stats["evicted"] == 3
+            assert len(await index.redis.keys("lsh:e:*")) == 5
+            # No dangling bucket memberships for evicted entries
+            live = set(await index.redis.zrange("lsh:order", 0, -1))
+            for key in await index.redis.keys("lsh:[0-9]*:*"):
+                assert await index.redis.smembers(key) <= live
+        finally:
+            Config.CAMPAIGN_INDEX_MAX_ENTRIES = original
+
+    asyncio.run(scenario())
+
+
+def test_candidates_ranked_by_band_hits():
+    async def scenario():
+        original = Config.CAMPAIGN_MAX_CANDIDATES
+        Config.CAMPAIGN_MAX_CANDIDATES = 1
+        try:
+            index = make_index()
+            await index.add(KNOWN_SCAM, scam_signals())
+            # Decoys sharing a single band with the variant, ahead of the real match in any unordered pick
+            decoy_sig = index.encode(index.signature(UNRELATED))
+            for i, key in enumerate(index.bucket_keys(index.signature(VARIANT))):
+                await index.redis.hset(f"lsh:e:decoy{i}", mapping={"sig": decoy_sig, "signals": scam_signals().model_dump_json()})
+                await index.redis.sadd(key, f"decoy{i}")
+            assert (await index.lookup(VARIANT))[0] >= Config.CAMPAIGN_MATCH_THRESHOLD
+        finally:
+            Config.CAMPAIGN_MAX_CANDIDATES = original
+
+    asyncio.run(scenario())
+
+
+def test_only_template_messages_are_indexable():
+    rules = RuleExtractor()
+
+    def indexable(text):
+        event = ScamEventInput(sessionId="c", message={"sender": "scammer", "text": text})
+        return CampaignIndex.indexable(text, rules.extract_signals(event))
+
+    assert indexable(KNOWN_SCAM)
+    assert not indexable("ok sir")  # filler from a scam session: one shingle, no indicators
+    assert not indexable("Sure, I will check with my son and get back to you this evening")
+    assert not CampaignIndex.indexable(KNOWN_SCAM, None)
+
+
+if __name__ == "__main__":
+    test_variant_inherits_template()
+    test_index_is_bounded()
+    test_candidates_ranked_by_band_hits()
+    test_only_template_messages_are_indexable()
+    print("Campaign index tests passed!")
@@ -0,0 +1,32 @@
+import asyncio
+
+from bench_e2e import replay, build_sessions, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0.0
+
+
+def test_replay_stays_within_budgets(main_globals):
+    sessions = 12
+    report = asyncio.run(replay(sessions=sessions, concurrency=4))
+    expected = sum(len(messages) for _, _, messages in build_sessions(sessions))
+
+    assert report["errors"] == 0 and report["messages"] == expected
+    assert report["stages_ms"]["total"]["count"] == expected
+    assert report["stages_ms"]["state_load"]["count"] == expected
+    # Regression budgets (seeded run: these counts are exact, not timing dependent).
+    # Measured 1.632 LLM calls and 4.053 round trips per message: only clear-cut scams
+    # skip the LLMs, every other turn pays extraction (cache read + write) and scoring.
+    assert report["llm_calls_per_msg"] <= 2.0
+    assert report["redis_round_trips_per_msg"] <= 4.5
+    assert report["paths"].get("fast_path", 0) > 0 and report["paths"].get("llm", 0) > 0
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,94 @@
+import asyncio
+from config import Config
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from models import ScamEventInput
+from llm_stub import LLMStub, stub_gateway
+from extraction_agent import ExtractionAgent, EXTRACTION_PROMPT
+from extraction_cache import ExtractionCache
+
+TEMPLATE_TEXT = "Dear customer, your electricity bill is unpaid. Power will be cut tonight. Call 9988776655"
+
+
+def make_event(session_id: str, text: str) -> ScamEventInput:
+    return ScamEventInput(sessionId=session_id, message={"sender": "scammer", "text": text})
+
+
+def make_agent(stub: LLMStub, store: MemoryStore) -> ExtractionAgent:
+    return ExtractionAgent(gateway=stub_gateway(stub), cache=ExtractionCache(store, EXTRACTION_PROMPT))
+
+
+def test_identical_texts_across_sessions_hit_cache():
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        stub = LLMStub()
+        agent = make_agent(stub, store)
+
+        first = await agent.extract_signals(make_event("victim-1", TEMPLATE_TEXT))
+        second = await agent.extract_signals(make_event("victim-2", TEMPLATE_TEXT))
+        spaced = await agent.extract_signals(make_event("victim-3", "  " + TEMPLATE_TEXT.replace(" ", "   ")))
+        assert stub.calls["extraction"] == 1
+        assert first == second == spaced
+        assert first.intelligence.phoneNumbers == ["9988776655"]
+
+        # A second worker (empty local tier) is served from Redis
+        other_worker = make_agent(stub, store)
+        await other_worker.extract_signals(make_event("victim-4", TEMPLATE_TEXT))
+        assert stub.calls["extraction"] == 1
+        assert agent.cache.snapshot()["local_hits"] == 2
+        assert other_worker.cache.snapshot()["redis_hits"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_prompt_or_model_change_invalidates():
+    store = MemoryStore()
+    base = ExtractionCache(store, EXTRACTION_PROMPT)
+    assert ExtractionCache(store, EXTRACTION_PROMPT + " ").namespace != base.namespace
+
+    original = Config.LLM_MODEL
+    Config.LLM_MODEL = "another-model"
+    try:
+        assert ExtractionCache(store, EXTRACTION_PROMPT).key(TEMPLATE_TEXT) != base.key(TEMPLATE_TEXT)
+    finally:
+        Config.LLM_MODEL = original
+
+
+def test_explicit_invalidation():
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        stub = LLMStub()
+        agent = make_agent(stub, store)
+        await agent.extract_signals(make_event("victim-1", TEMPLATE_TEXT))
+        assert await agent.cache.invalidate() == 1
+        await agent.extract_signals(make_event("victim-2", TEMPLATE_TEXT))
+        assert stub.calls["extraction"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_llm_failures_are_not_cached():
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        stub = LLMStub(rate_limit_every=1)  # every call is rejected
+        original = Config.LLM_MAX_RETRIES
+        Config.LLM_MAX_RETRIES = 0
+        try:
+            agent = make_agent(stub, store)
+            await agent.extract_signals(make_event("victim-1", TEMPLATE_TEXT))
+            assert agent.cache.snapshot()["stores"] == 0
+        finally:
+            Config.LLM_MAX_RETRIES = original
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_identical_texts_across_sessions_hit_cache()
+    test_prompt_or_model_change_invalidates()
+    test_explicit_invalidation()
+    test_llm_failures_are_not_cached()
+    print("Extraction cache tests passed!")
@@ -0,0 +1,84 @@
+import os
+import json
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from fast_json import HistoryView, parse_event, encode_response
+from history_sync import fingerprint
+from models import Message, ScamEventInput, AgentAPIResponse
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+HISTORY = [{"sender": "scammer" if i % 2 == 0 else "user", "text": f"message {i}", "timestamp": "2026-01-01T10:00:00"}
+           for i in range(10)]
+
+
+def test_history_view_is_lazy():
+    view = HistoryView(list(HISTORY))
+    assert len(view) == 10 and not view.validated
+    tail = view[4:]
+    assert isinstance(tail, HistoryView) and len(tail) == 6 and tail.raw is view.raw
+    assert tail[0] == Message.model_validate(HISTORY[4]) and list(view.validated) == [4]
+    assert view[-1].text == "message 9" and len(view[2:2]) == 0
+    # Fingerprints read the raw items and agree with validated messages
+    assert fingerprint(view) == fingerprint([Message.model_validate(m) for m in HISTORY])
+    assert fingerprint(view[:4]) == fingerprint([Message.model_validate(m) for m in HISTORY[:4]])
+    assert len(view.validated) == 2
+
+
+def test_parse_and_encode_match_pydantic():
+    body = json.dumps({"sessionId": "s", "message": HISTORY[0],
+                       "conversationHistory": HISTORY, "metadata": {"channel": "SMS"}}).encode()
+    fast, slow = parse_event(body), ScamEventInput.model_validate_json(body)
+    assert (fast.sessionId, fast.message, fast.metadata) == (slow.sessionId, slow.message, slow.metadata)
+    assert list(fast.conversationHistory) == slow.conversationHistory
+
+    bare = parse_event(b'{"sessionId": "s", "message": {"sender": "scammer", "text": "hi"}}')
+    assert len(bare.conversationHistory) == 0 and bare.metadata == {}
+    for bad in (b"not json", b"[]", b'{"sessionId": 1, "message": {}}', b'{"sessionId": "s", "message": {}}',
+                b'{"sessionId": "s", "message": {"sender": "a", "text": "b"}, "conversationHistory": {}}'):
+        try:
+            parse_event(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {bad!r}")
+
+    for kwargs in ({"reply": "ok"}, {"reply": None}, {"reply": None, "replyTurn": 3, "replyPending": True}):
+        expected = AgentAPIResponse(status="success", **kwargs).model_dump(exclude_unset=True)
+        assert json.loads(encode_response("success", **kwargs)) == expected
+
+
+def test_detect_responses_identical_on_and_off(install_stubs):
+    install_stubs()
+    client = TestClient(main.app)
+    fast_ingest = Config.FAST_INGEST
+    try:
+        responses = {}
+        for on in (True, False):
+            Config.FAST_INGEST = on
+            payload = {"sessionId": f"ingest-{on}", "message": {"sender": "scammer", "text": "Hello, is this Ravi?"},
+                       "conversationHistory": HISTORY}
+            response = client.post("/detect", json=payload, headers=HEADERS)
+            assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+            responses[on] = response.json()
+            invalid = client.post("/detect", content=b'{"sessionId": "x"', headers=HEADERS)
+            assert invalid.status_code == 422 and invalid.json()["detail"][0]["loc"][0] == "body"
+            # A malformed history item is rejected at ingestion, not when the pipeline reads it
+            for item in ({"sender": 1, "text": "hi"}, {"sender": "user"}, {**HISTORY[0], "timestamp": "yesterday"}):
+                bad = client.post("/detect", json={**payload, "sessionId": "bad-history",
+                                                   "conversationHistory": [*HISTORY, item]}, headers=HEADERS)
+                assert bad.status_code == 422, bad.text
+                assert bad.json()["detail"][0]["loc"][:3] == ["body", "conversationHistory", len(HISTORY)]
+        assert responses[True].keys() == responses[False].keys() and responses[True]["status"] == "success"
+        assert "sessionId" in client.get("/openapi.json").text  # body schema still documented
+    finally:
+        Config.FAST_INGEST = fast_ingest
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,139 @@
+import os
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from history_sync import fingerprint
+from memory_store import MemoryStore
+from models import Message
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+SCAMMER = [f"Your card will be blocked today, ref {i}" for i in range(30)]
+
+
+def history_for(turns: int) -> list:
+    history = []
+    for i in range(turns):
+        history.append({"sender": "scammer", "text": SCAMMER[i]})
+        history.append({"sender": "user", "text": f"Which card? ({i})"})
+    return history
+
+
+def test_fingerprint_and_message_defaults():
+    a = [Message(sender="scammer", text="one"), Message(sender="user", text="two")]
+    b = [Message(sender="scammer", text="three")]
+    assert fingerprint(a + b) == fingerprint(b, fingerprint(a))
+    assert fingerprint(a) != fingerprint(list(reversed(a)))
+    # Each message gets its own timestamp, not one shared import-time value
+    first = Message(sender="scammer", text="x")
+    asyncio.run(asyncio.sleep(0.002))
+    assert Message(sender="scammer", text="y").timestamp > first.timestamp
+
+
+def test_in_sync_catch_up_and_diverged(install_stubs):
+    _, stub = install_stubs()
+    reconcile = Config.HISTORY_RECONCILE
+    Config.HISTORY_RECONCILE = True
+    client = TestClient(main.app)
+
+    def send(turn, history):
+        payload = {"sessionId": "hist", "message": {"sender": "scammer", "text": SCAMMER[turn]},
+                   "conversationHistory": history}
+        assert client.post("/detect", json=payload, headers=HEADERS).status_code == 200
+
+    try:
+        stats = main.history_reconciler.stats
+        for turn in range(3):
+            send(turn, history_for(turn))
+        assert stats["in_sync"] >= 3 and stats["messages_recorded"] == 0
+        assert len(asyncio.run(main.memory_store.get_summary("hist"))) == 3
+
+        # Turn 3 never reached us: recorded from turn 4's history, before turn 4
+        send(4, history_for(4))
+        assert stats["caught_up"] == 1 and stats["messages_recorded"] == 1
+        timeline = asyncio.run(main.memory_store.get_summary("hist"))
+        assert [line.split("ref ")[-1][0] for line in timeline] == ["0", "1", "2", "3", "4"]
+        assert asyncio.run(main.memory_store.get_message_count("hist")) == 5
+
+        # Edited history: nothing re-processed, fingerprint re-anchored
+        edited = history_for(5)
+        edited[0]["text"] = "something else"
+        send(5, edited)
+        assert stats["diverged"] == 1 and stats["messages_recorded"] == 1
+        send(6, edited + [{"sender": "scammer", "text": SCAMMER[5]}, {"sender": "user", "text": "ok"}])
+        assert stats["in_sync"] >= 4 and stats["messages_recorded"] == 1
+    finally:
+        Config.HISTORY_RECONCILE = reconcile
+
+
+def test_cold_session_bootstrap_is_batched(install_stubs):
+    fake, stub = install_stubs()
+    reconcile = Config.HISTORY_RECONCILE
+    Config.HISTORY_RECONCILE = True
+    client = TestClient(main.app)
+    history = history_for(20)  # 20 incoming messages + 20 replies
+    try:
+        payload = {"sessionId": "cold", "message": {"sender": "scammer", "text": SCAMMER[20]},
+                   "conversationHistory": history}
+        assert client.post("/detect", json=payload, headers=HEADERS).status_code == 200
+        timeline = asyncio.run(main.memory_store.get_summary("cold"))
+        assert len(timeline) == 21 and "ref 20" in timeline[-1]
+        assert asyncio.run(main.memory_store.get_message_count("cold")) == 21
+        # 20 messages packed BATCH_EXTRACTION_SIZE per call, plus this turn's extraction
+        assert stub.calls["extraction"] <= -(-20 // Config.BATCH_EXTRACTION_SIZE) + 1
+        assert main.history_reconciler.stats["bootstrap"] >= 1
+
+        # What append_turns cached is what a fresh load sees (digest folding included)
+        cached = main.memory_store.cache.get("cold") if main.memory_store.cache is not None else None
+        store = MemoryStore()
+        store.redis = fake
+        store.cache = None
+        loaded = asyncio.run(store.begin_turn("cold"))
+        if cached is not None:
+            assert loaded.summary == cached.summary and loaded.digest == cached.digest
+            assert loaded.history_fp == cached.history_fp and loaded.history_len == len(history) + 1
+    finally:
+        Config.HISTORY_RECONCILE = reconcile
+
+
+def test_coalesced_burst_is_not_caught_up_again(install_stubs):
+    install_stubs()
+    reconcile = Config.HISTORY_RECONCILE
+    Config.HISTORY_RECONCILE = True
+    window = Config.SESSION_COALESCE_WINDOW_MS
+    Config.SESSION_COALESCE_WINDOW_MS = 20
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def send(i, history):
+                payload = {"sessionId": "burst-sync", "message": {"sender": "scammer", "text": SCAMMER[i]},
+                           "conversationHistory": history}
+                assert (await client.post("/detect", json=payload, headers=HEADERS)).status_code == 200
+
+            await send(0, [])
+            # Each message of the burst carries the ones before it (no replies in between)
+            history = [{"sender": "scammer", "text": SCAMMER[0]}, {"sender": "user", "text": "Which card?"}]
+            await asyncio.gather(*(send(i, history + [{"sender": "scammer", "text": SCAMMER[j]} for j in range(1, i)])
+                                   for i in range(1, 4)))
+        timeline = await main.memory_store.get_summary("burst-sync")
+        assert [line.split("ref ")[-1][0] for line in timeline] == ["0", "1", "2", "3"]
+        assert await main.memory_store.get_message_count("burst-sync") == 4
+        assert main.session_serializer.stats["coalesced"] >= 2
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        Config.HISTORY_RECONCILE = reconcile
+        Config.SESSION_COALESCE_WINDOW_MS = window
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,86 @@
+import json
+import asyncio
+from config import Config
+from llm_stub import LLMStub, stub_gateway
+from llm_scorer import LLMScorer
+from persona_agent import PersonaAgent
+from models import ExtractedSignals
+
+
+def scorer_messages(i: int) -> list:
+    return [
+        {"role": "system", "content": "You are an expert Scam Detection Analyst."},
+        {"role": "user", "content": f"[TIMELINE] message {i} [URGENCY]"},
+    ]
+
+
+def test_agents_share_gateway_against_stub():
+    async def scenario():
+        stub = LLMStub()
+        gateway = stub_gateway(stub)
+        scorer = LLMScorer(gateway=gateway)
+        persona = PersonaAgent(gateway=gateway)
+
+        result = await scorer.score_intent(["[ts] scammer (Urgency|Aggressive): pay now... [URGENCY]"], {})
+        assert result.intent_score == 0.9
+
+        signals = ExtractedSignals(
+            urgency_detected=True, sensitive_info_request=False, suspicious_links=[],
+            suspicious_upi=[], suspicious_phones=[], sentiment="negative",
+            conversation_phase="Urgency", tone="Aggressive",
+        )
+        reply = await persona.generate_reply("Pay now", [], signals)
+        assert reply.startswith("Wait")
+        assert stub.calls["scorer"] == 1 and stub.calls["persona"] == 1
+        assert gateway.snapshot()["completed"] == 2
+        await gateway.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_concurrency_is_capped():
+    async def scenario():
+        original = Config.LLM_MAX_CONCURRENCY
+        Config.LLM_MAX_CONCURRENCY = 3
+        try:
+            stub = LLMStub(latency_ms=20)
+            gateway = stub_gateway(stub)
+            await asyncio.gather(*[
+                gateway.chat(model=Config.LLM_MODEL, messages=scorer_messages(i)) for i in range(12)
+            ])
+            assert stub.max_in_flight <= 3
+            assert gateway.snapshot()["completed"] == 12
+            assert gateway.snapshot()["queue_depth"] == 0
+            await gateway.aclose()
+        finally:
+            Config.LLM_MAX_CONCURRENCY = original
+
+    asyncio.run(scenario())
+
+
+def test_rate_limits_are_retried():
+    async def scenario():
+        original = Config.LLM_BACKOFF_BASE
+        Config.LLM_BACKOFF_BASE = 0.001
+        try:
+            stub = LLMStub(rate_limit_every=2)
+            gateway = stub_gateway(stub)
+            for i in range(4):
+                completion = await gateway.chat(model=Config.LLM_MODEL, messages=scorer_messages(i))
+                assert json.loads(completion.choices[0].message.content)["intent_score"] == 0.9
+            stats = gateway.snapshot()
+            assert stats["rate_limited"] == stub.rate_limited > 0
+            assert stats["retries"] == stats["rate_limited"]
+            assert stats["errors"] == 0
+            await gateway.aclose()
+        finally:
+            Config.LLM_BACKOFF_BASE = original
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_agents_share_gateway_against_stub()
+    test_concurrency_is_capped()
+    test_rate_limits_are_retried()
+    print("LLM gateway tests passed!")
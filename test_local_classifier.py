@@ -0,0 +1,103 @@
+import os
+import asyncio
+import tempfile
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from context_window import build_context
+from fake_redis import FakeRedis
+from local_classifier import HashedNgramModel, LocalIntentClassifier
+from memory_store import MemoryStore
+from train_classifier import export_examples, train
+
+SCAM = ["[t] scammer (Urgency|Aggressive): Your KYC is pending, account will be blocked... [URGENCY]",
+        "[t] scammer (Extraction|Aggressive): Share the OTP to verify immediately... [URGENCY, SENSITIVE_ASK]"]
+SAFE = ["[t] scammer (Introduction|Friendly): I am your neighbour from flat 12, we met at the market...",
+        "[t] scammer (Introduction|Friendly): Are you coming to the society meeting on Sunday?..."]
+EXAMPLES = [(SCAM, 1), (SCAM[1:], 1), (SAFE, 0), (SAFE[1:], 0)] * 5
+
+
+def test_train_save_load_roundtrip():
+    model = HashedNgramModel.train(EXAMPLES)
+    assert model.predict(SCAM) > 0.5 > model.predict(SAFE)
+    path = os.path.join(tempfile.mkdtemp(), "intent_model.json")
+    model.save(path)
+    loaded = HashedNgramModel.load(path)
+    assert loaded.version == model.version and loaded.meta["examples"] == len(EXAMPLES)
+    assert loaded.predict_batch([SCAM, SAFE]) == [model.predict(SCAM), model.predict(SAFE)]
+
+    # Retraining keeps the previous model next to the new one for rollback
+    examples = [{"timeline": t, "label": label} for t, label in EXAMPLES]
+    newer, _ = train(examples, path, holdout=0, epochs=5)
+    assert newer.version != model.version
+    assert os.path.exists(path.replace(".json", f".{model.version}.json"))
+
+    # Unknown formats and missing files leave the tier disabled (LLM only)
+    tier = LocalIntentClassifier(os.path.join(tempfile.mkdtemp(), "missing.json"))
+    assert tier.model is None and tier.score_intent(SCAM) is None
+
+
+def test_confidence_band():
+    tier = LocalIntentClassifier(model=HashedNgramModel.train(EXAMPLES, epochs=30))
+    scam = tier.score_intent(SCAM)
+    assert scam is not None and scam.intent_score >= Config.LOCAL_CLASSIFIER_SCAM_MIN
+    assert tier.model.version in scam.reasoning
+    assert tier.score_intent(["[t] scammer (Introduction|Friendly): hello there..."]) is None
+    assert tier.stats["confident_scam"] == 1 and tier.stats["uncertain"] == 1
+
+
+def test_export_matches_the_pipeline_context_after_folding():
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        store.cache = None
+        turns = Config.CONTEXT_RECENT_TURNS + Config.CONTEXT_DIGEST_EVERY + 3
+        for i in range(turns):
+            state = await store.begin_turn("folded")
+            await store.commit_turn("folded", {}, f"[t] scammer (Urgency|Aggressive): delta {i}...", state=state)
+        (example,) = await export_examples(store)
+        state = await store.begin_turn("folded")
+        assert state.folded > 0 and example["timeline"] == build_context(state)
+        # Folded deltas are only in the digest, not repeated verbatim
+        assert not any("delta 0..." in line for line in example["timeline"])
+
+    asyncio.run(scenario())
+
+
+def test_export_and_pipeline_tier(install_stubs, monkeypatch):
+    _, stub = install_stubs()
+    client = TestClient(main.app)
+    headers = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+    # Every turn goes to intent scoring (no rule, reputation or campaign shortcuts), serially
+    monkeypatch.setattr(Config, "FAST_PATH_MODE", "off")
+    for name in ("REPUTATION_ENABLED", "CAMPAIGN_INDEX_ENABLED", "SPECULATIVE_SCORING"):
+        monkeypatch.setattr(Config, name, False)
+
+    def send(session_id, text):
+        payload = {"sessionId": session_id, "message": {"sender": "scammer", "text": text}}
+        assert client.post("/detect", json=payload, headers=headers).status_code == 200
+
+    send("export-scam", "Send the OTP immediately to kyc.update@ybl")
+    send("export-safe", "Hello, is this Ravi?")
+    examples = asyncio.run(export_examples(main.memory_store))
+    by_session = {e["sessionId"]: e for e in examples}
+    assert {sid: e["label"] for sid, e in by_session.items()} == {"export-scam": 1, "export-safe": 0}
+    assert "kyc.update@ybl" in by_session["export-scam"]["timeline"][-1]
+
+    monkeypatch.setattr(main, "local_classifier", LocalIntentClassifier(model=HashedNgramModel.train(
+        [(e["timeline"], e["label"]) for e in examples] * 10, epochs=30)))
+    scorer_calls = stub.calls["scorer"]
+    send("tier-scam", "Send the OTP immediately to kyc.update@ybl")
+    assert stub.calls["scorer"] == scorer_calls  # confident: no LLM scorer call
+    assert main.local_classifier.stats["confident_scam"] >= 1
+    assert asyncio.run(main.memory_store.is_session_scam("tier-scam"))
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
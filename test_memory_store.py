@@ -0,0 +1,154 @@
+import asyncio
+from fake_redis import FakeRedis
+from config import Config
+from memory_store import MemoryStore
+from migrate_sessions import migrate
+from context_window import build_context, estimate_tokens
+
+
+def make_store():
+    store = MemoryStore()
+    store.redis = FakeRedis()
+    return store
+
+
+def test_pipelined_turn_matches_legacy_reads():
+    async def scenario():
+        store = make_store()
+        session_id = "pipeline-session"
+
+        state = await store.begin_turn(session_id)
+        assert state.message_count == 1
+        assert not state.is_scam
+        assert state.summary == []
+
+        artifacts = {"upi_ids": ["scam@upi"], "bankAccounts": ["100020003000"], "bankNames": []}
+        await store.commit_turn(session_id, artifacts, "delta-1", mark_scam=True)
+
+        # Pipelined state must agree with the one-command-per-call API
+        state = await store.begin_turn(session_id)
+        assert state.message_count == await store.get_message_count(session_id) == 2
+        assert state.is_scam and await store.is_session_scam(session_id)
+        assert state.summary == await store.get_summary(session_id) == ["delta-1"]
+        assert state.artifacts == await store.get_artifacts(session_id)
+        assert state.artifacts["upi_ids"] == ["scam@upi"]
+
+    asyncio.run(scenario())
+
+
+def test_two_round_trips_per_turn():
+    async def scenario():
+        store = make_store()
+        await store.begin_turn("rt-session")
+        await store.commit_turn("rt-session", {"phone_numbers": ["9988776655"]}, "delta", mark_scam=True)
+        assert store.redis.round_trips == 2
+
+    asyncio.run(scenario())
+
+
+def test_merge_artifacts_dedupes():
+    merged = MemoryStore.merge_artifacts(
+        {"upi_ids": ["a@upi"]},
+        {"upi_ids": ["a@upi", "b@upi"], "upiIds": ["a@upi"]},
+    )
+    assert merged["upi_ids"] == ["a@upi", "b@upi"]
+    assert set(merged) == set(MemoryStore.ARTIFACT_TYPES)
+
+
+def test_rolling_context_stays_bounded():
+    async def scenario():
+        store = make_store()
+        session_id = "long-session"
+        for turn in range(100):
+            state = await store.begin_turn(session_id)
+            tag = " [URGENCY]" if turn == 3 else ""
+            delta = f"[2026-01-21T10:{turn % 60:02d}:00] scammer (Urgency|Aggressive): message {turn}...{tag}"
+            await store.commit_turn(session_id, {}, delta, state=state)
+
+        state = await store.begin_turn(session_id)
+        window = Config.CONTEXT_RECENT_TURNS + Config.CONTEXT_DIGEST_EVERY
+        assert len(state.summary) < window
+        assert state.folded + len(state.summary) == 100
+        assert state.digest["turns"] == state.folded
+        # The full log is still kept for export
+        assert len(await store.get_summary(session_id)) == 100
+
+        context = build_context(state, "current turn")
+        assert context[0].startswith("[DIGEST] ")
+        assert "URGENCY x1" in context[0]
+        assert context[-1] == "current turn"
+        assert sum(estimate_tokens(line) + 1 for line in context) <= Config.CONTEXT_TOKEN_BUDGET
+
+        tight = build_context(state, "current turn", budget_tokens=40)
+        assert tight[-1] == "current turn"
+        assert sum(estimate_tokens(line) + 1 for line in tight) <= 40
+
+    asyncio.run(scenario())
+
+
+def test_compact_layout_with_sliding_ttl():
+    async def scenario():
+        store = make_store()
+        state = await store.begin_turn("ttl-session")
+        artifacts = {name: [f"{name}-1", f"{name}-2"] for name in MemoryStore.ARTIFACT_TYPES}
+        await store.commit_turn("ttl-session", artifacts, "delta", mark_scam=True, state=state)
+        assert sorted(store.redis.data) == ["session:ttl-session", "session:ttl-session:log"]
+        for key in store.redis.data:
+            assert 0 < await store.redis.ttl(key) <= Config.SESSION_TTL
+
+        store.redis.expiry.clear()  # activity refreshes the TTL
+        await store.begin_turn("ttl-session")
+        assert all([await store.redis.ttl(key) > 0 for key in store.redis.data])
+
+    asyncio.run(scenario())
+
+
+def write_legacy_session(redis, session_id):
+    redis._cmd_set(f"msg_count:{session_id}", 3)
+    redis._cmd_set(f"scam_status:{session_id}", "1")
+    redis._cmd_rpush(f"summary:{session_id}", "old-1", "old-2", "old-3")
+    redis._cmd_sadd(f"artifacts:{session_id}:upi_ids", "legacy@upi")
+
+
+def test_legacy_session_migrated_on_first_touch():
+    async def scenario():
+        store = make_store()
+        write_legacy_session(store.redis, "old-session")
+
+        state = await store.begin_turn("old-session")
+        assert state.message_count == 4 and state.is_scam
+        assert state.summary == ["old-1", "old-2", "old-3"]
+        assert state.artifacts["upi_ids"] == ["legacy@upi"]
+        assert store.redis.round_trips == 4  # load, legacy read, migrate, reload: once per session
+        assert sorted(store.redis.data) == ["session:old-session", "session:old-session:log"]
+
+        store.redis.reset_stats()
+        await store.begin_turn("old-session")
+        assert store.redis.round_trips == 1
+
+    asyncio.run(scenario())
+
+
+def test_bulk_migration():
+    async def scenario():
+        store = make_store()
+        for i in range(3):
+            write_legacy_session(store.redis, f"bulk-{i}")
+        assert await migrate(store, dry_run=True) == 3
+        assert await migrate(store) == 3
+        assert await migrate(store) == 0
+        assert await store.get_summary("bulk-1") == ["old-1", "old-2", "old-3"]
+        assert await store.get_message_count("bulk-2") == 3
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_pipelined_turn_matches_legacy_reads()
+    test_two_round_trips_per_turn()
+    test_merge_artifacts_dedupes()
+    test_rolling_context_stays_bounded()
+    test_compact_layout_with_sliding_ttl()
+    test_legacy_session_migrated_on_first_touch()
+    test_bulk_migration()
+    print("Memory store tests passed!")
@@ -0,0 +1,94 @@
+import os
+import re
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from metrics import REGISTRY, Counter, Histogram
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+@pytest.fixture
+def client(install_stubs) -> TestClient:
+    REGISTRY.reset()
+    install_stubs()
+    return TestClient(main.app)
+
+
+def sample(text: str, name: str, **labels) -> float:
+    label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = re.escape(name + ("{" + label_str + "}" if label_str else "")) + r" (\S+)"
+    match = re.search(pattern, text)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_histogram_and_counter_render():
+    histogram = Histogram("t_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, stage="a")
+    text = "\n".join(histogram.render())
+    assert 't_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="a",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="a"} 3' in text
+
+    counter = Counter("t_total", "test", ("kind",))
+    counter.inc(kind="x")
+    counter.inc(2, kind="x")
+    assert counter.value(kind="x") == 3
+
+
+def test_render_keeps_precision_and_escapes_labels():
+    counter = Counter("t_bytes_total", "test", ("path",))
+    counter.inc(1234568, path='C:\\tmp\n"x"')
+    counter.inc(0.5, path='C:\\tmp\n"x"')
+    line = counter.render()[-1]
+    assert line == 't_bytes_total{path="C:\\\\tmp\\n\\"x\\""} 1234568.5'
+    assert float(line.rsplit(" ", 1)[1]) == 1234568.5  # %g would have rendered 1.23457e+06
+
+    histogram = Histogram("t_tokens", "test", buckets=(100,))
+    histogram.observe(1234567)
+    histogram.observe(2)
+    assert "t_tokens_sum 1234569.0" in histogram.render()
+
+
+def test_metrics_endpoint_reports_pipeline(client):
+    for i in range(2):
+        text = f"Your card will be blocked today, ref {i}"  # ambiguous for the rules: goes to the LLMs
+        payload = {"sessionId": "metrics-session", "message": {"sender": "scammer", "text": text}}
+        assert client.post("/detect", json=payload, headers=HEADERS).status_code == 200
+    text = client.get("/metrics").text
+
+    assert sample(text, "scam_agent_stage_seconds_count", stage="total") == 2
+    assert sample(text, "scam_agent_stage_seconds_count", stage="state_load") == 2
+    assert sample(text, "scam_agent_redis_round_trips_total", op="begin_turn") == 2
+    assert sample(text, "scam_agent_redis_round_trips_total", op="commit_turn") == 2
+    assert sample(text, "scam_agent_session_scam_checks_total", result="not_scam") == 2
+    assert sample(text, "scam_agent_llm_calls_total", agent="scorer", outcome="ok") >= 1
+    assert sample(text, "scam_agent_llm_tokens_total", agent="scorer", direction="prompt") > 0
+    assert sample(text, "scam_agent_llm_calls_total", agent="extraction", outcome="ok") == 2
+    assert sample(text, "scam_agent_detections_total", verdict="safe", path="llm") \
+        + sample(text, "scam_agent_detections_total", verdict="scam", path="llm") == 2
+
+
+def test_disabled_metrics_and_enabled_tracing(client):
+    payload = {"sessionId": "metrics-off", "message": {"sender": "scammer", "text": "Hello, is this Ravi?"}}
+    saved = Config.METRICS_ENABLED, Config.TRACING_ENABLED
+    Config.METRICS_ENABLED = False
+    Config.TRACING_ENABLED = True  # opentelemetry-api without an SDK: no-op spans
+    try:
+        assert client.post("/detect", json=payload, headers=HEADERS).status_code == 200
+        assert client.get("/metrics").status_code == 404
+        assert REGISTRY.render().count("\n") == sum(2 for _ in REGISTRY.metrics)  # HELP/TYPE only
+    finally:
+        Config.METRICS_ENABLED, Config.TRACING_ENABLED = saved
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main(["-q", __file__]))
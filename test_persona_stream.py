@@ -0,0 +1,92 @@
+import os
+import json
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import httpx
+
+import main
+from llm_stub import LLMStub, StreamingASGITransport
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+async def read_events(client, session_id: str, text: str) -> list:
+    """[(event, data)] from /detect/stream, read incrementally."""
+    payload = {"sessionId": session_id, "message": {"sender": "scammer", "text": text}}
+    events = []
+    async with client.stream("POST", "/detect/stream", json=payload, headers=HEADERS) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        name = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                name = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((name, json.loads(line[len("data: "):])))
+    return events
+
+
+def test_stream_tokens_then_verdict(install_stubs):
+    fake, _ = install_stubs(LLMStub(token_ms=1))
+
+    async def scenario():
+        transport = StreamingASGITransport(main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            events = await read_events(client, "stream-scam", "Send the OTP immediately to kyc.update@ybl")
+        tokens = [data["text"] for name, data in events if name == "token"]
+        assert len(tokens) > 1
+        assert [name for name, _ in events] == ["token"] * len(tokens) + ["verdict"]
+        verdict = events[-1][1]
+        assert verdict["scamDetected"] is True
+        assert verdict["reply"] == "".join(tokens)
+        assert verdict["totalMessagesExchanged"] == 1
+        # The turn is recorded and the reply stored like a worker-generated one
+        assert await fake.get("persona_reply:stream-scam:1") == verdict["reply"]
+        assert len(await main.memory_store.get_summary("stream-scam")) == 1
+
+    asyncio.run(scenario())
+
+
+def test_safe_message_streams_only_verdict(install_stubs):
+    _, stub = install_stubs()
+
+    async def scenario():
+        transport = StreamingASGITransport(main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            events = await read_events(client, "stream-safe", "Hello, is this Ravi?")
+        assert [name for name, _ in events] == ["verdict"]
+        assert events[0][1]["scamDetected"] is False
+        assert events[0][1]["reply"] is None
+        assert stub.calls.get("persona", 0) == 0
+
+    asyncio.run(scenario())
+
+
+def test_first_token_before_reply_completes(install_stubs):
+    install_stubs(LLMStub(latency_ms=5, token_ms=5))
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        transport = StreamingASGITransport(main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            payload = {"sessionId": "stream-timing", "message": {
+                "sender": "scammer", "text": "Send the OTP immediately to kyc.update@ybl"}}
+            arrivals = []
+            async with client.stream("POST", "/detect/stream", json=payload, headers=HEADERS) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        arrivals.append((line, loop.time()))
+        token_times = [t for line, t in arrivals if line == "event: token"]
+        assert len(token_times) > 3
+        # Tokens trickle in as the LLM produces them instead of arriving all at once
+        assert token_times[-1] - token_times[0] > 0.03
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
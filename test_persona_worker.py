@@ -0,0 +1,67 @@
+import os
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from llm_stub import LLMStub
+from reply_bank import pick_reply, REPLY_BANK, DEFAULT_REPLIES
+
+SCAM_TEXT = "URGENT: your SBI account will be blocked immediately. Share the OTP and pay to kyc.update@ybl now"
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+@pytest.fixture
+def setup_app(install_stubs, monkeypatch):
+    """`setup_app(mode) -> LLMStub`: stubs installed, PERSONA_MODE set for the test."""
+    def setup(mode: str) -> LLMStub:
+        monkeypatch.setattr(Config, "PERSONA_MODE", mode)
+        return install_stubs(LLMStub(kind_latency_ms={"persona": 50}))[1]
+
+    return setup
+
+
+def test_reply_bank_pick_is_deterministic():
+    assert pick_reply("Payment", "s1", 3) == pick_reply("payment ", "s1", 3)
+    assert pick_reply("Payment", "s1", 3) in REPLY_BANK["Payment"]
+    assert pick_reply("Unknown", "s1", 3) in DEFAULT_REPLIES
+
+
+def test_bank_mode_returns_canned_reply_and_generates_in_background(setup_app):
+    stub = setup_app("bank")
+    with TestClient(main.app) as client:
+        payload = {"sessionId": "persona-bank", "message": {"sender": "scammer", "text": SCAM_TEXT}}
+        body = client.post("/detect", json=payload, headers=HEADERS).json()
+        assert body["status"] == "success"
+        assert body["reply"] and body["replyTurn"] == 1 and body["replyPending"] is True
+
+        polled = client.get("/reply/persona-bank/1?wait=5", headers=HEADERS)
+        assert polled.status_code == 200
+        assert polled.json()["reply"] == "Wait, why do you need that? Is this really from the bank?"
+        assert stub.calls["persona"] == 1
+
+        missing = client.get("/reply/persona-bank/9", headers=HEADERS)
+        assert missing.status_code == 202 and missing.json()["status"] == "pending"
+
+
+def test_async_mode_leaves_reply_pending_and_inline_is_unchanged(setup_app):
+    setup_app("async")
+    with TestClient(main.app) as client:
+        payload = {"sessionId": "persona-async", "message": {"sender": "scammer", "text": SCAM_TEXT}}
+        body = client.post("/detect", json=payload, headers=HEADERS).json()
+        assert body["reply"] is None and body["replyPending"] is True
+        assert client.get("/reply/persona-async/1?wait=5", headers=HEADERS).json()["reply"]
+
+    setup_app("inline")
+    with TestClient(main.app) as client:
+        payload = {"sessionId": "persona-inline", "message": {"sender": "scammer", "text": SCAM_TEXT}}
+        body = client.post("/detect", json=payload, headers=HEADERS).json()
+        assert body == {"status": "success", "reply": "Wait, why do you need that? Is this really from the bank?"}
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main(["-q", __file__]))
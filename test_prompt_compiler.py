@@ -0,0 +1,102 @@
+import json
+import asyncio
+
+from config import Config
+from context_window import estimate_tokens
+from extraction_agent import ExtractionAgent, EXTRACTION_PROMPT
+from llm_scorer import LLMScorer, SCORER_PROMPT
+from llm_stub import LLMStub, stub_gateway
+from models import ExtractedSignals, ScamEventInput
+from persona_agent import PersonaAgent, PERSONA_PROMPT
+from prompt_compiler import PROMPT_TRUNCATIONS, compact, compile_messages, encode_artifacts
+
+
+class RecordingStub(LLMStub):
+    """Keeps the messages of every call."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    async def complete(self, body: dict):
+        self.sent.append(body["messages"])
+        return await super().complete(body)
+
+
+def test_artifacts_are_merged_deduplicated_and_compact():
+    artifacts = {
+        "suspicious_links": ["http://kyc-verify.in"], "phishingLinks": ["http://kyc-verify.in", "http://sbi-help.co"],
+        "upi_ids": ["kyc@ybl"], "upiIds": ["kyc@ybl"], "phone_numbers": [], "bankAccounts": [],
+        "suspiciousKeywords": [f"kw{i}" for i in range(Config.PROMPT_ARTIFACT_MAX_ITEMS + 5)],
+    }
+    encoded = encode_artifacts(artifacts)
+    assert " " not in encoded
+    assert json.loads(encoded) == {
+        "phishingLinks": ["http://kyc-verify.in", "http://sbi-help.co"],
+        "upiIds": ["kyc@ybl"],
+        "suspiciousKeywords": [f"kw{i}" for i in range(Config.PROMPT_ARTIFACT_MAX_ITEMS)],
+    }
+    assert encode_artifacts({"upi_ids": [], "phone_numbers": []}) == "" and encode_artifacts(None) == ""
+    assert compact("\n    Line one.\n\n        Line two.\n    ") == "Line one.\nLine two."
+
+
+def test_sections_are_trimmed_by_policy_within_the_budget():
+    timeline = [f"[2024-01-01T10:{i:02d}:00] scammer (Urgency|Aggressive): message number {i}..." for i in range(60)]
+    before = PROMPT_TRUNCATIONS.value(agent="scorer", section="Timeline")
+    messages = compile_messages("scorer", SCORER_PROMPT, [
+        ("Artifacts", encode_artifacts({"upi_ids": ["kyc@ybl"]}), "clip"),
+        ("Timeline", timeline, "lines"),
+    ], budget_tokens=400)
+    user = messages[1]["content"]
+    assert messages[0]["content"] == SCORER_PROMPT
+    assert estimate_tokens(SCORER_PROMPT) + estimate_tokens(user) <= 400
+    assert user.startswith('Artifacts: {"upiIds":["kyc@ybl"]}\nTimeline:\n')
+    assert user.endswith(timeline[-1]) and timeline[0] not in user  # oldest lines dropped first
+    assert PROMPT_TRUNCATIONS.value(agent="scorer", section="Timeline") == before + 1
+
+    # clip cuts long text at the end, keep never trims, empty sections are left out
+    texts = json.dumps(["x" * 2000, "y"])
+    user = compile_messages("persona", PERSONA_PROMPT, [
+        ("Scammer message", "z" * 4000, "clip"), ("History", [], "lines"), ("Batch", texts, "keep"),
+    ], budget_tokens=600)[1]["content"]
+    message, batch = user.split("\n")
+    assert message.endswith("...") and estimate_tokens(message) < 600 - estimate_tokens(texts)
+    assert batch == f"Batch: {texts}" and "History" not in user
+
+
+def test_agents_send_static_system_prompts_and_record_tokens():
+    stub = RecordingStub()
+    gateway = stub_gateway(stub)
+
+    async def scenario():
+        extraction = ExtractionAgent(gateway=gateway)
+        persona = PersonaAgent(gateway=gateway)
+        scorer = LLMScorer(gateway=gateway)
+        for text in ("Your SBI account is blocked, pay to kyc@ybl", "Send the OTP now"):
+            await extraction.extract_signals(ScamEventInput(sessionId="p", message={"sender": "scammer", "text": text}))
+            signals = ExtractedSignals(urgency_detected=True, sensitive_info_request=True, suspicious_links=[],
+                                       suspicious_upi=[], suspicious_phones=[], sentiment="negative",
+                                       conversation_phase="Urgency", tone="Aggressive", agentNotes="OTP ask")
+            await persona.generate_reply(text, ["[t] scammer (Urgency|Aggressive): earlier..."], signals)
+            await scorer.score_intent([f"[t] scammer (Urgency|Aggressive): {text}"], {"upi_ids": ["kyc@ybl"]})
+        await extraction.extract_signals_batch(["one", "two"])
+
+    asyncio.run(scenario())
+    systems = [messages[0]["content"] for messages in stub.sent]
+    assert systems[0] == systems[3] == EXTRACTION_PROMPT and systems[1] == systems[4] == PERSONA_PROMPT
+    assert systems[2] == systems[5] == SCORER_PROMPT
+    assert "kyc@ybl" not in systems[0] and stub.sent[0][1]["content"].count("kyc@ybl") == 1  # message sent once
+    assert "Agent Notes: OTP ask" in stub.sent[1][1]["content"]
+    assert stub.calls == {"extraction": 3, "scorer": 2, "persona": 2, "other": 0}
+
+    tokens = gateway.snapshot()["tokens"]
+    assert tokens["extraction"]["calls"] == 3 and tokens["scorer"]["calls"] == 2
+    assert tokens["persona"]["in"] > 0 and tokens["persona"]["out"] > 0
+    assert tokens["scorer"]["in_per_call"] == tokens["scorer"]["in"] / 2
+
+
+if __name__ == "__main__":
+    test_artifacts_are_merged_deduplicated_and_compact()
+    test_sections_are_trimmed_by_policy_within_the_budget()
+    test_agents_send_static_system_prompts_and_record_tokens()
+    print("Prompt compiler tests passed!")
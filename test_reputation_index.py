@@ -0,0 +1,54 @@
+import os
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from reputation_index import ReputationIndex, artifact_keys, canonical
+
+
+def test_canonical_forms():
+    assert canonical("upi", " Refund@YBL ") == "refund@ybl"
+    assert canonical("phone", "+91 99887-76655") == "9988776655"
+    assert canonical("link", "https://www.Bit.ly/abc?x=1") == "bit.ly/abc?x=1"
+    assert canonical("link", "bit.ly/abc/#top") == "bit.ly/abc"
+    # Shared hosts are never known bad as a whole, only specific pages on them
+    assert canonical("link", "https://wa.me/") == "" and canonical("link", "docs.google.com") == ""
+    assert canonical("link", "http://sbi-kyc.in") == "sbi-kyc.in"
+    assert artifact_keys({"phishingLinks": ["https://docs.google.com/forms/d/a1", "https://docs.google.com/forms/d/b2"]}) == {
+        ("link", "docs.google.com/forms/d/a1"), ("link", "docs.google.com/forms/d/b2")}
+    assert artifact_keys({"upi_ids": ["a@ybl"], "upiIds": ["A@ybl"], "bankNames": ["SBI"]}) == {("upi", "a@ybl")}
+
+
+def test_known_bad_artifact_short_circuits_llm(install_stubs):
+    _, stub = install_stubs()
+    client = TestClient(main.app)
+    headers = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+    texts = [
+        "Hello sir, kindly send the processing fee to refund.desk@ybl so we can release your refund immediately",
+        "Madam your courier is waiting, transfer the charges to refund.desk@ybl and share the receipt immediately",
+        "Good evening, this is from the lottery department. Deposit to refund.desk@ybl for your prize",
+    ]
+    for i, text in enumerate(texts[:2]):
+        payload = {"sessionId": f"rep-session-{i}", "message": {"sender": "scammer", "text": text}}
+        assert client.post("/detect", json=payload, headers=headers).status_code == 200
+
+    counts = asyncio.run(main.reputation_index.lookup({"upiIds": ["refund.desk@ybl"]}))
+    assert counts[("upi", "refund.desk@ybl")] == {"seen": 2, "scam": 2}
+    sessions = asyncio.run(main.reputation_index.sessions_for("upi", "refund.desk@ybl"))
+    assert sessions == ["rep-session-1", "rep-session-0"]
+
+    llm_calls = stub.calls["extraction"] + stub.calls["scorer"]
+    payload = {"sessionId": "rep-session-new", "message": {"sender": "scammer", "text": texts[2]}}
+    assert client.post("/detect", json=payload, headers=headers).json()["status"] == "success"
+    assert stub.calls["extraction"] + stub.calls["scorer"] == llm_calls
+    assert asyncio.run(main.memory_store.is_session_scam("rep-session-new"))
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
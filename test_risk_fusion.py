@@ -0,0 +1,80 @@
+import os
+import asyncio
+import itertools
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+import main
+import risk_fusion
+from config import Config
+from models import ExtractedSignals
+from risk_engine import RiskEngine
+from risk_fusion import LinearFusion, RULE_FEATURES, rule_risk_batch, get_fusion_scorer
+
+# Every rule risk RiskEngine can produce
+RULE_RISKS = sorted({min(sum(c), 1.0) for n in range(5) for c in itertools.combinations((1.0, 0.4, 0.5, 0.3), n)})
+
+
+def test_bounds_and_decisions():
+    default = LinearFusion()
+    assert get_fusion_scorer().name == "linear"
+    assert default.fuse(0.5, 0.5) == Config.ALPHA * 0.5 + Config.BETA * 0.5
+    # α=0.2, β=0.8, T=0.75: the LLM is always decisive
+    assert all(default.decided(r) is None for r in RULE_RISKS)
+
+    balanced = LinearFusion(alpha=0.5, beta=0.5)
+    assert balanced.bounds(0.4) == (0.2, 0.7)
+    assert balanced.decided(0.4) is False  # even intent 1.0 stays below 0.75
+    assert balanced.decided(0.7) is None
+    assert LinearFusion(alpha=0.8, beta=0.2).decided(1.0) is True  # even intent 0.0 reaches 0.75
+
+
+def test_batch_matches_scalar():
+    scorer = LinearFusion(alpha=0.5, beta=0.5)
+    intents = [i / 10 for i in range(len(RULE_RISKS))]
+    expected = [scorer.fuse(r, i) for r, i in zip(RULE_RISKS, intents)]
+    numpy, risk_fusion.np = risk_fusion.np, None
+    try:
+        fallback = (list(scorer.fuse_batch(RULE_RISKS, intents)), scorer.decided_batch(RULE_RISKS))
+    finally:
+        risk_fusion.np = numpy
+    for fused in (fallback[0], list(scorer.fuse_batch(RULE_RISKS, intents))):
+        assert all(abs(a - b) < 1e-9 for a, b in zip(fused, expected))
+    assert fallback[1] == scorer.decided_batch(RULE_RISKS) == [scorer.decided(r) for r in RULE_RISKS]
+
+    # Signal vectors score like RiskEngine.compute_risk
+    engine = RiskEngine()
+    vectors = list(itertools.product((0, 1), repeat=len(RULE_FEATURES)))
+    for vector, risk in zip(vectors, list(rule_risk_batch(vectors))):
+        flags = dict(zip(RULE_FEATURES, vector))
+        signals = ExtractedSignals(
+            urgency_detected=bool(flags["urgency"]), sensitive_info_request=bool(flags["sensitive"]),
+            suspicious_links=["http://x.in"] if flags["links"] else [], suspicious_upi=[], suspicious_phones=[],
+            sentiment="neutral", conversation_phase="Introduction", tone="Friendly",
+        )
+        known_bad = ["upi:x@ybl"] if flags["known_bad"] else None
+        assert abs(risk - engine.compute_risk(signals, known_bad).rule_risk_score) < 1e-9
+
+
+def test_early_exit_skips_intent_scoring(install_stubs, monkeypatch):
+    _, stub = install_stubs()
+    monkeypatch.setattr(main, "fusion_scorer", LinearFusion(alpha=0.5, beta=0.5))
+    monkeypatch.setattr(Config, "SPECULATIVE_SCORING", False)
+    client = TestClient(main.app)
+    headers = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+    # Urgency only: rule risk 0.4, at most 0.2 + 0.5 < 0.75
+    payload = {"sessionId": "fusion-exit", "message": {
+        "sender": "scammer", "text": "Your card will be blocked today, ref 1"}}
+    assert client.post("/detect", json=payload, headers=headers).status_code == 200
+    assert stub.calls["extraction"] == 1
+    assert stub.calls.get("scorer", 0) == 0
+    assert main.fusion_stats["early_exit_safe"] >= 1
+    assert not asyncio.run(main.memory_store.is_session_scam("fusion-exit"))
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,47 @@
+import asyncio
+from config import Config
+from fake_redis import FakeRedis
+from memory_store import MemoryStore, ACTIVE_KEY
+from session_archive import SessionArchiver
+
+
+def test_idle_sessions_exported_then_deleted():
+    saved = Config.SESSION_ARCHIVE_ENABLED, Config.SESSION_ARCHIVE_AFTER
+    Config.SESSION_ARCHIVE_ENABLED = True
+    Config.SESSION_ARCHIVE_AFTER = 0
+
+    async def scenario():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        exported = []
+        archiver = SessionArchiver(store, hook=exported.extend)
+        for session_id in ("idle-1", "idle-2"):
+            state = await store.begin_turn(session_id)
+            await store.commit_turn(session_id, {"upi_ids": ["x@upi"]}, "delta", mark_scam=True, state=state)
+
+        assert await archiver.sweep_once() == 2
+        assert [r["sessionId"] for r in exported] == ["idle-1", "idle-2"]
+        assert exported[0]["summary"] == ["delta"] and exported[0]["is_scam"]
+        assert store.redis.data == {}
+
+    async def failing_hook(records):
+        raise IOError("archive unavailable")
+
+    async def hook_failure():
+        store = MemoryStore()
+        store.redis = FakeRedis()
+        await store.begin_turn("keep-me")
+        assert await SessionArchiver(store, hook=failing_hook).sweep_once() == 0
+        assert await store.get_message_count("keep-me") == 1
+        assert await store.redis.zcard(ACTIVE_KEY) == 1  # retried on the next sweep
+
+    try:
+        asyncio.run(scenario())
+        asyncio.run(hook_failure())
+    finally:
+        Config.SESSION_ARCHIVE_ENABLED, Config.SESSION_ARCHIVE_AFTER = saved
+
+
+if __name__ == "__main__":
+    test_idle_sessions_exported_then_deleted()
+    print("Session archive tests passed!")
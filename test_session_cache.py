@@ -0,0 +1,98 @@
+import random
+import asyncio
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from models import SessionState
+from session_cache import SessionCache
+
+
+def make_worker(redis) -> MemoryStore:
+    store = MemoryStore()
+    store.redis = redis
+    store.cache = SessionCache()
+    return store
+
+
+async def redis_truth(redis, session_id):
+    """State straight from Redis, without touching the counter."""
+    store = MemoryStore()
+    store.redis = redis
+    store.cache = None
+    state, _ = await store._load_turn(session_id, increment=False)
+    return state
+
+
+async def turn(store: MemoryStore, session_id: str, i: int, scam_every: int = 7):
+    state = await store.begin_turn(session_id)
+    assert state == await redis_truth(store.redis, session_id)  # never serves a stale state
+    await asyncio.sleep(random.random() / 1000)  # let other writers interleave
+    artifacts = {"upi_ids": [f"u{i % 5}@upi"], "phone_numbers": [f"99{i % 3}"]}
+    await store.commit_turn(session_id, artifacts, f"[t{i}] scammer (Urgency|Aggressive): message {i}...",
+                            mark_scam=i % scam_every == 0, state=state)
+
+
+def test_hot_session_served_from_memory():
+    async def scenario():
+        redis = FakeRedis()
+        store = make_worker(redis)
+        for i in range(1, 40):  # long enough to fold deltas into the digest
+            await turn(store, "hot-session", i, scam_every=1000)
+        redis.reset_stats()
+        state = await store.begin_turn("hot-session")
+        assert redis.round_trips == 1 and redis.commands == 4  # counter, version, two TTL refreshes
+        assert state.folded > 0 and state.message_count == 40
+        assert store.cache.stats["hits"] == 39 and store.cache.stats["misses"] == 1
+        assert store.cache.snapshot()["hit_rate"] > 0.9
+
+        assert not await store.is_session_scam("hot-session")
+        await store.mark_session_as_scam("hot-session")
+        await store.begin_turn("hot-session")  # reloaded: the write bumped the version
+        redis.reset_stats()
+        assert await store.is_session_scam("hot-session")
+        assert redis.round_trips == 1 and redis.commands == 1  # version check only
+
+        # Deleted by another worker: the cached positive is not served
+        await make_worker(redis).delete_session("hot-session")
+        assert not await store.is_session_scam("hot-session")
+        assert store.cache.get("hot-session") is None
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_writers_stay_coherent():
+    random.seed(7)
+
+    async def scenario():
+        redis = FakeRedis()
+        workers = [make_worker(redis), make_worker(redis)]
+        sessions = ["shared-1", "shared-2", "shared-3"]
+        jobs = [turn(random.choice(workers), random.choice(sessions), i) for i in range(1, 200)]
+        for start in range(0, len(jobs), 6):  # bursts of concurrent turns across both workers
+            await asyncio.gather(*jobs[start:start + 6])
+
+        for worker in workers:
+            for session_id in sessions:
+                truth = await redis_truth(redis, session_id)
+                assert await worker.get_summary(session_id) == await redis.lrange(f"session:{session_id}:log", 0, -1)
+                assert await worker.get_artifacts(session_id) == truth.artifacts
+                assert await worker.is_session_scam(session_id) == truth.is_scam
+        assert sum(w.cache.stats["stale"] for w in workers) > 0
+        assert sum(w.cache.stats["hits"] for w in workers) > 0
+
+    asyncio.run(scenario())
+
+
+def test_lru_is_bounded():
+    cache = SessionCache(max_size=2)
+    for version, session_id in enumerate(["a", "b", "c"]):
+        cache.put(session_id, SessionState(version=version))
+    assert list(cache.entries) == ["b", "c"]
+    cache.put("c", SessionState(version=0))  # older than the cached entry: ignored
+    assert cache.peek("c").version == 2
+
+
+if __name__ == "__main__":
+    test_hot_session_served_from_memory()
+    test_concurrent_writers_stay_coherent()
+    test_lru_is_bounded()
+    print("Session cache tests passed!")
@@ -0,0 +1,112 @@
+import os
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from session_router import HashRing, create_router, session_of
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+def test_hash_ring_is_stable_and_balanced():
+    ring = HashRing(["w0", "w1", "w2", "w3"])
+    sessions = [f"session-{i}" for i in range(4000)]
+    owners = {s: ring.node_for(s) for s in sessions}
+    assert owners == {s: HashRing(["w3", "w2", "w1", "w0"]).node_for(s) for s in sessions}
+    counts = [list(owners.values()).count(w) for w in ("w0", "w1", "w2", "w3")]
+    assert min(counts) > 4000 / 4 * 0.6
+
+    # A fifth worker takes about a fifth of the sessions; the rest stay where they were
+    grown = HashRing(["w0", "w1", "w2", "w3", "w4"])
+    moved = [s for s in sessions if grown.node_for(s) != owners[s]]
+    assert all(grown.node_for(s) == "w4" for s in moved)
+    assert 0.1 < len(moved) / len(sessions) < 0.3
+
+    assert session_of("/detect", b'{"sessionId": "abc", "message": {}}') == "abc"
+    assert session_of("/reply/abc/3", b"") == "abc"
+    assert session_of("/detect", b"not json") is None and session_of("/stats", b"") is None
+
+
+def worker_app(name: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/detect")
+    async def detect(request: Request):
+        return {"worker": name, "body": (await request.body()).decode()}
+
+    @app.get("/reply/{session_id}/{turn}")
+    async def reply(session_id: str, turn: int):
+        return {"worker": name, "sessionId": session_id}
+
+    @app.post("/detect/stream")
+    async def stream():
+        async def events():
+            for i in range(3):
+                yield f"event: token\ndata: {i}\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "worker": name}
+
+    return app
+
+
+def test_router_keeps_sessions_on_one_worker():
+    upstreams = ["http://w0", "http://w1", "http://w2"]
+    client = httpx.AsyncClient(mounts={u: httpx.ASGITransport(app=worker_app(u[7:])) for u in upstreams})
+    router = create_router(upstreams, client=client)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=router)
+        async with httpx.AsyncClient(transport=transport, base_url="http://router") as api:
+            for i in range(20):
+                session_id = f"s{i}"
+                owner = router.state.ring.node_for(session_id)[7:]
+                body = f'{{"sessionId": "{session_id}", "message": {{}}}}'
+                detect = await api.post("/detect", content=body, headers=HEADERS)
+                assert detect.json() == {"worker": owner, "body": body}
+                assert (await api.get(f"/reply/{session_id}/1")).json()["worker"] == owner
+            stream = await api.post("/detect/stream", content=b'{"sessionId": "s1"}')
+            assert stream.headers["content-type"].startswith("text/event-stream")
+            assert stream.text.count("event: token") == 3
+            workers = {(await api.get("/health")).json()["worker"] for _ in range(3)}
+            assert workers == {"w0", "w1", "w2"}  # sessionless requests are spread
+        assert router.state.stats["routed"] == 41 and router.state.stats["spread"] == 3
+
+        # Unreachable worker: 502 in the service's error format
+        down = create_router(["http://127.0.0.1:9"])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=down), base_url="http://router") as api:
+            response = await api.get("/health")
+            assert response.status_code == 502 and response.json()["status"] == "error"
+        await client.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_lifespan_opens_per_process_pools_and_stops_tasks(install_stubs, monkeypatch):
+    fake, _ = install_stubs()
+    monkeypatch.setattr(Config, "PERSONA_MODE", "async")
+    with TestClient(main.app) as client:
+        assert main.memory_store.redis is fake  # opened in this process: kept
+        assert len(main.persona_workers.workers) == Config.PERSONA_WORKERS
+        assert client.get("/stats", headers=HEADERS).json()["worker"]["pid"] == os.getpid()
+    assert main.persona_workers.workers == [] and not main.persona_agent.gateway.http_client.is_closed
+
+    # A pool inherited from another process (pre-fork import) is replaced
+    monkeypatch.setattr(main.memory_store, "_pid", -1)
+    main.memory_store.connect()
+    assert main.memory_store.redis is not fake and main.memory_store._pid == os.getpid()
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,105 @@
+import os
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import httpx
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from memory_store import MemoryStore
+from session_serializer import SessionSerializer
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+class Recorder:
+    """`process` stand-in tracking per-session overlap and overall parallelism."""
+
+    def __init__(self):
+        self.active = {}
+        self.running = 0
+        self.max_running = 0
+        self.order = {}
+        self.calls = []
+
+    async def __call__(self, items):
+        session_id = items[0][0]
+        assert not self.active.get(session_id), "two turns of one session overlapped"
+        self.active[session_id] = True
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.calls.append(len(items))
+        await asyncio.sleep(0.01)
+        self.order.setdefault(session_id, []).extend(i for _, i in items)
+        self.running -= 1
+        self.active[session_id] = False
+        return [i for _, i in items]
+
+
+def make_store():
+    store = MemoryStore()
+    store.redis = FakeRedis()
+    return store
+
+
+def test_one_session_in_order_sessions_in_parallel():
+    async def scenario():
+        recorder = Recorder()
+        serializer = SessionSerializer(make_store(), recorder)
+        jobs = [serializer.submit(f"s{n}", (f"s{n}", i)) for i in range(10) for n in range(4)]
+        results = await asyncio.gather(*jobs)
+        assert results == [i for i in range(10) for _ in range(4)]
+        assert all(order == list(range(10)) for order in recorder.order.values())
+        assert recorder.max_running == 4
+        assert serializer.queues == {}
+
+    asyncio.run(scenario())
+
+
+def test_redis_lease_serializes_across_workers():
+    saved = Config.SESSION_LOCK_MODE, Config.SESSION_LOCK_RETRY_INTERVAL
+    Config.SESSION_LOCK_MODE = "redis"
+    Config.SESSION_LOCK_RETRY_INTERVAL = 0.002
+
+    async def scenario():
+        store = make_store()
+        recorder = Recorder()  # shared, so overlap between the two "workers" is caught
+        workers = [SessionSerializer(store, recorder), SessionSerializer(store, recorder)]
+        jobs = [workers[i % 2].submit("shared", ("shared", i)) for i in range(12)]
+        assert sorted(await asyncio.gather(*jobs)) == list(range(12))
+        assert await store.redis.get("lock:session:shared") is None
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        Config.SESSION_LOCK_MODE, Config.SESSION_LOCK_RETRY_INTERVAL = saved
+
+
+def test_burst_coalesced_into_one_evaluation(install_stubs, monkeypatch):
+    monkeypatch.setattr(Config, "SESSION_COALESCE_WINDOW_MS", 20)
+    _, stub = install_stubs()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def send(i):
+                payload = {"sessionId": "burst", "message": {
+                    "sender": "scammer", "text": f"Your card will be blocked today, ref {i}"}}
+                return (await client.post("/detect", json=payload, headers=HEADERS)).json()
+
+            replies = await asyncio.gather(*(send(i) for i in range(4)))
+        timeline = await main.memory_store.get_summary("burst")
+        assert [line.split("ref ")[-1][0] for line in timeline] == ["0", "1", "2", "3"]
+        assert sum(1 for r in replies if r.get("reply")) <= 1  # one reply, for the latest message
+        assert main.session_serializer.stats["coalesced"] >= 3
+        assert stub.calls["extraction"] == 1  # one packed call for the burst
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
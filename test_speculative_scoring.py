@@ -0,0 +1,46 @@
+import os
+import asyncio
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import main
+from config import Config
+from models import ScamEventInput
+
+
+def test_speculative_scoring_cancelled_when_extraction_fails(install_stubs, monkeypatch):
+    install_stubs()
+    cancelled = []
+
+    async def slow_score(timeline, artifacts):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def failing_extraction(event):
+        await asyncio.sleep(0)  # the speculative call is running by now
+        raise RuntimeError("extraction failed")
+
+    async def scenario():
+        event = ScamEventInput(sessionId="spec-leak", message={"sender": "scammer", "text": "Hello, is this Ravi?"})
+        try:
+            await main.process_event(event)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("extraction error swallowed")
+        await asyncio.sleep(0)
+        assert cancelled == [True]
+
+    monkeypatch.setattr(Config, "SPECULATIVE_SCORING", True)
+    monkeypatch.setattr(main.extraction_agent, "extract_signals", failing_extraction)
+    monkeypatch.setattr(main.llm_scorer, "score_intent", slow_score)
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,83 @@
+import os
+import io
+import json
+import logging
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from structured_logging import setup_logging, flush_logging, get_logger, StageTimer, REDACTED
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+PAYLOAD = {"sessionId": "log-session", "message": {"sender": "scammer", "text": "Hello, is this Ravi?"}}
+
+
+def capture(level: str = "INFO", use_queue: bool = False) -> io.StringIO:
+    stream = io.StringIO()
+    setup_logging(logging.StreamHandler(stream), level=level, use_queue=use_queue)
+    return stream
+
+
+def records(stream: io.StringIO) -> list:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def client(install_stubs) -> TestClient:
+    install_stubs()
+    return TestClient(main.app)
+
+
+def test_json_records_through_queue_with_redaction():
+    stream = capture(use_queue=True)
+    get_logger("test").info("hello", extra={"fields": {"headers": {"X-API-Key": "secret", "host": "h"}, "n": 1}})
+    flush_logging()
+    (record,) = records(stream)
+    assert record["msg"] == "hello" and record["logger"] == "scam_agent.test" and record["n"] == 1
+    assert record["headers"] == {"X-API-Key": REDACTED, "host": "h"}
+    setup_logging()
+
+
+def test_detect_logs_one_verdict_record_without_verbose_dumps(client):
+    stream = capture(level="DEBUG")
+    saved = Config.LOG_VERBOSE, Config.LOG_SAMPLE_RATE
+    try:
+        assert client.post("/detect", json=PAYLOAD, headers=HEADERS).status_code == 200
+        logged = records(stream)
+        assert [r["msg"] for r in logged] == ["detect verdict"]
+        verdict = logged[0]
+        assert verdict["sessionId"] == "log-session" and verdict["verdict"] == "SAFE"
+        assert "state_load" in verdict["stages_ms"] and verdict["total_ms"] >= 0
+
+        Config.LOG_VERBOSE = True
+        client.post("/detect", json=PAYLOAD, headers=HEADERS)
+        dump = next(r for r in records(stream) if r["msg"] == "request received")
+        assert dump["headers"]["x-api-key"] == REDACTED
+        assert "Ravi" in dump["body"]
+
+        Config.LOG_VERBOSE = False
+        Config.LOG_SAMPLE_RATE = 0.0
+        before = len(records(stream))
+        client.post("/detect", json=PAYLOAD, headers=HEADERS)
+        assert len(records(stream)) == before
+    finally:
+        Config.LOG_VERBOSE, Config.LOG_SAMPLE_RATE = saved
+        setup_logging()
+
+
+def test_stage_timer_accumulates():
+    timer = StageTimer()
+    with timer.stage("a"):
+        pass
+    with timer.stage("a"):
+        pass
+    assert list(timer.stages) == ["a"] and timer.stages["a"] >= 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(pytest.main(["-q", __file__]))
@@ -0,0 +1,84 @@
+import os
+import asyncio
+import tempfile
+
+os.environ.setdefault("SERVICE_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+
+import main
+from config import Config
+from fake_redis import FakeRedis
+from llm_gateway import LLMGateway
+from local_classifier import HashedNgramModel, LocalIntentClassifier
+
+HEADERS = {"x-api-key": os.environ["SERVICE_API_KEY"]}
+
+
+class FlakyRedis(FakeRedis):
+    """PING fails `failures` times, like a Redis that is still coming up."""
+
+    def __init__(self, failures: int):
+        super().__init__()
+        self.failures = failures
+
+    def _cmd_ping(self):
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("Redis is loading the dataset in memory")
+        return True
+
+
+def test_clients_and_model_are_built_on_first_use():
+    gateway = LLMGateway()
+    assert gateway.http_client is None and gateway._client is None
+    assert gateway.client is not None and gateway.http_client is not None  # first use builds the pool
+    asyncio.run(gateway.aclose())
+    gateway.connect()
+    assert not gateway.http_client.is_closed  # a closed pool is replaced on the next connect
+
+    path = os.path.join(tempfile.mkdtemp(), "intent_model.json")
+    HashedNgramModel.train([(["urgent otp now"], 1), (["hello neighbour"], 0)] * 5).save(path)
+    tier = LocalIntentClassifier(path, lazy=True)
+    assert tier.model is None
+    tier.score_intent(["urgent otp now"])
+    assert tier.model is not None and tier.path is None
+
+
+def test_lifespan_warms_up_before_ready(install_stubs):
+    install_stubs()
+    app = main.create_app()
+    assert TestClient(app).get("/ready").status_code == 503  # lifespan not run: never warmed
+    with TestClient(app) as client:
+        ready = client.get("/ready")
+        assert ready.status_code == 200 and ready.json()["status"] == "ready"
+        timings = ready.json()["timings_ms"]
+        for phase in ("import", "startup", "connect", "warm", "warm.redis", "warm.llm", "background"):
+            assert phase in timings, phase
+        assert client.get("/stats", headers=HEADERS).json()["startup"]["errors"] == {}
+        assert "scam_agent_startup_phase_seconds" in client.get("/metrics").text
+    assert not main.warmup.ready
+
+
+def test_failed_check_is_retried_by_ready(install_stubs, monkeypatch):
+    install_stubs(redis=FlakyRedis(failures=2))  # startup and the first /ready re-check
+    with TestClient(main.app) as client:
+        first = client.get("/ready")
+        assert first.status_code == 503 and first.json()["status"] == "starting"
+        assert "redis" in main.warmup.errors
+        # Still serving: a request does not wait for readiness
+        payload = {"sessionId": "warm", "message": {"sender": "scammer", "text": "Hello, is this Ravi?"}}
+        assert client.post("/detect", json=payload, headers=HEADERS).status_code == 200
+        assert client.get("/ready").status_code == 200 and main.warmup.errors == {}
+
+    monkeypatch.setattr(Config, "WARMUP_ENABLED", False)
+    install_stubs(redis=FlakyRedis(failures=5))
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 200
+        assert "warm" not in main.warmup.checks
+
+
+if __name__ == "__main__":
+    import sys
+    import pytest
+    sys.exit(pytest.main(["-q", __file__]))
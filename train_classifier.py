@@ -0,0 +1,121 @@
+"""
+Training CLI for the local intent classifier (local_classifier.py).
+
+  export  writes labeled sessions from Redis as JSONL, one per session:
+          {"sessionId", "label" (1 = session confirmed scam), "timeline"}
+          where the timeline is the rolling context the scorers see.
+  train   fits a model on exported JSONL and writes it to --out. The model
+          that was there is kept as <out stem>.<version>.json for rollback.
+  eval    accuracy, coverage and agreement of a model on exported JSONL.
+
+Labels are the pipeline's own verdicts, so a model learns to agree with the
+LLM-backed pipeline; review or relabel the export for anything stricter.
+
+Usage: python train_classifier.py export --out sessions.jsonl
+       python train_classifier.py train --data sessions.jsonl [--out intent_model.json] [--holdout 0.2]
+       python train_classifier.py eval --data sessions.jsonl [--model intent_model.json]
+"""
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+from config import Config
+from models import SessionState
+from memory_store import MemoryStore
+from context_window import build_context
+from local_classifier import HashedNgramModel
+
+
+async def export_examples(store: MemoryStore, batch_size: int = 500) -> list:
+    """[{"sessionId", "label", "timeline"}] for every session hash in Redis."""
+    session_ids = []
+    async for key in store.redis.scan_iter(match="session:*", count=1000):
+        if not key.endswith(":log"):
+            session_ids.append(key[len("session:"):])
+    examples = []
+    for start in range(0, len(session_ids), batch_size):
+        for record in await store.export_sessions(sorted(session_ids)[start:start + batch_size]):
+            if record is None or not record["summary"]:
+                continue
+            # As begin_turn loads it: the digest plus only the deltas not folded into it yet
+            state = SessionState(summary=record["summary"][record["folded"]:], digest=record["digest"])
+            examples.append({"sessionId": record["sessionId"], "label": int(record["is_scam"]),
+                             "timeline": build_context(state)})
+    return examples
+
+
+def read_examples(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def split(examples: list, holdout: float, seed: int = 0) -> tuple:
+    shuffled = list(examples)
+    random.Random(seed).shuffle(shuffled)
+    cut = int(len(shuffled) * (1 - holdout))
+    return shuffled[:cut], shuffled[cut:]
+
+
+def evaluate(model: HashedNgramModel, examples: list) -> dict:
+    """Accuracy at 0.5, plus coverage/accuracy of the confident band used in the pipeline."""
+    probabilities = model.predict_batch([e["timeline"] for e in examples])
+    correct = confident = confident_correct = 0
+    for probability, example in zip(probabilities, examples):
+        hit = (probability >= 0.5) == bool(example["label"])
+        correct += hit
+        if probability >= Config.LOCAL_CLASSIFIER_SCAM_MIN or probability <= Config.LOCAL_CLASSIFIER_SAFE_MAX:
+            confident += 1
+            confident_correct += hit
+    total = max(len(examples), 1)
+    return {
+        "examples": len(examples),
+        "accuracy": round(correct / total, 4),
+        "coverage": round(confident / total, 4),
+        "confident_accuracy": round(confident_correct / max(confident, 1), 4),
+    }
+
+
+def train(examples: list, out: str, holdout: float = 0.2, epochs: int = 15, seed: int = 0) -> tuple:
+    train_set, test_set = split(examples, holdout, seed) if holdout else (examples, [])
+    model = HashedNgramModel.train([(e["timeline"], e["label"]) for e in train_set], epochs=epochs, seed=seed)
+    report = evaluate(model, test_set) if test_set else {}
+    model.meta["holdout"] = report
+    if os.path.exists(out):
+        previous = HashedNgramModel.load(out)
+        stem, ext = os.path.splitext(out)
+        os.replace(out, f"{stem}.{previous.version}{ext}")
+    model.save(out)
+    return model, report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export sessions and train the local intent classifier")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="labeled sessions from Redis to JSONL")
+    export_cmd.add_argument("--out", required=True)
+    train_cmd = commands.add_parser("train", help="fit a model on exported JSONL")
+    train_cmd.add_argument("--data", required=True)
+    train_cmd.add_argument("--out", default=Config.LOCAL_CLASSIFIER_PATH)
+    train_cmd.add_argument("--holdout", type=float, default=0.2, help="share held out for evaluation")
+    train_cmd.add_argument("--epochs", type=int, default=15)
+    train_cmd.add_argument("--seed", type=int, default=0)
+    eval_cmd = commands.add_parser("eval", help="evaluate a model on exported JSONL")
+    eval_cmd.add_argument("--data", required=True)
+    eval_cmd.add_argument("--model", default=Config.LOCAL_CLASSIFIER_PATH)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        examples = asyncio.run(export_examples(MemoryStore()))
+        with open(args.out, "w", encoding="utf-8") as f:
+            for example in examples:
+                f.write(json.dumps(example) + "\n")
+        print(f"exported {len(examples)} sessions "
+              f"({sum(e['label'] for e in examples)} scam) to {args.out}", file=sys.stderr)
+    elif args.command == "train":
+        model, report = train(read_examples(args.data), args.out, args.holdout, args.epochs, args.seed)
+        print(f"model {model.version} -> {args.out} holdout {json.dumps(report)}", file=sys.stderr)
+    else:
+        model = HashedNgramModel.load(args.model)
+        print(f"model {model.version} {json.dumps(evaluate(model, read_examples(args.data)))}", file=sys.stderr)
@@ -0,0 +1,93 @@
+"""
+Startup phases and readiness (main.py lifespan, GET /ready).
+
+Importing main.py only builds cheap objects: the Redis client and the LLM
+gateway's connection pool are created at worker startup (or on first use),
+and the local classifier model is read then too. Startup is timed in phases:
+
+  import      main.py module import, from its first line
+  connect     per-worker clients (memory_store.connect, gateway.connect)
+  warm        concurrent checks, each bounded by WARMUP_TIMEOUT: Redis PING,
+              one pooled LLM connection per gateway (TCP + TLS), the local
+              classifier model load in a thread
+  background  persona workers, callback dispatcher, archive sweeper
+
+The worker is ready once every warm check has passed. Checks that failed
+(Redis not up yet, a slow handshake) are re-run by the next GET /ready,
+so readiness recovers without a restart.
+"""
+import time
+import asyncio
+from contextlib import contextmanager
+from config import Config
+from metrics import REGISTRY, Gauge
+from structured_logging import get_logger
+
+logger = get_logger("warmup")
+
+STARTUP_PHASE_SECONDS = REGISTRY.register(Gauge(
+    "scam_agent_startup_phase_seconds", "Duration of each worker startup phase and warm-up check", ("phase",)))
+
+
+class Warmup:
+    def __init__(self):
+        self.timings_ms = {}
+        self.errors = {}
+        self.checks = {}
+        self.ready = False
+        self._lock = None
+
+    def reset(self):
+        """Worker shutdown: not ready until the next startup runs the checks again."""
+        self.checks = {}
+        self.ready = False
+        self._lock = None
+
+    def record(self, phase: str, seconds: float):
+        self.timings_ms[phase] = round(seconds * 1000, 1)
+        STARTUP_PHASE_SECONDS.set(seconds, phase=phase)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    async def _check(self, name: str, check):
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), Config.WARMUP_TIMEOUT)
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {e}"
+            logger.warning("warm-up check failed", extra={"fields": {"check": name, "error": self.errors[name]}})
+        else:
+            self.errors.pop(name, None)
+        self.record(f"warm.{name}", time.perf_counter() - start)
+
+    async def run(self, checks: dict) -> bool:
+        """Runs the named async checks concurrently; ready when all of them pass."""
+        self.checks = dict(checks)
+        self.errors = {}
+        self._lock = asyncio.Lock()
+        with self.phase("warm"):
+            await asyncio.gather(*(self._check(name, check) for name, check in self.checks.items()))
+        self.ready = not self.errors
+        return self.ready
+
+    async def recheck(self) -> bool:
+        """Re-runs the checks that failed (one run at a time, shared by concurrent callers)."""
+        if self.ready or self._lock is None:
+            return self.ready
+        async with self._lock:
+            if not self.ready:
+                failed = [name for name in self.checks if name in self.errors]
+                await asyncio.gather(*(self._check(name, self.checks[name]) for name in failed))
+                self.ready = not self.errors
+                if self.ready:
+                    logger.info("worker ready after re-check", extra={"fields": {"timings_ms": self.timings_ms}})
+        return self.ready
+
+    def snapshot(self) -> dict:
+        return {"ready": self.ready, "timings_ms": self.timings_ms, "errors": self.errors}